@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+预聚合立方体（发布星期 × 发布小时 × 时长档 × 类别 × 封面类型）
+- 每个格子保存各指标的 个数 / 和 / 平方和（numpy 稠密数组，格子数与数据量无关），
+  任意切片的平均值 / 标准差都由这三个量相加得到，不再对全部行做 groupby / pivot_table
+- 增量更新：新行按格子编号 bincount 累加；默认每行都计入（与 pivot_table / groupby 一致，不去重）；
+  给出 key_col 时按该列去重，同一视频再次出现时先减去它上次的值
+- 类别 / 封面类型的取值事先不知道，遇到新值时沿该维扩容；每个维度最后一格为“缺失”
+- 可存盘（save / load，.npz）；cached_cube() 读取上次的立方体，数据只是在末尾追加了新行时
+  只累加新行，数据被改动时才整个重建
+- 用法：
+    cube = AggCube()
+    cube.update(df)        # df 需含 发布星期 / 发布小时 / 时长_秒 / 类别 / 封面类型 和各指标列
+    cube.pivot('播放量', '发布星期', '发布小时')
+    cube.table(['封面类型'], metrics=['播放量', '互动率'])
+    cube = cached_cube('feature_cache/x.cube.npz', identity, lambda: df)
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from tag_vocab import parse_tag_list
+
+METRICS = ('播放量', '点赞数', '互动率')
+
+# 时长档（与 data_visualization_2 饼图的分档相同）：≤60秒 / ≤300秒 / ≤600秒 / 更长
+DURATION_EDGES = [60, 300, 600]
+DURATION_LABELS = ['短视频(≤1分钟)', '中等视频(1-5分钟)', '较长视频(5-10分钟)', '长视频(>10分钟)']
+
+MISSING = '缺失'
+DIMS = ('发布星期', '发布小时', '时长档', '类别', '封面类型')
+SOURCE_COLUMNS = ('发布星期', '发布小时', '时长_秒', '类别', '封面类型')   # 各维度由这些列得到
+CUBE_VERSION = 1    # 改了分格 / 存盘格式就加1，旧文件自动重建
+
+
+def floats(values):
+    """任意列 -> float64 数组（可空整数的 <NA> / 无法解析的值为 NaN）"""
+    return pd.to_numeric(pd.Series(values), errors='coerce').astype('float64').to_numpy()
+
+
+def duration_bucket(seconds):
+    """时长（秒）-> 时长档编号 0-3，缺失为 -1"""
+    seconds = floats(seconds)
+    codes = np.searchsorted(DURATION_EDGES, seconds, side='left')
+    return np.where(np.isnan(seconds), -1, codes)
+
+
+def first_category(values):
+    """类别列（列表字符串）取第一个类别；立方体中每个视频只落在一个格子里（相同字符串只解析一次）"""
+    values = pd.Series(values, dtype=object)
+    codes, uniques = pd.factorize(values.map(lambda v: v if isinstance(v, str) else None))
+    firsts = np.array([next(iter(parse_tag_list(v)), None) for v in uniques] + [None], dtype=object)
+    result = firsts[codes].tolist()
+    # 非字符串（如 Parquet 里的列表）逐个解析
+    for i in np.flatnonzero(codes < 0):
+        result[i] = next(iter(parse_tag_list(values.iat[i])), None)
+    return result
+
+
+class AggCube:
+    def __init__(self, metrics=METRICS, key_col=None):
+        self.metrics = list(metrics)
+        self.key_col = key_col
+        self.levels = {
+            '发布星期': list(range(7)),
+            '发布小时': list(range(24)),
+            '时长档': list(DURATION_LABELS),
+            '类别': [],
+            '封面类型': [],
+        }
+        shape = self.shape
+        self.rows = np.zeros(shape, dtype=np.int64)          # 每格视频数
+        self.count = np.zeros(shape + (len(self.metrics),), dtype=np.int64)   # 每格各指标非空个数
+        self.sum = np.zeros_like(self.count, dtype=np.float64)
+        self.sumsq = np.zeros_like(self.count, dtype=np.float64)
+        self.row_of = {}               # 视频 -> (各维度编号, 指标值)，再次出现时用来撤销旧值（仅 key_col）
+        self.counters = {'updates': 0, 'rows': 0, 'replaced': 0}
+
+    @property
+    def shape(self):
+        return tuple(len(self.levels[d]) + 1 for d in DIMS)   # +1：缺失格
+
+    # ---------- 编码 ----------
+    def _grow(self, dim, values):
+        """把新的取值加入维度，并沿该维扩容数组（新格子插在缺失格前面）"""
+        new = [v for v in dict.fromkeys(values) if v is not None and v not in self.levels[dim]]
+        if not new:
+            return
+        axis = DIMS.index(dim)
+        missing = len(self.levels[dim])
+        self.levels[dim] += new
+
+        def widen(array):
+            pad_shape = list(array.shape)
+            pad_shape[axis] = len(new)
+            return np.concatenate([np.take(array, range(missing), axis=axis),
+                                   np.zeros(pad_shape, dtype=array.dtype),
+                                   np.take(array, [missing], axis=axis)], axis=axis)
+
+        self.rows, self.count, self.sum, self.sumsq = (
+            widen(a) for a in (self.rows, self.count, self.sum, self.sumsq))
+
+    def codes(self, df):
+        """每行在各维度上的编号（行 × 维度），缺失为 -1；遇到新的类别 / 封面类型先扩容"""
+        categories = first_category(df['类别'].tolist())
+        types = df['封面类型'].where(df['封面类型'].notna(), None).tolist()
+        self._grow('类别', categories)
+        self._grow('封面类型', types)
+        columns = []
+        for dim, limit in (('发布星期', 7), ('发布小时', 24)):
+            v = floats(df[dim])
+            columns.append(np.where((v >= 0) & (v < limit), np.nan_to_num(v), -1).astype(np.int64))
+        columns.append(duration_bucket(df['时长_秒']))
+        for dim, values in (('类别', categories), ('封面类型', types)):
+            lookup = {v: i for i, v in enumerate(self.levels[dim])}
+            columns.append(np.array([lookup.get(v, -1) for v in values], dtype=np.int64))
+        return np.column_stack(columns) if len(df) else np.empty((0, len(DIMS)), dtype=np.int64)
+
+    def _flat(self, codes):
+        """维度编号 -> 当前形状下的扁平格子编号（-1 映射到各维最后的缺失格）"""
+        shape = np.array(self.shape)
+        codes = np.where(codes < 0, shape - 1, codes)
+        return np.ravel_multi_index(tuple(codes.T), self.shape)
+
+    # ---------- 更新 ----------
+    def _add(self, codes, values, sign):
+        cells = self._flat(codes)
+        n_cells = int(np.prod(self.shape))
+        self.rows.reshape(n_cells)[:] += sign * np.bincount(cells, minlength=n_cells)
+        flat = [a.reshape(n_cells, len(self.metrics)) for a in (self.count, self.sum, self.sumsq)]
+        for j in range(len(self.metrics)):
+            v = values[:, j]
+            ok = ~np.isnan(v)
+            c, v = cells[ok], v[ok]
+            flat[0][:, j] += sign * np.bincount(c, minlength=n_cells)
+            flat[1][:, j] += sign * np.bincount(c, weights=v, minlength=n_cells)
+            flat[2][:, j] += sign * np.bincount(c, weights=v * v, minlength=n_cells)
+
+    def update(self, df):
+        """合并新数据；返回本次处理的行数"""
+        keyed = self.key_col is not None and self.key_col in df
+        if keyed:
+            df = df.drop_duplicates(self.key_col, keep='last')
+        values = np.column_stack([floats(df[m]) for m in self.metrics]) if len(df) else \
+            np.empty((0, len(self.metrics)))
+        codes = self.codes(df)
+
+        if keyed:
+            keys = df[self.key_col].astype(str).tolist()
+            old = [self.row_of[k] for k in keys if k in self.row_of]
+            if old:
+                self._add(np.vstack([c for c, _ in old]), np.vstack([v for _, v in old]), -1)
+                self.counters['replaced'] += len(old)
+            self.row_of.update(zip(keys, zip(codes, values)))
+        self._add(codes, values, 1)
+        self.counters['updates'] += 1
+        self.counters['rows'] += len(df)
+        return len(df)
+
+    # ---------- 查询 ----------
+    def _reduce(self, by, where):
+        """保留 by 中的维度，其余维度求和；where 为 {维度: 取值或取值列表} 先做筛选"""
+        count, total, sq = self.count, self.sum, self.sumsq
+        for dim, wanted in (where or {}).items():
+            axis = DIMS.index(dim)
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            positions = [self.levels[dim].index(v) for v in wanted if v in self.levels[dim]]
+            count, total, sq = (np.take(a, positions, axis=axis) for a in (count, total, sq))
+        axes = tuple(i for i, dim in enumerate(DIMS) if dim not in by)
+        count, total, sq = (a.sum(axis=axes) for a in (count, total, sq))
+        # 维度顺序按 by 给出的顺序
+        order = sorted(range(len(by)), key=lambda i: DIMS.index(by[i]))
+        perm = [order.index(i) for i in range(len(by))] + [len(by)]
+        return tuple(np.transpose(a, perm) for a in (count, total, sq))
+
+    def table(self, by, metrics=None, where=None, dropna=True):
+        """
+        按 by（维度列表）汇总：每个指标的 个数 / 平均值 / 标准差（样本），
+        列为 (指标, 统计量)；dropna=True 时去掉缺失格和没有数据的格子
+        """
+        by = list(by)
+        metrics = list(metrics or self.metrics)
+        count, total, sq = self._reduce(by, where)
+        index = pd.MultiIndex.from_product([self.levels[d] + [MISSING] for d in by], names=by)
+        columns = {}
+        j_of = {m: self.metrics.index(m) for m in metrics}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for m in metrics:
+                n = count[..., j_of[m]].astype(np.float64).ravel()
+                s = total[..., j_of[m]].ravel()
+                q = sq[..., j_of[m]].ravel()
+                mean = np.where(n > 0, s / n, np.nan)
+                var = np.where(n > 1, (q - s * s / np.where(n > 0, n, 1)) / (n - 1), np.nan)
+                columns[(m, '个数')] = n.astype(np.int64)
+                columns[(m, '平均值')] = mean
+                columns[(m, '标准差')] = np.sqrt(np.maximum(var, 0))
+        result = pd.DataFrame(columns, index=index)
+        if len(by) == 1:
+            result.index = result.index.get_level_values(0)
+        if dropna:
+            present = result[[(m, '个数') for m in metrics]].to_numpy().sum(axis=1) > 0
+            not_missing = np.ones(len(result), dtype=bool)
+            for level in range(len(by)):
+                not_missing &= np.asarray(index.get_level_values(level)) != MISSING
+            result = result[present & not_missing]
+        return result
+
+    def pivot(self, metric, index, columns, stat='平均值', where=None):
+        """两个维度交叉的透视表（没有数据的格子为 NaN）"""
+        table = self.table([index, columns], [metric], where, dropna=False)[(metric, stat)]
+        table = table.unstack(columns)
+        return table.drop(index=MISSING, columns=MISSING, errors='ignore')
+
+    def counts(self, dim, where=None):
+        """某一维度各取值的视频数（不含缺失格）"""
+        rows = self.rows[..., np.newaxis]
+        for wanted_dim, wanted in (where or {}).items():
+            axis = DIMS.index(wanted_dim)
+            wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            rows = np.take(rows, [self.levels[wanted_dim].index(v) for v in wanted
+                                  if v in self.levels[wanted_dim]], axis=axis)
+        axis = DIMS.index(dim)
+        totals = rows.sum(axis=tuple(i for i in range(len(DIMS)) if i != axis))[:, 0]
+        return pd.Series(totals[:-1], index=self.levels[dim], name='视频数')
+
+    # ---------- 存盘 ----------
+    def save(self, path, **meta):
+        """保存为 .npz（格子数组 + 各维取值 + meta 附加信息），先写临时文件再原子替换"""
+        state = {'version': CUBE_VERSION, 'metrics': self.metrics, 'key_col': self.key_col,
+                 'levels': self.levels, 'counters': self.counters, 'meta': meta}
+        arrays = {'rows': self.rows, 'count': self.count, 'sum': self.sum, 'sumsq': self.sumsq,
+                  'state': np.array(json.dumps(state, ensure_ascii=False))}
+        if self.row_of:
+            arrays['keys'] = np.array(list(self.row_of), dtype=str)
+            arrays['key_codes'] = np.vstack([c for c, _ in self.row_of.values()])
+            arrays['key_values'] = np.vstack([v for _, v in self.row_of.values()])
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """读取 save 保存的立方体，返回 (立方体, meta)；版本不符时抛出 ValueError"""
+        with np.load(path, allow_pickle=False) as data:
+            state = json.loads(str(data['state']))
+            if state['version'] != CUBE_VERSION:
+                raise ValueError(f"立方体版本 {state['version']} != {CUBE_VERSION}")
+            cube = cls(state['metrics'], state['key_col'])
+            cube.levels = state['levels']
+            cube.counters = state['counters']
+            cube.rows, cube.count, cube.sum, cube.sumsq = (
+                data[name] for name in ('rows', 'count', 'sum', 'sumsq'))
+            if 'keys' in data:
+                cube.row_of = dict(zip(data['keys'].tolist(), zip(data['key_codes'], data['key_values'])))
+        return cube, state['meta']
+
+    def report(self):
+        c = self.counters
+        print(f"聚合立方体: 形状 {self.shape}, {int(self.rows.sum())} 行, {c['updates']} 次更新"
+              + (f"（按 {self.key_col} 去重，替换旧值 {c['replaced']} 行）" if self.key_col else ""))
+
+
+def frame_digest(df, metrics=METRICS):
+    """立方体用到的列的内容哈希（判断缓存的立方体是否对应当前数据的前若干行）"""
+    columns = [c for c in SOURCE_COLUMNS + tuple(metrics) if c in df]
+    hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+
+def cached_cube(path, identity, load_frame, metrics=METRICS):
+    """
+    增量维护存盘的立方体：
+    - 上次保存时的数据标识（identity，如源文件 + 特征缓存键）与现在相同：直接读取，不需要数据
+    - 否则调用 load_frame() 取数据；上次处理过的 n 行与现在前 n 行相同（只在末尾追加了新行）时
+      只累加新增的行，不然整个重建；结果写回 path
+    """
+    cube, meta = None, {}
+    if os.path.exists(path):
+        try:
+            cube, meta = AggCube.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"立方体缓存读取失败，重新建立: {path} {e}")
+            cube = None
+    if cube is not None and list(cube.metrics) == list(metrics) and meta.get('identity') == identity:
+        return cube
+
+    df = load_frame()
+    seen = meta.get('rows', 0) if cube is not None and list(cube.metrics) == list(metrics) else 0
+    if not (0 < seen <= len(df) and frame_digest(df.iloc[:seen], metrics) == meta.get('digest')):
+        cube, seen = AggCube(metrics), 0
+    cube.update(df.iloc[seen:])
+    print(f"聚合立方体: 累加 {len(df) - seen} 行（复用已有 {seen} 行）")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    cube.save(path, identity=identity, rows=len(df), digest=frame_digest(df, metrics))
+    return cube
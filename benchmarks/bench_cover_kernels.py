@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：封面特征各个算子（cover_features.py）vs 原 notebook 中的实现
+用法：
+    python benchmarks/bench_cover_kernels.py [图片数] [宽] [高]
+默认 20 张 1146×717（B站封面常见尺寸）的合成图片。
+逐个算子计时，并报告新旧结果的偏差，容差见 TOLERANCE。
+主色是 k-means 的结果：原实现不固定随机种子，两个颜色占比接近时，每次运行选出的
+“第一主色”都可能不同。因此主色对比的是抽样版与相同种子的全分辨率版，
+并统计“第一主色换了一个簇”的图片比例（同时给出原实现自身两次运行的该比例作参考）。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cv2
+import numpy as np
+from skimage.feature import local_binary_pattern
+
+import cover_features as cf
+
+# 新旧结果的容差（主色 RGB 以 0-255 计，占比以 0-1 计）
+# 颜色矩：原实现在 float32 上累加，1146×717 的图偏度/峰度误差可达 ~5e-2（均值/标准差 ~1e-3）；
+# 新实现由直方图按 float64 计算，与 float64 参考值的偏差 < 1e-5
+# 主色：同一个簇时 RGB 偏差 ≤ 2、占比偏差 ≤ 0.01；换簇的图片不超过 10%
+TOLERANCE = {'color_moment': 1e-1, 'color_moment_ref': 1e-5,
+             'dom_rgb': 2.0, 'dom_ratio': 0.01, 'dom_flipped': 0.1,
+             'lbp_contrast': 1e-9, 'thirds_score': 1e-9}
+
+
+# ---------- 原 data_visualization_3_covers.ipynb 中的实现 ----------
+def legacy_color_moment(im):
+    arr = np.asarray(im, dtype=np.float32) / 255.0
+    mean = arr.mean(axis=(0, 1))
+    std  = arr.std(axis=(0, 1))
+    skew = ((arr - mean) ** 3).mean(axis=(0, 1)) / (std ** 3 + 1e-8)
+    kurt = ((arr - mean) ** 4).mean(axis=(0, 1)) / (std ** 4 + 1e-8) - 3
+    return np.hstack([mean, std, skew, kurt])
+
+
+def legacy_dom_color(im, k=3):
+    data = im.reshape(-1, 3).astype(np.float32)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    _, labels, centers = cv2.kmeans(data, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    counts = np.bincount(labels.flatten())
+    ratio  = counts / counts.sum()
+    order  = np.argsort(ratio)[::-1]
+    return centers[order], ratio[order]
+
+
+def legacy_lbp_contrast(im):
+    gray = cv2.cvtColor(im, cv2.COLOR_RGB2GRAY)
+    lbp = local_binary_pattern(gray, 8, 1, method='uniform')
+    return np.std(lbp)
+
+
+def legacy_thirds_score(im):
+    h, w = im.shape[:2]
+    gray = cv2.cvtColor(im, cv2.COLOR_RGB2GRAY)
+    M = cv2.moments(gray)
+    if M["m00"] == 0:
+        return 0.
+    cx = int(M["m10"] / M["m00"])
+    cy = int(M["m01"] / M["m00"])
+    pts = [(w//3, h//3), (w//3, 2*h//3), (2*w//3, h//3), (2*w//3, 2*h//3)]
+    dist = min(np.hypot(cx-x, cy-y) for x, y in pts)
+    return max(0., 1 - dist / np.hypot(w, h))
+
+
+def reference_color_moment(im):
+    """float64 参考值"""
+    arr = im.astype(np.float64) / 255.0
+    mean = arr.mean(axis=(0, 1))
+    std = arr.std(axis=(0, 1))
+    d = arr - mean
+    skew = (d ** 3).mean(axis=(0, 1)) / (std ** 3 + 1e-8)
+    kurt = (d ** 4).mean(axis=(0, 1)) / (std ** 4 + 1e-8) - 3
+    return np.hstack([mean, std, skew, kurt])
+
+
+def dom_color_deviation(results_a, results_b, rgb_limit=TOLERANCE['dom_rgb'] * 10):
+    """
+    第一主色的偏差：返回 ([(RGB偏差, 占比偏差), ...] 仅同一个簇的图片, 换簇的图片比例)
+    RGB 相差超过 rgb_limit 视为选中了另一个簇
+    """
+    same, flipped = [], 0
+    for (ca, ra), (cb, rb) in zip(results_a, results_b):
+        d = float(np.abs(ca[0] - cb[0]).max())
+        if d > rgb_limit:
+            flipped += 1
+        else:
+            same.append((d, abs(ra[0] - rb[0])))
+    return same, flipped / len(results_a)
+
+
+def synthetic(n, w, h, seed=0):
+    """几块大色块 + 渐变 + 噪声，近似封面的颜色分布（主色明显）"""
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(n):
+        palette = rng.integers(0, 256, (3, 3))
+        im = np.empty((h, w, 3), np.uint8)
+        cuts = np.sort(rng.integers(w // 5, w, 2))
+        im[:, :cuts[0]] = palette[0]
+        im[:, cuts[0]:cuts[1]] = palette[1]
+        im[:, cuts[1]:] = palette[2]
+        ramp = np.linspace(-20, 20, h)[:, None, None]
+        noise = rng.normal(0, 8, (h, w, 1))
+        images.append(np.clip(im + ramp + noise, 0, 255).astype(np.uint8))
+    return images
+
+
+def timed(func, images):
+    started = time.perf_counter()
+    results = [func(im) for im in images]
+    return (time.perf_counter() - started) / len(images) * 1000, results
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    w = int(sys.argv[2]) if len(sys.argv) > 2 else 1146
+    h = int(sys.argv[3]) if len(sys.argv) > 3 else 717
+    images = synthetic(n, w, h)
+    cv2.setNumThreads(1)
+
+    print(f"{n} 张 {w}×{h} 合成图片，单线程，每张平均耗时（毫秒）")
+    print(f"{'算子':<14}{'原实现':>10}{'新实现':>10}{'加速':>8}   最大偏差")
+
+    def row(name, old_ms, new_ms, dev):
+        print(f"{name:<14}{old_ms:>10.2f}{new_ms:>10.2f}{old_ms / new_ms:>7.1f}x   {dev}")
+
+    t_old, old = timed(legacy_color_moment, images)
+    t_new, new = timed(cf.color_moment, images)
+    dev = max(np.abs(a - b).max() for a, b in zip(old, new))
+    dev_ref = max(np.abs(reference_color_moment(im) - b).max() for im, b in zip(images, new))
+    assert dev <= TOLERANCE['color_moment'] and dev_ref <= TOLERANCE['color_moment_ref'], (dev, dev_ref)
+    row('color_moment', t_old, t_new, f'{dev:.2e}（与float64参考值 {dev_ref:.2e}）')
+
+    t_old, old = timed(legacy_dom_color, images)
+    t_new, new = timed(cf.dom_color, images)
+    full = [cf.dom_color(im, sample=im.shape[0] * im.shape[1]) for im in images]
+    same, flipped = dom_color_deviation(full, new)
+    _, legacy_flipped = dom_color_deviation(old, [legacy_dom_color(im) for im in images])
+    assert flipped <= TOLERANCE['dom_flipped'], flipped
+    assert not same or (max(d for d, _ in same) <= TOLERANCE['dom_rgb']
+                        and max(r for _, r in same) <= TOLERANCE['dom_ratio']), same
+    row('dom_color', t_old, t_new,
+        f"RGB {max((d for d, _ in same), default=0):.2f} / 占比 {max((r for _, r in same), default=0):.4f}，"
+        f"换簇 {flipped:.0%}（原实现两次运行之间换簇 {legacy_flipped:.0%}）")
+
+    # 新实现中灰度图只转换一次，由两个算子共用：把转换计入新实现的耗时
+    t_old_lbp, old_lbp = timed(legacy_lbp_contrast, images)
+    t_old_thirds, old_thirds = timed(legacy_thirds_score, images)
+    t_gray, grays = timed(cf.to_gray, images)
+    t_new_lbp, new_lbp = timed(cf.lbp_contrast, grays)
+    t_new_thirds, new_thirds = timed(cf.thirds_score, grays)
+    dev = max(abs(a - b) for a, b in zip(old_lbp + old_thirds, new_lbp + new_thirds))
+    assert dev <= TOLERANCE['lbp_contrast'], dev
+    row('gray+lbp+三分', t_old_lbp + t_old_thirds, t_gray + t_new_lbp + t_new_thirds, f'{dev:.2e}')
+
+    t_old_all = sum(timed(f, images)[0] for f in
+                    (legacy_color_moment, legacy_dom_color, legacy_lbp_contrast, legacy_thirds_score))
+    t_new_all, _ = timed(cf.image_features, images)
+    row('image_features', t_old_all, t_new_all, '-')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：__INITIAL_STATE__ 快速提取 vs 原始 BeautifulSoup 解析
+用法：
+    python benchmarks/bench_extract.py [页面目录] [重复次数]
+页面目录默认为 fixtures/pages（录制的视频页面 *.html）；
+目录不存在或为空时，自动生成一个约300KB的模拟页面。
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup
+from scraping_parse import extract_video_data, extract_video_data_from_soup
+
+
+def synthetic_page(n_related=40, n_divs=3000):
+    """生成结构与B站视频页相近的模拟页面"""
+    video_data = {
+        'bvid': 'BV1fc2eBkEMS', 'aid': 115661086918919, 'title': '特厨探店|齐齐哈尔神店',
+        'pic': 'http://i0.hdslb.com/bfs/archive/demo.jpg', 'tname': '美食侦探',
+        'pubdate': 1733369400, 'desc': '凌晨一点起来买菜' * 20, 'duration': 284,
+        'owner': {'mid': 2706864, 'name': '特厨隋坡'},
+        'stat': {'view': 1122323, 'like': 95187, 'coin': 6259, 'favorite': 11412,
+                 'share': 5142, 'reply': 3170, 'danmaku': 1862},
+        'pages': [{'cid': i, 'part': f'P{i}', 'duration': 284} for i in range(5)],
+    }
+    related = [dict(video_data, aid=i, title=f'相关视频{i}', desc='简介' * 200) for i in range(n_related)]
+    state = {'aid': video_data['aid'], 'bvid': video_data['bvid'], 'videoData': video_data,
+             'related': related, 'upData': {'mid': 2706864, 'fans': 2706864}}
+    body = ''.join(f'<div class="item-{i}"><span>美食{i}</span><a href="/v/{i}">链接</a></div>'
+                   for i in range(n_divs))
+    return ('<!DOCTYPE html><html><head><meta property="og:image" content="x.jpg">'
+            '<script>window.__pinia={};</script></head><body>' + body +
+            f'<script>window.__INITIAL_STATE__={json.dumps(state, ensure_ascii=False)};'
+            '(function(){var s;(s=document.currentScript||document.scripts[document.scripts.length-1]).parentNode.removeChild(s);}());'
+            '</script></body></html>')
+
+
+def load_pages(page_dir):
+    if os.path.isdir(page_dir):
+        pages = [p.read_text(encoding='utf-8') for p in sorted(Path(page_dir).glob('*.html'))]
+        if pages:
+            return pages
+    print(f"未找到录制页面（{page_dir}），使用模拟页面")
+    return [synthetic_page()]
+
+
+def soup_path(html):
+    return extract_video_data_from_soup(BeautifulSoup(html, 'html.parser'))
+
+
+def bench(func, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            func(html)
+    return (time.perf_counter() - started) / (repeat * len(pages))
+
+
+def main():
+    page_dir = sys.argv[1] if len(sys.argv) > 1 else 'fixtures/pages'
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    pages = load_pages(page_dir)
+
+    # 两种方法结果必须一致
+    for html in pages:
+        assert extract_video_data(html) == soup_path(html), "快速提取结果与原始方法不一致"
+
+    size_kb = sum(len(p.encode('utf-8')) for p in pages) / len(pages) / 1024
+    t_soup = bench(soup_path, pages, repeat)
+    t_fast = bench(extract_video_data, pages, repeat)
+    print(f"页面数: {len(pages)}，平均大小: {size_kb:.0f} KB")
+    print(f"BeautifulSoup 解析: {t_soup * 1000:8.2f} ms/页")
+    print(f"快速提取:          {t_fast * 1000:8.2f} ms/页")
+    print(f"加速比: {t_soup / t_fast:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
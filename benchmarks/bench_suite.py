@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试套件：清洗 / 派生特征 / 图表聚合 / 页面解析，在合成数据上按数据量计时（完全离线）
+用法：
+    python benchmarks/bench_suite.py [--sizes 10k,100k,1M] [--stages clean,features,charts,parse]
+                                     [--compare bench_results/旧结果.json] [--render]
+- 合成数据见 synthetic_data.py（固定种子），按 (行数, 种子) 缓存在 bench_data/，再次运行直接复用
+- 每个阶段在单独的进程里运行，记录耗时和该阶段的内存峰值（RSS；Windows 上为 Python 分配峰值）
+- 结果写入 bench_results/bench-<时间>-<提交>.json；--compare 与之前的结果逐项对比，
+  变慢超过 REGRESSION 的标出来
+- 10M 行约 4GB CSV；features / charts 阶段会把整个文件读进内存（与 data_visualization_2 相同），
+  clean 阶段按块处理（默认 100 万行以上 chunksize=200000）
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+import pandas as pd
+
+import synthetic_data
+
+DATA_DIR = "bench_data"
+RESULTS_DIR = "bench_results"
+DEFAULT_SIZES = "10k,100k"
+DEFAULT_STAGES = "clean,features,charts,parse"
+DEFAULT_PAGES = 300
+REGRESSION = 1.2        # 比旧结果慢 20% 以上视为退化
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def size_label(rows):
+    for unit, scale in (('M', 1_000_000), ('k', 1_000)):
+        if rows >= scale and rows % scale == 0:
+            return f"{rows // scale}{unit}"
+    return str(rows)
+
+
+# ================== 各阶段（在子进程中运行） ==================
+def quiet():
+    """被测代码的进度输出不打印出来"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def stage_clean(ctx):
+    from data_cleaning_bilibili import clean_file
+    output = os.path.join(ctx['work'], 'cleaned.csv')
+    with quiet():
+        state = clean_file(ctx['csv'], output, chunksize=ctx['chunksize'])
+    return {'rows_out': state['rows'], 'output_mb': round(os.path.getsize(output) / 1e6, 1)}
+
+
+def stage_features(ctx):
+    """冷启动：读CSV + 计算全部特征组并写缓存；之后再测一次读缓存"""
+    from feature_store import FeatureStore
+    cache_dir = os.path.join(ctx['work'], 'feature_cache')
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    timings = {}
+    store = FeatureStore(ctx['csv'], cache_dir=cache_dir)
+    started = time.perf_counter()
+    store.raw
+    timings['read_csv'] = time.perf_counter() - started
+    for name in store.features:
+        started = time.perf_counter()
+        store.group(name)
+        timings[name] = time.perf_counter() - started
+    warm = FeatureStore(ctx['csv'], cache_dir=cache_dir)
+    warm.raw
+    started = time.perf_counter()
+    for name in warm.features:
+        warm.group(name)
+    timings['warm_cache'] = time.perf_counter() - started
+    return {k: round(v, 4) for k, v in timings.items()}
+
+
+def stage_charts(ctx):
+    """data_visualization_2 各图的聚合部分（不含绘图）；特征取自 features 阶段的缓存"""
+    from agg_cube import AggCube
+    from feature_store import FeatureStore
+    from keyword_tagger import LabelMatrix
+    store = FeatureStore(ctx['csv'], cache_dir=os.path.join(ctx['work'], 'feature_cache'))
+    df = store.frame('发布小时', '发布星期', '时长_秒', '总互动', '互动率', '文化输出', '封面类型')
+    labels = LabelMatrix.from_frame(store.group('labels'))
+
+    timings = {}
+
+    def timed(name, func):
+        started = time.perf_counter()
+        result = func()
+        timings[name] = time.perf_counter() - started
+        return result
+
+    cube = AggCube()
+    timed('cube_build', lambda: cube.update(df))
+    timed('heatmap', lambda: cube.pivot('播放量', '发布星期', '发布小时'))
+    timed('duration_pie', lambda: cube.counts('时长档'))
+    timed('cover_bar', lambda: cube.table(['封面类型'], ['播放量', '互动率', '点赞数']))
+
+    def region():
+        stats = {}
+        for name in labels.group_labels('region'):
+            mask = labels.mask('region', name)
+            if mask.sum():
+                stats[name] = (int(mask.sum()), df.loc[mask, '播放量'].mean())
+        return stats
+    timed('region_bar', region)
+    timed('culture_bubble', lambda: df.groupby('文化输出')['播放量'].mean())
+    # 对照：不用立方体，直接 pivot_table（原 plot_time_heatmap 的做法）
+    timed('heatmap_pivot_table', lambda: df.pivot_table(values='播放量', index='发布星期',
+                                                        columns='发布小时', aggfunc='mean'))
+    return {k: round(v, 4) for k, v in timings.items()}
+
+
+def stage_render(ctx):
+    """完整渲染 data_visualization_2 的全部图表（Agg 后端，输出到临时目录）"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from feature_store import FeatureStore
+    import data_visualization_2 as viz
+    viz.store = FeatureStore(ctx['csv'], cache_dir=os.path.join(ctx['work'], 'feature_cache'))
+    viz._cube = None
+    for name in viz.store.features:     # 先取好特征组：绘图时工作目录在输出目录下
+        viz.store.group(name)
+    out = os.path.join(ctx['work'], 'charts')
+    os.makedirs(out, exist_ok=True)
+    timings = {}
+    cwd = os.getcwd()
+    os.chdir(out)
+    try:
+        for chart in viz.CHARTS:
+            started = time.perf_counter()
+            with quiet():
+                chart.func()
+            timings[chart.name] = round(time.perf_counter() - started, 4)
+    finally:
+        os.chdir(cwd)
+    return timings
+
+
+def stage_parse(ctx):
+    """视频页面解析（parse_video_html）；页面数固定，与数据量无关"""
+    from scraping_parse import parse_video_html
+    pages = synthetic_data.video_pages(ctx['pages'])
+    size_kb = sum(len(p.encode('utf-8')) for p in pages) / len(pages) / 1024
+    started = time.perf_counter()
+    with quiet():
+        records = [parse_video_html(html, f'https://www.bilibili.com/video/{i}') for i, html in enumerate(pages)]
+    seconds = time.perf_counter() - started
+    html_only = sum(1 for r in records if r['play_count'] == 'N/A')
+    return {'pages': len(pages), 'page_kb': round(size_kb, 1), 'html_fallback': html_only,
+            'ms_per_page': round(seconds / len(pages) * 1000, 3)}
+
+
+STAGES = {
+    'clean': stage_clean,
+    'features': stage_features,
+    'charts': stage_charts,
+    'render': stage_render,
+    'parse': stage_parse,
+}
+ROW_INDEPENDENT = {'parse'}
+
+
+# ================== 计时与内存 ==================
+def peak_memory_mb():
+    """
+    当前进程的内存峰值（MB）：Linux 读 /proc/self/status 的 VmHWM（ru_maxrss 会继承父进程的峰值）；
+    macOS 用 ru_maxrss；都没有（Windows）时返回 None
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 ** 2
+
+
+def reset_peak_memory():
+    """Linux 下把 VmHWM 重置为当前 RSS，峰值只反映被测阶段（失败时忽略）"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def run_in_child(stage, ctx):
+    import tracemalloc
+    os.chdir(ROOT)        # keyword_config.json 等按仓库根目录的相对路径读取
+    reset_peak_memory()
+    baseline = peak_memory_mb()
+    use_tracemalloc = baseline is None
+    if use_tracemalloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    extra = STAGES[stage](ctx)
+    seconds = time.perf_counter() - started
+    if use_tracemalloc:
+        peak, kind = tracemalloc.get_traced_memory()[1] / 1024 ** 2, 'python_alloc'
+        tracemalloc.stop()
+    else:
+        peak, kind = peak_memory_mb(), 'rss'
+    return {'seconds': round(seconds, 4), 'peak_mb': round(peak, 1),
+            'baseline_mb': None if baseline is None else round(baseline, 1),
+            'memory_kind': kind, 'extra': extra}
+
+
+def run_stage(stage, ctx):
+    """每个阶段一个新进程（spawn），内存峰值互不影响"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(run_in_child, stage, ctx).result()
+
+
+# ================== 数据 / 结果文件 ==================
+def ensure_data(rows, seed, data_dir):
+    """合成CSV（已存在则复用），返回 (路径, 生成耗时 或 None)"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic-{size_label(rows)}-seed{seed}.csv")
+    if os.path.exists(path):
+        return path, None
+    started = time.perf_counter()
+    synthetic_data.write_csv(path, rows, seed)
+    return path, time.perf_counter() - started
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def save_results(results, meta, results_dir):
+    os.makedirs(results_dir, exist_ok=True)
+    name = f"bench-{time.strftime('%Y%m%dT%H%M%S')}-{meta.get('commit') or 'nogit'}.json"
+    path = os.path.join(results_dir, name)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    old = {(r['stage'], r['rows']): r for r in baseline['results']}
+    print(f"\n=== 与 {baseline_path}（提交 {baseline['meta'].get('commit')}）对比 ===")
+    regressions = 0
+    for r in results:
+        before = old.get((r['stage'], r['rows']))
+        if before is None or not before['seconds']:
+            continue
+        ratio = r['seconds'] / before['seconds']
+        flag = '  ← 变慢' if ratio >= REGRESSION else ''
+        regressions += bool(flag)
+        print(f"{r['stage']:<10} {size_label(r['rows']) if r['rows'] else '-':>6}  "
+              f"{before['seconds']:9.3f}s -> {r['seconds']:9.3f}s  ×{ratio:5.2f}{flag}")
+    print(f"变慢超过 {REGRESSION - 1:.0%} 的阶段: {regressions} 个")
+    return regressions
+
+
+# ================== 入口 ==================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="合成数据基准测试套件")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="行数，逗号分隔，如 10k,100k,1M,10M")
+    parser.add_argument('--stages', default=DEFAULT_STAGES, help=f"阶段，可选 {','.join(STAGES)}")
+    parser.add_argument('--render', action='store_true', help="同时完整渲染图表（较慢）")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pages', type=int, default=DEFAULT_PAGES, help="parse 阶段的页面数")
+    parser.add_argument('--chunksize', type=int, default=None, help="clean 阶段的分块行数")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', default=None, help="与之前的结果文件对比")
+    args = parser.parse_args(argv)
+    args.data_dir, args.results_dir = os.path.abspath(args.data_dir), os.path.abspath(args.results_dir)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    if args.render and 'render' not in stages:
+        stages.append('render')
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"未知阶段: {unknown}")
+
+    meta = environment()
+    meta.update(seed=args.seed, sizes=sizes, stages=stages)
+    results = []
+
+    def record(stage, rows, outcome):
+        results.append(dict(stage=stage, rows=rows, **outcome))
+        peak = outcome.get('peak_mb')
+        rate = f", {rows / outcome['seconds']:,.0f} 行/秒" if rows and outcome['seconds'] else ''
+        print(f"{stage:<10} {size_label(rows) if rows else '-':>6}  {outcome['seconds']:9.3f}s"
+              f"{rate}{f', 峰值 {peak:,.0f} MB' if peak else ''}  {outcome.get('extra', '')}")
+
+    for stage in [s for s in stages if s in ROW_INDEPENDENT]:
+        record(stage, None, run_stage(stage, {'pages': args.pages, 'work': args.data_dir}))
+
+    for rows in sizes:
+        csv_path, generated = ensure_data(rows, args.seed, args.data_dir)
+        if generated is not None:
+            record('generate', rows, {'seconds': round(generated, 4),
+                                      'extra': {'csv_mb': round(os.path.getsize(csv_path) / 1e6, 1)}})
+        work = os.path.join(args.data_dir, f"work-{size_label(rows)}")
+        os.makedirs(work, exist_ok=True)
+        chunksize = args.chunksize or (200_000 if rows >= 1_000_000 else None)
+        ctx = {'rows': rows, 'csv': csv_path, 'work': work, 'chunksize': chunksize}
+        for stage in [s for s in stages if s not in ROW_INDEPENDENT]:
+            record(stage, rows, run_stage(stage, ctx))
+
+    path = save_results(results, meta, args.results_dir)
+    print(f"\n结果已保存: {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：向量化时间/时长解析（time_parsing.py）vs 原来逐行 .apply 的函数
+用法：
+    python benchmarks/bench_time_parsing.py [行数] [原方法抽样行数]
+默认 1,000,000 行。原方法逐行调用 pd.to_datetime，百万行需要数分钟，
+因此默认只在前 100,000 行上计时，再按行数线性换算（传入与行数相同的值可完整计时）。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from time_parsing import parse_duration_seconds, time_parts
+
+
+# ---------- 原 data_visualization_2.py / data_cleaning_bilibili.py 中的实现 ----------
+def parse_duration(duration_str):
+    """解析视频时长，返回秒数"""
+    if pd.isna(duration_str) or duration_str == '-':
+        return None
+    try:
+        parts = str(duration_str).split(':')
+        if len(parts) == 3:
+            return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+        elif len(parts) == 2:
+            return int(parts[0]) * 60 + int(parts[1])
+        else:
+            return int(parts[0])
+    except:
+        return None
+
+
+def parse_datetime(dt_str):
+    """解析发布时间"""
+    try:
+        return pd.to_datetime(dt_str)
+    except:
+        return None
+
+
+def legacy_time_columns(df):
+    dt = df['发布时间'].apply(parse_datetime)
+    dt = pd.to_datetime(dt)
+    out = pd.DataFrame({'发布小时': dt.dt.hour, '发布星期': dt.dt.dayofweek})
+    weekday_map = {'Monday': '星期一', 'Tuesday': '星期二', 'Wednesday': '星期三', 'Thursday': '星期四',
+                   'Friday': '星期五', 'Saturday': '星期六', 'Sunday': '星期日'}
+    out['发布日期'] = dt.dt.date
+    out['星期几'] = pd.to_datetime(out['发布日期']).dt.day_name().map(weekday_map)
+    return out
+
+
+def synthetic(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    seconds = rng.lognormal(5.5, 1.0, rows).astype(int)
+    durations = np.where(seconds >= 3600,
+                         [f"{s // 3600}:{s % 3600 // 60:02d}:{s % 60:02d}" for s in seconds],
+                         [f"{s // 60}:{s % 60:02d}" for s in seconds]).astype(object)
+    durations[rng.random(rows) < 0.01] = '-'
+    start = pd.Timestamp('2025-01-01').value // 10**9
+    stamps = pd.to_datetime(rng.integers(start, start + 365 * 86400, rows), unit='s')
+    times = np.where(rng.random(rows) < 0.5, stamps.strftime('%Y-%m-%d %H:%M:%S'),
+                     stamps.strftime('%Y/%m/%d %H:%M')).astype(object)
+    return pd.DataFrame({'视频时长': durations, '发布时间': times})
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    legacy_rows = min(rows, int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    df = synthetic(rows)
+    sample = df.head(legacy_rows)
+    scale = rows / legacy_rows
+
+    t_new_dur, new_dur = timed(lambda: parse_duration_seconds(df['视频时长']))
+    t_old_dur, old_dur = timed(lambda: sample['视频时长'].apply(parse_duration))
+    t_new_time, new_time = timed(lambda: time_parts(df['发布时间']))
+    t_old_time, old_time = timed(lambda: legacy_time_columns(sample))
+
+    # 结果一致性检查
+    assert (new_dur.head(legacy_rows).astype('float64').fillna(-1).to_numpy()
+            == pd.to_numeric(old_dur).fillna(-1).to_numpy()).all()
+    assert (new_time['发布小时'].head(legacy_rows).to_numpy() == old_time['发布小时'].to_numpy()).all()
+    assert (new_time['星期几'].head(legacy_rows).to_numpy() == old_time['星期几'].to_numpy()).all()
+
+    note = '' if legacy_rows == rows else f'（按 {legacy_rows:,} 行换算）'
+    print(f"行数: {rows:,}")
+    print(f"视频时长  原方法: {t_old_dur * scale:8.2f} s{note}  向量化: {t_new_dur:6.2f} s  "
+          f"加速 {t_old_dur * scale / t_new_dur:.0f}x")
+    print(f"发布时间  原方法: {t_old_time * scale:8.2f} s{note}  向量化: {t_new_time:6.2f} s  "
+          f"加速 {t_old_time * scale / t_new_time:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
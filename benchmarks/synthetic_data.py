@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试用的合成数据（固定随机种子，完全离线）
+- generate_chunk / write_csv：与爬虫输出相同列（scraping_parse.CSV_HEADER）的原始CSV，
+  字段格式与 video_info_complete.csv 一致：
+    标题 / 标签 由中文词库组合（地区、菜名、关键词覆盖 keyword_config.json，打标有命中）
+    播放量 重尾分布（对数正态 + 帕累托尾部），点赞 / 投币 / 收藏 / 分享 按比例派生
+    视频时长 "M:SS"，超过1小时为 "H:MM:SS"；发布时间 两种格式混合
+    少量 'N/A'（数值列）/ '-'（时长）缺失、空简介、重复行
+- synthetic_video_page：结构与B站视频页相近的HTML（多数带 __INITIAL_STATE__，
+  一部分只有HTML元素，走 BeautifulSoup 兜底路径）
+同一 (行数, 种子, 分块行数) 生成的文件逐字节相同。
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from scraping_parse import CSV_HEADER
+
+REGIONS = ['东北', '哈尔滨', '齐齐哈尔', '四川', '成都', '重庆', '广东', '广州', '潮汕', '顺德', '上海',
+           '北京', '云南', '新疆', '西安', '日本', '大阪', '芬兰', '泰国', '广西', '柳州', '河南', '洛阳',
+           '宁夏', '杭州', '长沙', '武汉', '贵州', '福建', '青岛']
+DISHES = ['火锅', '螺蛳粉', '烤鸭', '小龙虾', '煎饼果子', '肉夹馍', '凉皮', '麻辣烫', '烧烤', '米线',
+          '饺子', '拉面', '糖葫芦', '鸡蛋灌饼', '辣糊糊', '羊肉串', '红烧肉', '酸菜鱼', '烤冷面', '肠粉',
+          '生煎', '卤肉饭', '寿司', '冬阴功', '鲍鱼', '龙虾', '流水席', '早茶', '臭豆腐', '热干面']
+PREFIXES = ['探店', '挑战', '实测', '试吃', '教程', '日常vlog', '老外吃中餐', '开车一小时', '凌晨四点',
+            '人均50', '第一次吃', '隐藏菜单', '路边摊', '夜市', '米其林', '在家做', '老板娘推荐']
+SUFFIXES = ['太香了！', '值不值？', '排队两小时', '吃哭了', '好吃到跺脚', '老外瞳孔地震', '一口入魂',
+            '这家店绝了', '全网最全做法', '翻车了', '比饭店还好吃', '真的离谱', '本地人才知道']
+TAGS = ['美食', '探店', '美食探店', 'Vlog', '美食制作', '家常菜', '教程', '吃播', '文化输出', '外国人吃中国美食',
+        '夜市', '路边摊', '早餐', '宵夜', '挑战', '测评', '干饭', '吃货', '生活记录', '日常', '摆摊创业',
+        '中国美食', 'bilibili食界杯', '美食侦探', '好吃', '厨艺', '烹饪', '美食记录', '下饭', '家乡味道']
+CATEGORIES = ['美食侦探', '美食记录', '美食制作', '美食测评', '田园美食', '三农', '日常', '出行', '搞笑']
+CATEGORY_WEIGHTS = [0.25, 0.25, 0.2, 0.1, 0.06, 0.05, 0.04, 0.03, 0.02]
+NAME_PARTS = ['特厨', '周', '日食', '雨琪', '小', '阿', '大胃', '老', '吃货', '胖', '美食', '川味', '东北',
+              '在芬兰', '隋坡', '大签', '记', '王', '子', '哥', '姐', '酱', '君', '村长', '厨房']
+DESCRIPTIONS = ['凌晨一点起来买菜，帮我看看值吗？', '今天带大家去吃一家本地人才知道的小店',
+                '做法很简单，跟着视频一步一步来', '喜欢的话记得一键三连', '这期视频拍了整整三天']
+BV_ALPHABET = 'fZodR9XQDSUm21yCkr6zBqiveYah8bt4xsWpHnJE7jL5VG3guMTKNPAwcF'   # 58个字符
+
+# 缺失 / 重复比例
+NA_RATE = 0.01
+DASH_DURATION_RATE = 0.01
+EMPTY_DESC_RATE = 0.3
+DUPLICATE_RATE = 0.005
+
+
+def bvid(n):
+    """行号 -> 唯一的 BV号（BV1 + 9位）；乘一个与58互素的数打散，看起来不连续"""
+    n = ((n + 1) * 0x5DEECE66D) % 58 ** 9
+    chars = []
+    for _ in range(9):
+        n, r = divmod(n, 58)
+        chars.append(BV_ALPHABET[r])
+    return 'BV1' + ''.join(chars)
+
+
+def format_duration(seconds):
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def blogger_pool(rng, n):
+    names = [''.join(rng.choice(NAME_PARTS, size=rng.integers(2, 4))) + str(i) for i in range(n)]
+    mids = rng.integers(10_000, 3_000_000_000, size=n)
+    fans = np.minimum((rng.pareto(1.1, size=n) + 0.05) * 20_000, 5e7).astype(np.int64)
+    return names, mids, fans
+
+
+def heavy_tail_plays(rng, n):
+    """播放量：对数正态主体 + 帕累托尾部（极少数视频上千万）"""
+    plays = rng.lognormal(mean=12.5, sigma=1.2, size=n)
+    tail = rng.random(n) < 0.02
+    plays[tail] *= 1 + rng.pareto(1.5, size=tail.sum()) * 5
+    return np.clip(plays, 200, 3e8).astype(np.int64)
+
+
+def generate_chunk(start, n, seed=0, n_bloggers=None):
+    """生成第 start 行起的 n 行（原始CSV格式，全部为字符串）"""
+    rng = np.random.default_rng([seed, start])
+    pool_rng = np.random.default_rng([seed, 0xB10])        # 博主池与分块无关
+    names, mids, fans = blogger_pool(pool_rng, n_bloggers or 5000)
+    blogger = np.minimum(rng.zipf(1.3, size=n) - 1, len(names) - 1)
+
+    plays = heavy_tail_plays(rng, n)
+    ratio = lambda a, b: rng.beta(a, b, size=n)
+    likes = (plays * ratio(2, 30)).astype(np.int64)
+    coins = (likes * ratio(2, 8)).astype(np.int64)
+    favs = (likes * ratio(2, 6)).astype(np.int64)
+    shares = (likes * ratio(1, 20)).astype(np.int64)
+    comments = (plays * ratio(1, 400)).astype(np.int64)
+    danmaku = (plays * ratio(1, 300)).astype(np.int64)
+
+    # 发布时间：最近一年，晚上更多
+    hour_weights = np.array([2, 1, 1, 1, 1, 1, 2, 3, 4, 4, 5, 7, 8, 6, 5, 5, 6, 9, 11, 12, 12, 10, 7, 4], float)
+    hours = rng.choice(24, size=n, p=hour_weights / hour_weights.sum())
+    base = np.datetime64('2025-12-31') - rng.integers(0, 365, size=n).astype('timedelta64[D]')
+    times = (base.astype('datetime64[s]') + (hours * 3600 + rng.integers(0, 3600, size=n)).astype('timedelta64[s]'))
+    times = pd.to_datetime(times)
+    slash = rng.random(n) < 0.5
+    publish = np.where(slash, times.strftime('%Y/%m/%d %H:%M').str.replace('/0', '/'),
+                       times.strftime('%Y-%m-%d %H:%M:%S'))
+
+    durations = np.clip(rng.lognormal(5.6, 0.9, size=n), 5, 4 * 3600).astype(np.int64)
+    duration_text = [format_duration(int(s)) for s in durations]
+
+    region = rng.choice(REGIONS, size=n).tolist()
+    dish = rng.choice(DISHES, size=n).tolist()
+    prefix = rng.choice(PREFIXES, size=n).tolist()
+    suffix = rng.choice(SUFFIXES, size=n).tolist()
+    titles = [f"{p}|{r}{d}，{s}" for p, r, d, s in zip(prefix, region, dish, suffix)]
+    n_tags = rng.integers(1, 11, size=n)
+    tag_choice = rng.integers(0, len(TAGS), size=(n, 10))
+    tags = [str(list(dict.fromkeys([r, d] + [TAGS[j] for j in row[:k]])))
+            for r, d, row, k in zip(region, dish, tag_choice, n_tags)]
+    categories = [f"['{c}']" for c in rng.choice(CATEGORIES, size=n, p=CATEGORY_WEIGHTS)]
+    descriptions = np.where(rng.random(n) < EMPTY_DESC_RATE, '', rng.choice(DESCRIPTIONS, size=n))
+
+    aids = 115_000_000_000_000 + start + np.arange(n)
+    df = pd.DataFrame({
+        '序号': (start + np.arange(n) + 1).astype(str),
+        '视频链接': [f"https://www.bilibili.com/video/{bvid(start + i)}" for i in range(n)],
+        '博主名称': np.array(names, dtype=object)[blogger],
+        '视频标题': titles,
+        '标签': tags,
+        '类别': categories,
+        '播放量': plays.astype(str), '点赞数': likes.astype(str), '投币数': coins.astype(str),
+        '收藏数': favs.astype(str), '分享数': shares.astype(str),
+        '发布时间': publish,
+        '视频简介': descriptions,
+        '视频时长': duration_text,
+        '封面URL': [f"http://i0.hdslb.com/bfs/archive/{a:x}.jpg" for a in aids],
+        '封面路径': [f"covers/{a}.jpg" for a in aids],
+        'UP主粉丝数': fans[blogger].astype(str),
+        '视频评论数': comments.astype(str), '视频弹幕数': danmaku.astype(str),
+        'UP主ID': mids[blogger].astype(str),
+    })
+
+    # 缺失与重复
+    for col in ['播放量', '点赞数', '投币数', '收藏数', '分享数', 'UP主粉丝数', '视频评论数', '视频弹幕数']:
+        df.loc[rng.random(n) < NA_RATE, col] = 'N/A'
+    df.loc[rng.random(n) < DASH_DURATION_RATE, '视频时长'] = '-'
+    dup = np.flatnonzero(rng.random(n) < DUPLICATE_RATE)
+    if len(dup):
+        df.iloc[dup, 1:] = df.iloc[np.maximum(dup - 1, 0), 1:].to_numpy()
+    return df[CSV_HEADER]
+
+
+def write_csv(path, rows, seed=0, chunk_rows=200_000):
+    """分块生成并写出（内存只与 chunk_rows 有关），返回文件大小（字节）"""
+    n_bloggers = max(100, rows // 20)
+    tmp = str(path) + '.tmp'
+    for start in range(0, rows, chunk_rows):
+        chunk = generate_chunk(start, min(chunk_rows, rows - start), seed, n_bloggers)
+        chunk.to_csv(tmp, mode='w' if start == 0 else 'a', header=start == 0, index=False,
+                     encoding='utf-8-sig' if start == 0 else 'utf-8')
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+# ================== 视频页面 ==================
+def synthetic_video_page(rng, i, html_only=False, n_noise=1500):
+    """一个模拟视频页面；html_only=True 时没有 __INITIAL_STATE__，只能从HTML元素解析"""
+    title = f"{rng.choice(PREFIXES)}|{rng.choice(REGIONS)}{rng.choice(DISHES)}，{rng.choice(SUFFIXES)}"
+    tags = list(dict.fromkeys(rng.choice(TAGS, size=rng.integers(1, 8)).tolist()))
+    plays = int(heavy_tail_plays(rng, 1)[0])
+    video_data = {
+        'bvid': bvid(i), 'aid': 115_000_000_000_000 + i, 'title': title,
+        'pic': f'http://i0.hdslb.com/bfs/archive/{i:x}.jpg', 'tname': str(rng.choice(CATEGORIES)),
+        'pubdate': int(datetime(2025, 12, 1).timestamp()) + int(rng.integers(0, 86400 * 30)),
+        'desc': str(rng.choice(DESCRIPTIONS)) * int(rng.integers(1, 20)),
+        'duration': int(rng.integers(10, 3000)),
+        'owner': {'mid': int(rng.integers(10_000, 3_000_000_000)), 'name': f'博主{i % 997}'},
+        'stat': {'view': plays, 'like': plays // 15, 'coin': plays // 90, 'favorite': plays // 60,
+                 'share': plays // 300, 'reply': plays // 400, 'danmaku': plays // 300},
+        'pages': [{'cid': i * 10 + p, 'part': f'P{p}', 'duration': 100} for p in range(3)],
+    }
+    if rng.random() < 0.7:
+        video_data['tags'] = [{'tag_name': t} for t in tags]
+    related = [dict(video_data, aid=j, title=f'相关视频{j}', desc='简介' * 100) for j in range(20)]
+    noise = ''.join(f'<div class="item-{j}"><span>美食{j}</span><a href="/v/{j}">链接</a></div>'
+                    for j in range(n_noise))
+    tag_links = ''.join(f'<a class="tag-link" href="/tag/{t}">{t}</a>' for t in tags)
+    head = f'<!DOCTYPE html><html><head><meta property="og:image" content="{video_data["pic"]}"></head><body>'
+    body = (f'<h1 class="video-title">{title}</h1><div class="tag-panel">{tag_links}</div>'
+            f'<a class="up-name" href="//space.bilibili.com/{video_data["owner"]["mid"]}">'
+            f'{video_data["owner"]["name"]}</a>' + noise)
+    if html_only:
+        return head + body + '</body></html>'
+    state = {'aid': video_data['aid'], 'bvid': video_data['bvid'], 'videoData': video_data,
+             'related': related, 'upData': {'mid': video_data['owner']['mid']}}
+    return (head + body + f'<script>window.__INITIAL_STATE__={json.dumps(state, ensure_ascii=False)};'
+            '(function(){var s;(s=document.currentScript||document.scripts[document.scripts.length-1])'
+            '.parentNode.removeChild(s);}());</script></body></html>')
+
+
+def video_pages(n, seed=0, html_only_rate=0.1):
+    rng = np.random.default_rng([seed, 0x7A6E])
+    return [synthetic_video_page(rng, i, html_only=rng.random() < html_only_rate) for i in range(n)]
+
+
+if __name__ == '__main__':
+    rows = int(float(sys.argv[1])) if len(sys.argv) > 1 else 10_000
+    out = sys.argv[2] if len(sys.argv) > 2 else f'synthetic_{rows}.csv'
+    size = write_csv(out, rows)
+    print(f"已生成 {rows} 行 -> {out}（{size / 1e6:.1f} MB）")
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+博主级别汇总索引（增量维护，可持久化）
+- 以 UP主ID（mid）为键，而不是博主名称（昵称会改、也可能重名）；
+  旧数据没有 UP主ID 时退回按博主名称
+- 每个博主保存：发布次数、播放量总和、平均播放量、最新粉丝数、热度得分
+  （热度得分 = 平均播放量 × 0.7 + 粉丝数 × 0.3，与 data_visualization_1.ipynb 的定义相同）
+- 每个视频记住它上次计入的博主和播放量：同一视频再次出现（新快照）时替换旧值，不会重复累加
+- 粉丝数 / 平均播放量 / 热度得分各维护一个有序索引（bisect），
+  阈值查询（如黑马：粉丝 < 50万 且 平均播放 > 50万）和 TOP-k 不需要扫描全部博主
+- 用法：
+    index = BloggerIndex()
+    index.update(df)                        # 新数据到达时再次调用即可
+    index.heima(); index.top('热度得分', 15); index.to_frame()
+    index.save(); index = BloggerIndex.load()
+"""
+
+import bisect
+import json
+import math
+import os
+
+import pandas as pd
+
+INDEX_FILE = "blogger_index.json"
+INDEXED = ('UP主粉丝数', '平均播放量', '热度得分')
+COLUMNS = ['UP主ID', '博主名称', 'UP主粉丝数', '平均播放量', '发布次数', '播放量总和', '热度得分']
+
+
+def _number(value):
+    """转成 float；缺失 / 无法解析时返回 None"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def blogger_key(mid, name):
+    mid = _number(mid)
+    if mid:
+        return str(int(mid))
+    return f"name:{name}"
+
+
+class SortedIndex:
+    """
+    按值有序的 (值, 键) 列表：更新 O(n) 移动、查询 O(log n + 结果数)
+    值为 None 的键不进入索引
+    """
+
+    def __init__(self):
+        self.values = []
+        self.keys = []
+        self.value_of = {}
+
+    def _remove(self, key):
+        value = self.value_of.pop(key, None)
+        if value is None:
+            return
+        i = bisect.bisect_left(self.values, value)
+        while self.keys[i] != key:
+            i += 1
+        del self.values[i]
+        del self.keys[i]
+
+    def update(self, key, value):
+        if self.value_of.get(key) == value:
+            return
+        self._remove(key)
+        if value is None:
+            return
+        i = bisect.bisect_right(self.values, value)
+        self.values.insert(i, value)
+        self.keys.insert(i, key)
+        self.value_of[key] = value
+
+    def range(self, lo=None, hi=None):
+        """lo < 值 < hi 的键（开区间，None 表示不限）"""
+        start = 0 if lo is None else bisect.bisect_right(self.values, lo)
+        stop = len(self.values) if hi is None else bisect.bisect_left(self.values, hi)
+        return self.keys[start:stop]
+
+    def count(self, lo=None, hi=None):
+        start = 0 if lo is None else bisect.bisect_right(self.values, lo)
+        stop = len(self.values) if hi is None else bisect.bisect_left(self.values, hi)
+        return max(stop - start, 0)
+
+    def top(self, k):
+        return self.keys[-k:][::-1] if k > 0 else []
+
+
+class BloggerIndex:
+    def __init__(self, key_col='视频链接', name_col='博主名称', mid_col='UP主ID',
+                 plays_col='播放量', fans_col='UP主粉丝数'):
+        self.key_col = key_col
+        self.name_col = name_col
+        self.mid_col = mid_col
+        self.plays_col = plays_col
+        self.fans_col = fans_col
+        self.videos = {}      # 视频 -> [博主键, 播放量]
+        self.bloggers = {}    # 博主键 -> {'name', 'count', 'sum', 'fans'}
+        self.indexes = {field: SortedIndex() for field in INDEXED}
+        self.counters = {'updates': 0, 'rows': 0, 'replaced': 0}
+
+    # ---------- 更新 ----------
+    def update(self, df):
+        """
+        合并新数据（DataFrame，需含 视频链接 / 博主名称 / 播放量 / UP主粉丝数，UP主ID 可选）
+        同一视频以最新一次为准；返回本次有变化的博主数
+        """
+        names = df[self.name_col].astype(str).tolist()
+        mids = df[self.mid_col].tolist() if self.mid_col in df else [None] * len(df)
+        plays = pd.to_numeric(df[self.plays_col], errors='coerce').fillna(0).tolist()
+        fans = pd.to_numeric(df[self.fans_col], errors='coerce').tolist()
+        touched = set()
+        for video, name, mid, play, fan in zip(df[self.key_col].astype(str), names, mids, plays, fans):
+            key = blogger_key(mid, name)
+            blogger = self.bloggers.setdefault(key, {'name': name, 'count': 0, 'sum': 0.0, 'fans': None})
+            old = self.videos.get(video)
+            if old is not None:
+                # 视频再次出现：先撤掉上次的贡献（博主可能也变了，例如旧数据按名称、新数据按 mid）
+                previous = self.bloggers[old[0]]
+                previous['count'] -= 1
+                previous['sum'] -= old[1]
+                touched.add(old[0])
+                self.counters['replaced'] += 1
+            blogger['count'] += 1
+            blogger['sum'] += play
+            blogger['name'] = name
+            fan = _number(fan)
+            if fan is not None:
+                blogger['fans'] = fan
+            self.videos[video] = [key, play]
+            touched.add(key)
+
+        for key in touched:
+            self._reindex(key)
+        self.counters['updates'] += 1
+        self.counters['rows'] += len(df)
+        return len(touched)
+
+    def _reindex(self, key):
+        blogger = self.bloggers[key]
+        if blogger['count'] <= 0:
+            # 所有视频都归到了别的键下
+            del self.bloggers[key]
+            for index in self.indexes.values():
+                index.update(key, None)
+            return
+        for field, value in self._metrics(blogger).items():
+            self.indexes[field].update(key, value)
+
+    @staticmethod
+    def _metrics(blogger):
+        mean = blogger['sum'] / blogger['count']
+        fans = blogger['fans']
+        return {'UP主粉丝数': fans, '平均播放量': mean,
+                '热度得分': None if fans is None else mean * 0.7 + fans * 0.3}
+
+    # ---------- 查询 ----------
+    def query(self, **bounds):
+        """
+        阈值查询，字段为 INDEXED 之一，值为 (下限, 上限) 开区间，None 表示不限；
+        例如 query(UP主粉丝数=(None, 500000), 平均播放量=(500000, None))
+        先取候选最少的一个索引，其余条件只检查这些候选
+        """
+        if not bounds:
+            return self.to_frame()
+        fields = sorted(bounds, key=lambda f: self.indexes[f].count(*bounds[f]))
+        keys = self.indexes[fields[0]].range(*bounds[fields[0]])
+        for field in fields[1:]:
+            lo, hi = bounds[field]
+            value_of = self.indexes[field].value_of
+            keys = [key for key in keys if key in value_of
+                    and (lo is None or value_of[key] > lo) and (hi is None or value_of[key] < hi)]
+        return self.to_frame(keys)
+
+    def heima(self, fans_below=500000, plays_above=500000):
+        """黑马博主：粉丝数 < fans_below 且 平均播放量 > plays_above"""
+        return self.query(UP主粉丝数=(None, fans_below), 平均播放量=(plays_above, None))
+
+    def top(self, field, k=15):
+        return self.to_frame(self.indexes[field].top(k))
+
+    def to_frame(self, keys=None):
+        """博主汇总表（列与原 influence 表相同，另加 UP主ID / 播放量总和）；keys 给定时按其顺序"""
+        keys = list(self.bloggers) if keys is None else keys
+        rows = []
+        for key in keys:
+            blogger = self.bloggers[key]
+            metrics = self._metrics(blogger)
+            rows.append({
+                'UP主ID': None if key.startswith('name:') else key,
+                '博主名称': blogger['name'],
+                'UP主粉丝数': metrics['UP主粉丝数'],
+                '平均播放量': metrics['平均播放量'],
+                '发布次数': blogger['count'],
+                '播放量总和': blogger['sum'],
+                '热度得分': metrics['热度得分'],
+            })
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def __len__(self):
+        return len(self.bloggers)
+
+    # ---------- 持久化 ----------
+    def save(self, path=INDEX_FILE):
+        """保存汇总状态（临时文件 + 原子重命名）；有序索引加载时重建"""
+        state = {'videos': self.videos, 'bloggers': self.bloggers, 'counters': self.counters}
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE, **kw):
+        index = cls(**kw)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+            index.videos = state['videos']
+            index.bloggers = state['bloggers']
+            index.counters.update(state.get('counters', {}))
+            for key in index.bloggers:
+                index._reindex(key)
+        return index
+
+    def report(self):
+        c = self.counters
+        print(f"博主索引: {len(self.bloggers)} 位博主, {len(self.videos)} 个视频, "
+              f"{c['updates']} 次更新, 共 {c['rows']} 行（其中 {c['replaced']} 行替换了旧值）")
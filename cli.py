@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+统一命令行入口（定时任务用）
+- 子命令：crawl 爬取 / clean 清洗 / features 预计算派生特征 / covers 封面特征 / render 渲染图表 /
+  imports 检查各子命令的导入耗时
+- 每个子命令只在运行时才导入自己用到的模块：只爬取时不会加载 matplotlib / seaborn / OpenCV 等，
+  只重画一张图时也不会加载 OpenCV；人脸模型只在提取封面特征的工作进程里加载
+- 每次运行结束打印导入耗时和已加载的重型库，与该子命令的预算对比；
+  imports 子命令在新进程里用 python -X importtime 逐个测量，超出预算或加载了不该加载的库时返回1
+- 用法：
+    python cli.py crawl --boards food --workers 8 --rate 2
+    python cli.py crawl --urls urls.txt --api-base http://127.0.0.1:8000    # 配合 crawl_replay_server.py
+    python cli.py clean video_info_complete.csv bilibili_food_cleaned_final.csv --chunksize 100000
+    python cli.py features
+    python cli.py covers --img-dir covers --workers 4
+    python cli.py render 1 4b          # 按编号 / 函数名 / 输出文件名选图，不给则全部；--list 列出
+    python cli.py imports
+  任一子命令加 --metrics metrics/ 输出运行指标（见 telemetry.py）
+"""
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+import telemetry
+
+# 重型库分组（按顶层包名判断是否已加载）
+PLOTTING = ('matplotlib', 'seaborn', 'wordcloud')
+VISION = ('cv2', 'skimage')
+NLP = ('jieba', 'sklearn')
+HEAVY = ('pandas', 'numpy', 'pyarrow', 'scipy', 'aiohttp', 'requests', 'bs4', 'selenium') + PLOTTING + VISION + NLP
+
+# 子命令 -> 入口模块（运行时才导入）/ 导入耗时预算（秒）/ 不允许加载的库
+COMMANDS = {
+    'crawl': {'modules': ['scraping_rank', 'scraping_async', 'scraping_checkpoint', 'scraping_covers',
+                          'scraping_sink'],
+              'budget': 0.5, 'forbid': PLOTTING + VISION + NLP},
+    'clean': {'modules': ['data_cleaning_bilibili'], 'budget': 1.0, 'forbid': PLOTTING + VISION + NLP},
+    'features': {'modules': ['feature_store'], 'budget': 1.0, 'forbid': PLOTTING + VISION + NLP},
+    'covers': {'modules': ['cover_store'], 'budget': 1.5, 'forbid': PLOTTING + NLP},
+    'render': {'modules': ['data_visualization_2'], 'budget': 2.0, 'forbid': VISION + NLP},
+}
+
+_import_seconds = 0.0
+
+
+def load(command):
+    """导入子命令的入口模块，返回模块列表；耗时计入本次运行的导入耗时"""
+    global _import_seconds
+    started = time.perf_counter()
+    modules = [importlib.import_module(name) for name in COMMANDS[command]['modules']]
+    _import_seconds += time.perf_counter() - started
+    return modules
+
+
+def loaded(names):
+    return [name for name in names if name in sys.modules]
+
+
+def import_report(command):
+    """本次运行的导入耗时、已加载的重型库；加载了不该加载的库时提示"""
+    spec = COMMANDS[command]
+    over = '，超出预算' if _import_seconds > spec['budget'] else ''
+    print(f"\n导入耗时: {_import_seconds:.2f}s（预算 {spec['budget']:.1f}s{over}），"
+          f"已加载: {', '.join(loaded(HEAVY)) or '无'}")
+    bad = loaded(spec['forbid'])
+    if bad:
+        print(f"⚠ {command} 不应加载: {', '.join(bad)}")
+
+
+# ================== crawl ==================
+def cmd_crawl(args):
+    """与 data_scraping_bilibili.ipynb 中 main(mode="async") 相同的流程"""
+    scraping_rank, scraping_async, scraping_checkpoint, scraping_covers, scraping_sink = load('crawl')
+    from scraping_parse import empty_record, normalize_link
+
+    if args.urls:
+        with open(args.urls, encoding='utf-8') as f:
+            urls = [line.strip() for line in f if line.strip()]
+    else:
+        urls = []
+        for board in args.boards:
+            print(f"\n1. 正在获取排行榜页面: {board} ...")
+            with telemetry.span('stage', stage='rank_page'):
+                soup = scraping_rank.analyurl_mainhtml(scraping_async.RANK_BOARDS[board])
+            urls.extend(scraping_rank.extract_video_links(soup))
+
+    records = {}
+    checkpoint = None
+    todo = urls
+    if not args.no_resume:
+        checkpoint = scraping_checkpoint.CrawlCheckpoint(fresh_seconds=args.fresh_hours * 3600)
+        todo = checkpoint.pending(urls)
+
+    def on_record(index, record):
+        bvid = scraping_checkpoint.bvid_from_link(record['video_link'])
+        records[bvid] = record
+        # 只记录成功的视频，失败的下次运行重试
+        if checkpoint is not None and record['title'] != 'N/A':
+            checkpoint.save(bvid, record)
+
+    print(f"\n2. 开始爬取 {len(todo)} 个视频的详细信息...")
+    with telemetry.span('stage', stage='crawl') as span:
+        span.set(videos=len(todo), mode='async')
+        kwargs = {'api_base': args.api_base} if args.api_base else {}
+        try:
+            scraping_async.run_crawl(todo, on_record, workers=args.workers, rate=args.rate, **kwargs)
+        finally:
+            if checkpoint is not None:
+                checkpoint.flush()     # 检查点按批写盘，最后一批在这里写出
+
+    rows = []
+    for url in urls:
+        bvid = scraping_checkpoint.bvid_from_link(url)
+        record = records.get(bvid) or (checkpoint.get(bvid) if checkpoint is not None else None)
+        rows.append(record or empty_record(normalize_link(url)))
+
+    if not args.no_covers:
+        print("\n3. 正在下载封面...")
+        with telemetry.span('stage', stage='covers'):
+            cover_paths = scraping_covers.download_covers((r['aid'], r['cover_url']) for r in rows)
+        for record in rows:
+            if record['aid'] in cover_paths:
+                record['cover_path'] = cover_paths[record['aid']] or "下载失败"
+
+    # 输出文件整体覆盖（CSV 先写临时文件再替换）；不续爬、全部重新爬取时先把上一次的CSV备份走
+    # （同 notebook 中的 backup_csv）；续爬时新文件已包含检查点中的记录，不再备份
+    for path in args.outputs if args.no_resume else ():
+        if path.endswith('.csv') and os.path.exists(path):
+            backup = f"{path[:-4]}_backup_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+            os.rename(path, backup)
+            print(f"已备份原有CSV文件为: {backup}")
+    with telemetry.span('stage', stage='write'), scraping_sink.open_sink(args.outputs) as sink:
+        for index, record in enumerate(rows):
+            sink.write(index, record)
+
+
+# ================== clean / features ==================
+def cmd_clean(args):
+    cleaning, = load('clean')
+    cleaning.clean_file(args.src, args.dst, args.chunksize)
+
+
+def cmd_features(args):
+    """计算（或从缓存读取）全部派生特征组，之后画图直接读缓存"""
+    feature_store, = load('features')
+    store = feature_store.FeatureStore(args.source)
+    for name in store.features:
+        store.group(name)
+    store.report()
+
+
+# ================== covers ==================
+def cmd_covers(args):
+    cover_store, = load('covers')
+    from cover_features import face_model_files
+
+    prototxt, caffemodel = face_model_files(args.weights_dir, download=not args.no_download)
+    if not (prototxt.exists() and caffemodel.exists()):
+        raise SystemExit(f"缺少人脸检测模型: {prototxt} / {caffemodel}（去掉 --no-download 自动下载）")
+    df = cover_store.update_cover_features(args.img_dir, prototxt, caffemodel, csv_out=args.csv_out,
+                                           workers=args.workers, batch_size=args.batch_size)
+    print(f"✅ {len(df)} 张封面的特征已保存 -> {args.csv_out}")
+
+
+# ================== render ==================
+def chart_matches(chart, wanted):
+    """按编号（输出文件名开头，如 1 / 4b）、函数名或输出文件名选图"""
+    return (wanted == chart.name or wanted == chart.output
+            or chart.output.split('_', 1)[0] == wanted)
+
+
+def cmd_render(args):
+    viz, = load('render')
+    from render_scheduler import render_charts
+
+    if args.list:
+        for chart in viz.CHARTS:
+            print(f"{chart.output.split('_', 1)[0]:>3}  {chart.name:<22} {chart.output}")
+        return
+    if args.source:
+        viz.store = viz.FeatureStore(args.source)
+    charts = viz.CHARTS
+    if args.charts:
+        unknown = [w for w in args.charts if not any(chart_matches(c, w) for c in viz.CHARTS)]
+        if unknown:
+            raise SystemExit(f"未知图表: {', '.join(unknown)}（python cli.py render --list 查看）")
+        charts = [c for c in viz.CHARTS if any(chart_matches(c, w) for w in args.charts)]
+    if any(viz.agg_cube in chart.deps for chart in charts):
+        viz.get_cube()     # 主进程先建好立方体并存盘，渲染进程直接读取
+    render_charts(charts, viz.store, workers=args.workers, force=args.force)
+
+
+# ================== imports ==================
+def measure_imports(command):
+    """在新进程里用 -X importtime 导入子命令的模块，返回 (总耗时秒, 已加载的重型库, 耗时最多的顶层模块)"""
+    code = f"import cli; cli.load({command!r})"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True,
+                            text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total = 0
+    top = []
+    names = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        names.add(name.strip().split('.')[0])
+        if name.startswith(' ') and not name.startswith('  '):   # 顶层导入（缩进一格）
+            top.append((int(cumulative_us) / 1e6, name.strip()))
+    return total / 1e6, [h for h in HEAVY if h in names], sorted(top, reverse=True)[:5]
+
+
+def cmd_imports(args):
+    unknown = [c for c in args.commands if c not in COMMANDS]
+    if unknown:
+        raise SystemExit(f"未知子命令: {', '.join(unknown)}")
+    failed = False
+    for command in args.commands or list(COMMANDS):
+        spec = COMMANDS[command]
+        try:
+            seconds, heavy, top = measure_imports(command)
+        except RuntimeError as e:
+            print(f"{command:<9} 导入失败: {e}")
+            failed = True
+            continue
+        bad = [h for h in heavy if h in spec['forbid']]
+        ok = seconds <= spec['budget'] and not bad
+        failed |= not ok
+        print(f"{'✓' if ok else '✗'} {command:<9} {seconds:5.2f}s / 预算 {spec['budget']:.1f}s  "
+              f"已加载: {', '.join(heavy) or '无'}" + (f"  不应加载: {', '.join(bad)}" if bad else ''))
+        print('            ' + ', '.join(f"{name} {s:.2f}s" for s, name in top))
+    return 1 if failed else 0
+
+
+# ================== 参数 ==================
+def build_parser():
+    parser = argparse.ArgumentParser(description="B站美食视频数据分析：爬取 / 清洗 / 特征 / 图表")
+    parser.add_argument('--metrics', default=None,
+                        help="运行指标输出（目录，或 .jsonl / .prom 文件），默认取环境变量 BILI_METRICS")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('crawl', help="爬取排行榜视频（异步并发）")
+    p.add_argument('--boards', nargs='+', default=['food'], help="排行榜分区，见 scraping_async.RANK_BOARDS")
+    p.add_argument('--urls', default=None, help="视频链接文件（每行一个），给出时不打开排行榜页面")
+    p.add_argument('--workers', type=int, default=8)
+    p.add_argument('--rate', type=float, default=2.0, help="全局限速（请求/秒）")
+    p.add_argument('--fresh-hours', type=float, default=2,
+                   help="检查点新鲜期（小时），期内抓过的视频跳过；应大于定时爬取的间隔")
+    p.add_argument('--no-resume', action='store_true', help="不使用检查点，全部重新爬取")
+    p.add_argument('--no-covers', action='store_true', help="不下载封面")
+    p.add_argument('--outputs', nargs='+',
+                   default=['video_info_complete.csv', 'video_info_complete.parquet', 'snapshots/'])
+    p.add_argument('--api-base', default=None, help="API地址（指向本地回放服务器测试）")
+    p.set_defaults(func=cmd_crawl)
+
+    p = sub.add_parser('clean', help="清洗原始CSV")
+    p.add_argument('src', nargs='?', default='video_info_complete.csv')
+    p.add_argument('dst', nargs='?', default='bilibili_food_cleaned_final.csv')
+    p.add_argument('--chunksize', type=int, default=None)
+    p.set_defaults(func=cmd_clean)
+
+    p = sub.add_parser('features', help="预先计算可视化用的派生特征（写入 feature_cache/）")
+    p.add_argument('--source', default='video_info_complete.csv')
+    p.set_defaults(func=cmd_features)
+
+    p = sub.add_parser('covers', help="增量提取封面特征")
+    p.add_argument('--img-dir', default='covers')
+    p.add_argument('--weights-dir', default='weights')
+    p.add_argument('--no-download', action='store_true', help="模型文件不存在时不自动下载")
+    p.add_argument('--csv-out', default='cover_features.csv')
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--batch-size', type=int, default=16)
+    p.set_defaults(func=cmd_covers)
+
+    p = sub.add_parser('render', help="渲染图表（输入未变化的跳过）")
+    p.add_argument('charts', nargs='*', help="图表编号 / 函数名 / 输出文件名，不给则全部")
+    p.add_argument('--list', action='store_true', help="列出所有图表")
+    p.add_argument('--force', action='store_true', help="忽略清单，全部重新渲染")
+    p.add_argument('--source', default=None, help="数据文件，默认 video_info_complete.csv")
+    p.add_argument('--workers', type=int, default=None)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser('imports', help="测量各子命令的导入耗时，检查是否加载了不该加载的库")
+    p.add_argument('commands', nargs='*', help=f"默认全部（{' / '.join(COMMANDS)}）")
+    p.set_defaults(func=cmd_imports)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'imports':
+        return args.func(args)
+    with telemetry.run(args.command, args.metrics):
+        result = args.func(args)
+    import_report(args.command)
+    return result
+
+
+if __name__ == '__main__':
+    sys.exit(main())
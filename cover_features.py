@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+封面特征提取（从 data_visualization_3_covers.ipynb 移出，便于多进程调用）
+- 颜色矩 / 主色 / LBP对比度 / 三分构图 / 人脸（OpenCV DNN, res10 SSD）
+- extract_covers: 进程池并行；每个进程只加载一次人脸检测网络，
+  一批封面用 cv2.dnn.blobFromImages 一次前向推理，最后打印 张/秒
+- 每张图只解码一次（原地转RGB），灰度图只算一次供 LBP 和三分构图共用；
+  颜色矩由通道直方图计算，主色在约 16k 个抽样像素上做固定种子的 k-means。
+  与原 notebook 实现相比，输出列不变；颜色矩偏差 < 1e-5（相对 float64 精确值，
+  原实现 float32 累加本身有 ~5e-2 的误差），主色 RGB ≤ 2、占比 ≤ 0.01，
+  两簇占比接近时第一主色可能换簇（原实现不固定种子，同样存在）。
+  见 benchmarks/bench_cover_kernels.py
+- 用法：
+    df, failed = extract_covers(list(Path("covers").glob("*")), prototxt, caffemodel, workers=4)
+"""
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pandas as pd
+from skimage.feature import local_binary_pattern
+
+FEATURE_COLUMNS = (["aid"] + [f"color_{i}" for i in range(12)]
+                   + ["dom_r", "dom_g", "dom_b", "dom_ratio",
+                      "face_num", "face_area", "face_offset",
+                      "lbp_contrast", "thirds_score"])
+
+# 特征组：版本号（改了某个算子的实现就把它的版本加1，cover_store 只重算这一组的列）/ 输出列
+FEATURE_GROUPS = {
+    'color_moment': {'version': 2, 'columns': [f"color_{i}" for i in range(12)]},
+    'dom_color': {'version': 2, 'columns': ["dom_r", "dom_g", "dom_b", "dom_ratio"]},
+    'face': {'version': 1, 'columns': ["face_num", "face_area", "face_offset"]},
+    'lbp_contrast': {'version': 1, 'columns': ["lbp_contrast"]},
+    'thirds_score': {'version': 1, 'columns': ["thirds_score"]},
+}
+
+FACE_SIZE = (300, 300)
+FACE_MEAN = [104, 117, 123]
+
+# 主色 k-means 的抽样像素数（原实现对整张图全部像素做10次 k-means）
+DOM_COLOR_SAMPLE = 16384
+
+
+# ================== 读图 ==================
+def cv2rgb(path):
+    im = cv2.imread(str(path))
+    if im is None:
+        raise ValueError(f"无法读取 {path}")
+    return cv2.cvtColor(im, cv2.COLOR_BGR2RGB, dst=im)  # 原地转换，不再复制一份
+
+
+def to_gray(im):
+    """灰度图；已经是灰度（二维）时直接返回"""
+    return im if im.ndim == 2 else cv2.cvtColor(im, cv2.COLOR_RGB2GRAY)
+
+
+# ================== 人脸 ==================
+FACE_MODEL_URLS = {
+    'deploy.prototxt':
+        "https://raw.githubusercontent.com/opencv/opencv/master/samples/dnn/face_detector/deploy.prototxt",
+    'res10_300x300_ssd_iter_140000.caffemodel':
+        "https://huggingface.co/spaces/Smit1129/NewFaced/resolve/main/res10_300x300_ssd_iter_140000.caffemodel",
+}
+
+
+def face_model_files(weights_dir="weights", download=True):
+    """人脸检测模型文件 (prototxt, caffemodel)；不存在且 download=True 时下载"""
+    weights_dir = Path(weights_dir)
+    weights_dir.mkdir(exist_ok=True)
+    paths = []
+    for name, url in FACE_MODEL_URLS.items():
+        dst = weights_dir / name
+        if not dst.exists() and download:
+            import requests
+            print(f"⬇️  {dst.name}")
+            r = requests.get(url, stream=True)
+            r.raise_for_status()
+            with open(dst, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+            print(f"✅ {dst.name}")
+        paths.append(dst)
+    return tuple(paths)
+
+
+def load_net(prototxt, caffemodel):
+    return cv2.dnn.readNetFromCaffe(str(prototxt), str(caffemodel))
+
+
+def face_detect_batch(net, images, conf=0.5):
+    """
+    一批图片一次前向推理，返回每张图的人脸框列表
+    SSD 输出每行为 [图片序号, 类别, 置信度, x1, y1, x2, y2]（坐标为相对值）
+    """
+    if not images:
+        return []
+    blob = cv2.dnn.blobFromImages(images, 1.0, FACE_SIZE,
+                                  mean=FACE_MEAN, swapRB=False, crop=False)
+    net.setInput(blob)
+    dets = net.forward().reshape(-1, 7)
+    boxes = [[] for _ in images]
+    for image_id, _, confidence, x1, y1, x2, y2 in dets:
+        if confidence < conf or image_id < 0:
+            continue
+        h, w = images[int(image_id)].shape[:2]
+        x1, y1, x2, y2 = np.array([x1, y1, x2, y2]) * np.array([w, h, w, h])
+        boxes[int(image_id)].append([int(x1), int(y1), int(x2), int(y2)])
+    return boxes
+
+
+def face_detect_dnn(net, im_rgb, conf=0.5):
+    return face_detect_batch(net, [im_rgb], conf)[0]
+
+
+def face_info_from_boxes(boxes, shape):
+    """人脸数 / 最大人脸面积占比 / 最大人脸中心偏移"""
+    h, w = shape[:2]
+    n = len(boxes)
+    if n == 0:
+        return 0, 0., 0.
+    x1, y1, x2, y2 = max(boxes, key=lambda b: (b[2]-b[0])*(b[3]-b[1]))
+    area_ratio = (x2-x1)*(y2-y1)/(w*h)
+    center_offset = abs((x1+x2)/2 - w/2) / (w/2)
+    return n, area_ratio, center_offset
+
+
+def face_info(net, im):
+    return face_info_from_boxes(face_detect_dnn(net, im), im.shape)
+
+
+# ================== 颜色 / 构图 ==================
+def color_moment(im):
+    """
+    均值、标准差、偏度、峰度（R/G/B 各 4 维 → 12 维）
+    像素是 uint8，先统计每个通道的 256 级直方图（一次遍历，不产生浮点副本），
+    再由直方图算各阶中心矩
+    """
+    n = im.shape[0] * im.shape[1]
+    hist = np.stack([cv2.calcHist([im], [c], None, [256], [0, 256]).ravel() for c in range(3)])
+    p = hist.astype(np.float64) / n                        # (3, 256) 各灰度级占比
+    levels = np.arange(256) / 255.0
+    mean = p @ levels
+    d = levels[None, :] - mean[:, None]
+    std = np.sqrt((p * d ** 2).sum(axis=1))
+    skew = (p * d ** 3).sum(axis=1) / (std ** 3 + 1e-8)
+    kurt = (p * d ** 4).sum(axis=1) / (std ** 4 + 1e-8) - 3
+    return np.hstack([mean, std, skew, kurt]).astype(np.float32)
+
+
+def dom_color(im, k=3, sample=DOM_COLOR_SAMPLE, attempts=5, seed=0):
+    """
+    主色：对等间隔抽样的约 sample 个像素做 k-means（固定随机种子，结果可复现）
+    仍用随机初始中心；KMEANS_PP_CENTERS 在尝试次数少时容易把大色块一分为二
+    """
+    h, w = im.shape[:2]
+    step = max(1, int(np.ceil(np.sqrt(h * w / sample))))
+    data = im[::step, ::step].reshape(-1, 3).astype(np.float32)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    cv2.setRNGSeed(seed)
+    _, labels, centers = cv2.kmeans(data, k, None, criteria, attempts, cv2.KMEANS_RANDOM_CENTERS)
+    counts = np.bincount(labels.flatten(), minlength=k)
+    ratio  = counts / counts.sum()
+    order  = np.argsort(ratio)[::-1]
+    return centers[order], ratio[order]
+
+
+def lbp_contrast(im):
+    """im 可以是RGB或已转好的灰度图"""
+    lbp = local_binary_pattern(to_gray(im), 8, 1, method='uniform')
+    return np.std(lbp)
+
+
+def thirds_score(im):
+    """im 可以是RGB或已转好的灰度图"""
+    h, w = im.shape[:2]
+    # 计算亮度重心
+    M = cv2.moments(to_gray(im))
+    if M["m00"] == 0:
+        return 0.
+    cx = int(M["m10"] / M["m00"])
+    cy = int(M["m01"] / M["m00"])
+    # 四个三分交点
+    pts = [(w//3, h//3), (w//3, 2*h//3), (2*w//3, h//3), (2*w//3, 2*h//3)]
+    dist = min(np.hypot(cx-x, cy-y) for x, y in pts)
+    return max(0., 1 - dist / np.hypot(w, h))
+
+
+def image_features(im, groups=None):
+    """
+    除人脸以外的特征（groups 为要计算的特征组，None 表示全部）；
+    灰度图只转换一次，LBP 和三分构图共用
+    """
+    groups = set(FEATURE_GROUPS) if groups is None else set(groups)
+    feat = {}
+    # 颜色
+    if 'color_moment' in groups:
+        col = color_moment(im)
+        feat.update({f"color_{i}": col[i] for i in range(12)})
+    if 'dom_color' in groups:
+        centers, ratio = dom_color(im)
+        feat["dom_r"], feat["dom_g"], feat["dom_b"] = centers[0]
+        feat["dom_ratio"] = ratio[0]
+    # 构图
+    if groups & {'lbp_contrast', 'thirds_score'}:
+        gray = to_gray(im)
+        if 'lbp_contrast' in groups:
+            feat["lbp_contrast"] = lbp_contrast(gray)
+        if 'thirds_score' in groups:
+            feat["thirds_score"] = thirds_score(gray)
+    return feat
+
+
+def extract(path, net):
+    """单张封面的全部特征（串行用法，与原 notebook 中的 extract 相同）"""
+    path = Path(path)
+    im = cv2rgb(path)
+    feat = {"aid": path.stem}
+    feat.update(image_features(im))
+    n, area, offset = face_info(net, im)
+    feat["face_num"], feat["face_area"], feat["face_offset"] = n, area, offset
+    return {col: feat[col] for col in FEATURE_COLUMNS}
+
+
+# ================== 批量 / 多进程 ==================
+_net = None
+
+
+def init_worker(prototxt, caffemodel):
+    """每个工作进程加载一次网络（不需要人脸特征时不加载）；OpenCV 内部线程设为1，避免与进程池抢CPU"""
+    global _net
+    cv2.setNumThreads(1)
+    _net = load_net(prototxt, caffemodel) if prototxt else None
+
+
+def extract_batch(paths, net=None, groups=None):
+    """
+    处理一批封面：逐张解码并计算颜色/构图特征，人脸检测整批一次前向
+    返回 (records, failures)：records 中每条另带 "path"；failures 为 [(路径, 错误信息), ...]
+    """
+    net = net or _net
+    groups = set(FEATURE_GROUPS) if groups is None else set(groups)
+    records, images, failures = [], [], []
+    for path in paths:
+        path = Path(path)
+        try:
+            im = cv2rgb(path)
+            feat = {"aid": path.stem, "path": str(path)}
+            feat.update(image_features(im, groups))
+        except Exception as e:
+            failures.append((str(path), str(e)))
+            continue
+        records.append(feat)
+        images.append(im)
+
+    if 'face' not in groups:
+        return records, failures
+
+    try:
+        all_boxes = face_detect_batch(net, images)
+    except Exception:
+        # 整批推理失败时退回逐张检测，只丢掉出错的那张
+        all_boxes = []
+        for im in images:
+            try:
+                all_boxes.append(face_detect_dnn(net, im))
+            except Exception as e:
+                all_boxes.append(e)
+
+    ok = []
+    for feat, im, boxes in zip(records, images, all_boxes):
+        if isinstance(boxes, Exception):
+            failures.append((feat["path"], str(boxes)))
+            continue
+        n, area, offset = face_info_from_boxes(boxes, im.shape)
+        feat["face_num"], feat["face_area"], feat["face_offset"] = n, area, offset
+        ok.append(feat)
+    return ok, failures
+
+
+def run_batches(paths, prototxt, caffemodel, workers=None, batch_size=16, groups=None):
+    """
+    并行处理一批封面，返回 (records, failures, 耗时秒)
+    workers=None 时取 CPU 核数；workers=1 时在当前进程内执行（便于调试）
+    """
+    paths = [str(p) for p in paths]
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    workers = workers or os.cpu_count() or 1
+    need_net = groups is None or 'face' in groups
+
+    start = time.perf_counter()
+    records, failures = [], []
+    if workers == 1 or len(batches) <= 1:
+        net = load_net(prototxt, caffemodel) if need_net and batches else None
+        results = (extract_batch(batch, net, groups) for batch in batches)
+        for ok, failed in results:
+            records += ok
+            failures += failed
+    else:
+        initargs = (str(prototxt), str(caffemodel)) if need_net else (None, None)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=initargs) as pool:
+            for ok, failed in pool.map(extract_batch, batches,
+                                       itertools.repeat(None), itertools.repeat(groups)):
+                records += ok
+                failures += failed
+    return records, failures, time.perf_counter() - start
+
+
+def report_speed(n, records, failures, elapsed, workers, batch_size):
+    for path, error in failures:
+        print("✗", path, error)
+    print(f"封面特征提取: {len(records)} 张成功, {len(failures)} 张失败, "
+          f"{elapsed:.1f}s, {n / max(elapsed, 1e-9):.1f} 张/秒 "
+          f"({workers or os.cpu_count()} 进程, 每批 {batch_size} 张)")
+
+
+def extract_covers(paths, prototxt, caffemodel, workers=None, batch_size=16):
+    """
+    并行提取一批封面的全部特征，返回 (DataFrame, failures)
+    （增量版本见 cover_store.update_cover_features）
+    """
+    paths = list(paths)
+    records, failures, elapsed = run_batches(paths, prototxt, caffemodel, workers, batch_size)
+    report_speed(len(paths), records, failures, elapsed, workers, batch_size)
+    return pd.DataFrame(records, columns=FEATURE_COLUMNS), failures
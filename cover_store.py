@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+封面特征增量存储（SQLite）
+- 以封面文件内容哈希为键，按特征组分别保存结果和版本号（cover_features.FEATURE_GROUPS）；
+  某个特征组版本号变化时只重算这一组的列，其它列直接复用
+- 文件按 (路径, 大小, 修改时间) 记住哈希，未改动的文件不再重新读取计算哈希
+- 读取 / 提取失败的封面记录原因，之后的运行不再重试（内容变化或 retry_failed=True 时重试）
+- cover_features.csv 每次由存储导出（只包含当前封面目录中的文件），列与原来相同
+- 用法：
+    df = update_cover_features("covers", prototxt, caffemodel)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+from cover_features import FEATURE_COLUMNS, FEATURE_GROUPS, report_speed, run_batches
+
+STORE_FILE = "cover_features.sqlite"
+
+
+def content_hash(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CoverFeatureStore:
+    def __init__(self, path=STORE_FILE, groups=FEATURE_GROUPS):
+        self.groups = groups
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT);"
+            "CREATE TABLE IF NOT EXISTS features ("
+            " hash TEXT, grp TEXT, version INTEGER, value TEXT, computed_at REAL,"
+            " PRIMARY KEY (hash, grp));"
+            "CREATE TABLE IF NOT EXISTS failures ("
+            " hash TEXT PRIMARY KEY, path TEXT, error TEXT, failed_at REAL);"
+        )
+        self.conn.commit()
+
+    def hash_of(self, path):
+        """文件内容哈希；大小和修改时间没变时直接用上次的结果"""
+        path = str(path)
+        st = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime_ns, hash FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        digest = content_hash(path)
+        self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                          (path, st.st_size, st.st_mtime_ns, digest))
+        return digest
+
+    def missing_groups(self, digest):
+        """该封面还需要（重新）计算的特征组：没有结果或版本号不是当前版本"""
+        stored = dict(self.conn.execute(
+            "SELECT grp, version FROM features WHERE hash = ?", (digest,)).fetchall())
+        return frozenset(name for name, spec in self.groups.items()
+                         if stored.get(name) != spec['version'])
+
+    def failed(self, digest):
+        return self.conn.execute("SELECT 1 FROM failures WHERE hash = ?", (digest,)).fetchone() is not None
+
+    def put(self, digest, record, groups):
+        now = time.time()
+        for name in groups:
+            value = {col: record[col] for col in self.groups[name]['columns']}
+            self.conn.execute("INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?)",
+                              (digest, name, self.groups[name]['version'],
+                               json.dumps(value, default=float), now))
+        self.conn.execute("DELETE FROM failures WHERE hash = ?", (digest,))
+
+    def record_failure(self, digest, path, error):
+        self.conn.execute("INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)",
+                          (digest, str(path), error, time.time()))
+
+    def values(self, digest):
+        """该封面各特征组的当前版本结果；版本过期的组（如重算失败）不返回，导出时整行跳过"""
+        row = {}
+        for grp, version, value in self.conn.execute(
+                "SELECT grp, version, value FROM features WHERE hash = ?", (digest,)):
+            if grp in self.groups and version == self.groups[grp]['version']:
+                row.update(json.loads(value))
+        return row
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def update_cover_features(img_dir, prototxt, caffemodel, store=None, csv_out="cover_features.csv",
+                          workers=None, batch_size=16, retry_failed=False):
+    """
+    增量更新封面特征：只处理新的 / 内容变化的 / 特征组版本过期的封面，
+    结果写入存储后导出 csv_out，返回 DataFrame（列与 cover_features.csv 相同）
+    """
+    store = store or CoverFeatureStore()
+    paths = sorted(p for p in Path(img_dir).glob("*") if p.is_file())
+
+    digests = {}
+    todo = defaultdict(list)   # 需要计算的特征组 -> 路径
+    skipped_failed = 0
+    for path in paths:
+        try:
+            digest = store.hash_of(path)
+        except OSError as e:
+            print("✗", path, e)
+            continue
+        digests[str(path)] = digest
+        if store.failed(digest) and not retry_failed:
+            skipped_failed += 1
+            continue
+        missing = store.missing_groups(digest)
+        if missing:
+            todo[missing].append(str(path))
+    store.commit()
+
+    done = 0
+    for groups, group_paths in todo.items():
+        records, failures, elapsed = run_batches(group_paths, prototxt, caffemodel,
+                                                 workers, batch_size, groups)
+        for record in records:
+            store.put(digests[record["path"]], record, groups)
+        for path, error in failures:
+            store.record_failure(digests[path], path, error)
+        store.commit()
+        report_speed(len(group_paths), records, failures, elapsed, workers, batch_size)
+        done += len(group_paths)
+
+    rows = []
+    for path in paths:
+        digest = digests.get(str(path))
+        if digest is None:
+            continue
+        values = store.values(digest)
+        if len(values) == len(FEATURE_COLUMNS) - 1:
+            rows.append({"aid": path.stem, **values})
+    df = pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+    if csv_out:
+        df.to_csv(csv_out, index=False)
+
+    print(f"封面特征: 共 {len(paths)} 张, 本次处理 {done} 张, 复用 {len(paths) - done - skipped_failed} 张, "
+          f"跳过已知失败 {skipped_failed} 张")
+    return df
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+本地回放服务器：用录制好的页面代替B站，供异步爬虫离线测试
+目录结构（默认 fixtures/，测试用的录制数据见 tests/fixtures/）：
+    fixtures/rank/<分区>.html           -> /v/popular/rank/<分区>
+    fixtures/pages/<BV号>.html          -> /video/<BV号>
+    fixtures/api/view_<aid>.json        -> /x/web-interface/view?aid=<aid>
+    fixtures/api/fans_<mid>.json        -> /x/relation/stat?vmid=<mid>
+    fixtures/covers/<文件名>            -> /covers/<文件名>
+可选 fail_every=N：每 N 个请求返回一次 fail_status（默认 429，B站风控为 412），用于验证退避重试；
+server.counts 记录请求数 / 失败数，用于验证重试和限速
+响应带 ETag，支持 If-None-Match 条件请求（返回304），用于验证封面跳过下载；
+查询参数 truncate=N 时只发送前 N 字节就断开连接（Content-Length 仍为完整长度），模拟下载中断
+
+用法：
+    python crawl_replay_server.py fixtures 8000
+    run_crawl(["http://127.0.0.1:8000/video/BV1xxx"], on_record,
+              api_base="http://127.0.0.1:8000")
+"""
+
+import hashlib
+import itertools
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CONTENT_TYPES = {'.html': 'text/html; charset=utf-8',
+                 '.json': 'application/json; charset=utf-8',
+                 '.jpg': 'image/jpeg'}
+
+
+def make_handler(root, fail_every=0, fail_status=429):
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def resolve(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            parts = parsed.path.strip('/').split('/')
+            if parts[:3] == ['v', 'popular', 'rank'] and len(parts) > 3:
+                return os.path.join(root, 'rank', f'{parts[3]}.html')
+            if parts[0] == 'video' and len(parts) > 1:
+                return os.path.join(root, 'pages', f'{parts[1]}.html')
+            if parsed.path == '/x/web-interface/view':
+                return os.path.join(root, 'api', f"view_{query.get('aid', [''])[0]}.json")
+            if parsed.path == '/x/relation/stat':
+                return os.path.join(root, 'api', f"fans_{query.get('vmid', [''])[0]}.json")
+            if parts[0] == 'covers' and len(parts) > 1:
+                return os.path.join(root, 'covers', parts[1])
+            return None
+
+        def do_GET(self):
+            counts = getattr(self.server, 'counts', {'requests': 0, 'failed': 0})
+            with lock:
+                counts['requests'] += 1
+                fail = fail_every and next(counter) % fail_every == 0
+                if fail:
+                    counts['failed'] += 1
+            if fail:
+                self.send_response(fail_status)
+                self.send_header('Retry-After', '0')
+                self.end_headers()
+                return
+            path = self.resolve()
+            if path is None or not os.path.exists(path):
+                self.send_response(404)
+                self.end_headers()
+                return
+            with open(path, 'rb') as f:
+                body = f.read()
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', CONTENT_TYPES.get(os.path.splitext(path)[1], 'application/octet-stream'))
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            truncate = parse_qs(urlparse(self.path).query).get('truncate')
+            if truncate:
+                self.wfile.write(body[:int(truncate[0])])
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+def start_server(root='fixtures', port=0, fail_every=0, fail_status=429):
+    """
+    在后台线程启动回放服务器，返回 (server, base_url)
+    port=0 时自动分配端口；用完调用 server.shutdown()
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(root, fail_every, fail_status))
+    server.counts = {'requests': 0, 'failed': 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else 'fixtures'
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(root))
+    print(f"回放服务器已启动: http://127.0.0.1:{port}  (目录: {root})")
+    server.serve_forever()
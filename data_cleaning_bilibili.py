@@ -1,174 +1,314 @@
-import pandas as pd
+"""
+B站美食视频数据清洗
+按阶段组织的清洗流水线：显式列类型读取，每个阶段都是作用于数据块（chunk）的函数，
+可以用 chunksize 流式处理多次爬取累积的百万级历史数据。清洗结果写入新文件，不会修改原始输入。
+
+内存：
+- chunksize=None：整个文件读入一次，中位数和重复统计都是精确值
+- chunksize=N：内存只与 N 有关。跨数据块的重复统计用固定大小的布隆过滤器
+  （DuplicateFilter，每列 16MB；只会多计、不会漏计，报告中给出多计个数的期望值），
+  异常值替换用的中位数由固定大小的对数分桶直方图求得（相对误差不超过 MEDIAN_REL_WIDTH = 0.1%）。
+  输入读两遍：第一遍只读5个数值列求中位数（替换异常值前必须知道），第二遍读全部列处理
+
+用法：
+    python data_cleaning_bilibili.py [输入CSV] [输出CSV] [chunksize]
+    clean_file("video_info_complete.csv", "bilibili_food_cleaned_final.csv", chunksize=100000)
+各阶段耗时记入 telemetry（设置环境变量 BILI_METRICS=metrics/ 时输出）。
+"""
+
 import os
+import sys
 
-# 读取数据
-file_name = "video_info_complete.csv"
-df = pd.read_csv(file_name, encoding='utf-8')
+import numpy as np
+import pandas as pd
+
+import telemetry
+from time_parsing import time_parts
+
+# 分块处理时的固定大小状态（见模块说明）
+DUP_FILTER_BITS = 1 << 27       # 每列布隆过滤器的位数（16MB）
+DUP_FILTER_HASHES = 4
+MEDIAN_REL_WIDTH = 1e-3         # 中位数直方图每个桶的相对宽度
+MEDIAN_MAX = 1e12               # 超过的值计入最后一个桶
+
+# 原始CSV的列类型（数值列可能含 'N/A' 等文本，先按字符串读入，再在阶段1转换）
+RAW_DTYPES = {
+    '序号': 'string', '视频链接': 'string', '博主名称': 'string', '视频标题': 'string',
+    '标签': 'string', '类别': 'string', '播放量': 'string', '点赞数': 'string',
+    '投币数': 'string', '收藏数': 'string', '分享数': 'string', '发布时间': 'string',
+    '视频简介': 'string', '视频时长': 'string', '封面URL': 'string', '封面路径': 'string',
+    'UP主粉丝数': 'string', '视频评论数': 'string', '视频弹幕数': 'string',
+    'UP主ID': 'string',  # 新版爬虫输出才有这一列
+}
 
-# 1转为int
 # 需要转换为整数的列
 num_cols = ['播放量', '点赞数', '投币数', '收藏数', '分享数',
             'UP主粉丝数', '视频评论数', '视频弹幕数']
 
-# 批量转换
-for col in num_cols:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('int64')
+# 定义正常值范围
+value_ranges = {
+    '播放量': (1000, 100000000),      # 播放量在1000到一亿之间
+    '点赞数': (0, 7000000),         # 点赞数在0到700万之间
+    '投币数': (0, 7000000),          # 投币数在0到700万之间
+    '收藏数': (0, 4000000),         # 收藏数在0到400万之间
+    '分享数': (0, 7000000)            # 分享数在0到700万之间
+}
+
+
+def new_state(chunked=False):
+    """流水线状态：各阶段累计的统计信息（跨数据块）；chunked=True 时为每列建一个布隆过滤器"""
+    return {
+        'rows': 0,
+        'missing': {},                       # 列 -> 缺失个数（NaN 和 "-"）
+        'outliers': {col: [0, 0] for col in value_ranges},  # 列 -> [过低, 过高]
+        'medians': {},                       # 异常值替换用的中位数
+        'seen': {col: DuplicateFilter() if chunked else None for col in ('视频链接', '视频标题')},
+        'duplicates': {'视频链接': 0, '视频标题': 0},
+    }
 
 
-# 2缺失值处理
+# ================== 阶段0: 重复值检查（只统计） ==================
+class DuplicateFilter:
+    """
+    跨数据块的“之前见过没有”：固定大小的布隆过滤器，内存不随行数增长。
+    没见过的值可能被误判为见过（重复数偏多），见过的值不会漏判；
+    false_positives 为误判个数的期望值（按当时的填充率估计）
+    """
 
-print("=== 缺失值检测 ===")
-# 检测缺失值（包括NaN和"-"）
+    def __init__(self, bits=DUP_FILTER_BITS, hashes=DUP_FILTER_HASHES):
+        self.bits = np.zeros(bits // 8, dtype=np.uint8)
+        self.size = bits
+        self.hashes = hashes
+        self.inserted = 0
+        self.false_positives = 0.0
+
+    def _positions(self, values):
+        h = pd.util.hash_array(values)
+        step = (h >> np.uint64(32)) | np.uint64(1)      # 双重哈希：h + i * step
+        mask = np.uint64(self.size - 1)
+        return [(h + np.uint64(i) * step) & mask for i in range(self.hashes)]
+
+    def check_and_add(self, values):
+        """values（互不相同）中之前见过的为 True，然后把它们都加入过滤器"""
+        values = np.asarray(values, dtype=object)
+        if not len(values):
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(values)
+        seen = np.ones(len(values), dtype=bool)
+        for p in positions:
+            seen &= ((self.bits[p >> np.uint64(3)] >> (p & np.uint64(7)).astype(np.uint8)) & 1).astype(bool)
+        fill = 1 - np.exp(-self.hashes * self.inserted / self.size)
+        self.false_positives += len(values) * fill ** self.hashes
+        for p in positions:
+            np.bitwise_or.at(self.bits, p >> np.uint64(3),
+                             np.left_shift(1, (p & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        self.inserted += int((~seen).sum())
+        return seen
+
+
+def check_duplicates(chunk, state):
+    """链接 / 标题重复统计：块内精确，跨数据块用布隆过滤器（整个文件一次处理时没有跨块部分）"""
+    for col, seen in state['seen'].items():
+        if col not in chunk.columns:
+            continue
+        values = chunk[col].dropna()
+        dup_in_chunk = values.duplicated()
+        state['duplicates'][col] += int(dup_in_chunk.sum())
+        if seen is not None:
+            state['duplicates'][col] += int(seen.check_and_add(values[~dup_in_chunk].to_numpy(object)).sum())
+    return chunk
+
+
+# ================== 阶段1: 数值列转为int ==================
+def coerce_numeric(chunk, state):
+    for col in num_cols:
+        if col in chunk.columns:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').fillna(0).astype('int64')
+    return chunk
+
+
+# ================== 阶段2: 缺失值处理 ==================
 def check_missing(column):
+    """检测缺失值（包括NaN和"-"）"""
     nan_count = column.isnull().sum()
     dash_count = (column == '-').sum()
     return nan_count + dash_count
 
-for col in df.columns:
-    missing_count = check_missing(df[col])
-    if missing_count > 0:
-        print(f"{col}: {missing_count} 个缺失值")
-
-print(f"\n视频简介具体缺失: {check_missing(df['视频简介'])} 个")
-
-# 处理缺失值
-print("\n=== 处理缺失值 ===")
-df['视频简介'] = df['视频简介'].replace('-', '')  # 将"-"替换为空字符串
-df['视频简介'] = df['视频简介'].fillna('')       # 将NaN替换为空字符串
-
-print("处理完成！")
-print(f"处理后视频简介缺失值: {check_missing(df['视频简介'])} 个")
 
+def fill_missing(chunk, state):
+    for col in chunk.columns:
+        missing_count = int(check_missing(chunk[col]))
+        if missing_count > 0:
+            state['missing'][col] = state['missing'].get(col, 0) + missing_count
 
-# 3时间处理
-import pandas as pd
-from datetime import datetime
-
-# 读取CSV文件
-df = pd.read_csv('video_info_complete.csv', encoding='utf-8-sig')
-
-# 将“发布时间”列转换为datetime类型
-df['发布时间'] = pd.to_datetime(df['发布时间'], format='%Y/%m/%d %H:%M', errors='coerce')
-
-# 拆分日期和时间
-df['发布日期'] = df['发布时间'].dt.date
-df['发布时间'] = df['发布时间'].dt.time
-
-# 将日期列转换回datetime以提取星期几
-df['发布日期_dt'] = pd.to_datetime(df['发布日期'])
-
-# 添加星期几列（中文）
-df['星期几'] = df['发布日期_dt'].dt.day_name()
-weekday_map = {
-    'Monday': '星期一',
-    'Tuesday': '星期二',
-    'Wednesday': '星期三',
-    'Thursday': '星期四',
-    'Friday': '星期五',
-    'Saturday': '星期六',
-    'Sunday': '星期日'
-}
-df['星期几'] = df['星期几'].map(weekday_map)
-
-# 删除临时列
-df = df.drop(columns=['发布日期_dt'])
-
-# 重排列顺序，将新列放在“发布时间”附近
-cols = df.columns.tolist()
-pub_index = cols.index('发布时间')  # 找到原“发布时间”索引
-cols = cols[:pub_index] + ['发布日期', '发布时间', '星期几'] + cols[pub_index+1:-1]  # 移除原发布时间并插入新列
-
-# 重新整理列顺序
-df = df[cols]
+    chunk['视频简介'] = chunk['视频简介'].replace('-', '')  # 将"-"替换为空字符串
+    chunk['视频简介'] = chunk['视频简介'].fillna('')       # 将NaN替换为空字符串
+    return chunk
 
-# 直接保存到原文件（覆盖）
-df.to_csv('video_info_complete.csv', index=False, encoding='utf-8-sig')
 
-print("处理完成！已直接保存到原文件 'video_info_complete.csv'")
-print(df.head())
+# ================== 阶段3: 时间处理 ==================
+def split_publish_time(chunk, state):
+    """把“发布时间”拆成 发布日期 / 发布时间（时分秒）/ 星期几，放在原“发布时间”的位置"""
+    parts = time_parts(chunk['发布时间'])
 
+    cols = chunk.columns.tolist()
+    pub_index = cols.index('发布时间')
+    chunk['发布日期'] = parts['发布日期'].dt.date
+    chunk['发布时间'] = parts['发布时间_dt'].dt.time
+    chunk['星期几'] = parts['星期几']
 
-# 4异常值处理
+    cols = cols[:pub_index] + ['发布日期', '发布时间', '星期几'] + cols[pub_index + 1:]
+    return chunk[cols]
 
 
-print("开始异常值检测与处理")
-
-# 定义正常值范围
-value_ranges = {
-    '播放量': (1000, 100000000),      # 播放量在1000到一亿之间
-    '点赞数': (0, 7000000),         # 点赞数在0到700万之间
-    '投币数': (0, 7000000),          # 投币数在0到700万之间
-    '收藏数': (0, 4000000),         # 收藏数在0到400万之间
-    '分享数': (0, 7000000)            # 分享数在0到700万之间
-}
-
-# 检测和处理异常值
-print("=== 异常值检测 ===")
-for column, (min_val, max_val) in value_ranges.items():
-    # 检测异常值
-    too_low = (df[column] < min_val).sum()
-    too_high = (df[column] > max_val).sum()
-    total_outliers = too_low + too_high
-    
-    print(f"{column}:")
-    print(f"  低于{min_val}: {too_low} 个")
-    print(f"  高于{max_val}: {too_high} 个")
-    print(f"  总计异常: {total_outliers} 个")
-    
-    # 处理异常值 - 用中位数替换
-    if total_outliers > 0:
-        median_value = df[column].median()
-        # 创建掩码标识异常值
-        outlier_mask = (df[column] < min_val) | (df[column] > max_val)
-        # 用中位数替换异常值
-        df.loc[outlier_mask, column] = median_value
-        print(f"  已用中位数({median_value})替换异常值")
-
-print("\n异常值处理完成")
-
-# 5. 重复值检查（极简版）
-import pandas as pd
+# ================== 阶段4: 异常值处理 ==================
+class MedianHistogram:
+    """
+    流式中位数：对数分桶（每桶相对宽度 MEDIAN_REL_WIDTH），记录每桶个数和总和，内存固定；
+    结果为中位数所在桶的平均值，相对误差不超过桶宽（小于约1000的整数每桶至多一个，结果精确）。
+    负数（本身就是异常值）按0计
+    """
 
-def quick_duplicate_check(file="video_info_complete.csv"):
+    def __init__(self, rel_width=MEDIAN_REL_WIDTH, max_value=MEDIAN_MAX):
+        self.log_step = np.log1p(rel_width)
+        n_bins = int(np.ceil(np.log(max_value) / self.log_step)) + 2    # 第0桶放 ≤0 的值
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.sums = np.zeros(n_bins, dtype=np.float64)
+
+    def add(self, values):
+        values = np.maximum(np.asarray(values, dtype=np.float64), 0)
+        bins = np.zeros(len(values), dtype=np.int64)
+        positive = values >= 1
+        bins[positive] = np.minimum(np.log(values[positive]) / self.log_step + 1,
+                                    len(self.counts) - 1).astype(np.int64)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        self.sums += np.bincount(bins, weights=values, minlength=len(self.counts))
+
+    def median(self):
+        n = int(self.counts.sum())
+        if n == 0:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        # 与 np.median 一致：偶数个时取中间两个的平均
+        middle = [np.searchsorted(cumulative, rank, side='right') for rank in ((n - 1) // 2, n // 2)]
+        return float(np.mean([self.sums[b] / self.counts[b] for b in middle]))
+
+
+def compute_medians(file_name, chunksize=None):
+    """
+    异常值用全量中位数替换；流式处理时先单独扫描一遍这几列（只读数值列），
+    用固定大小的直方图求中位数（见 MedianHistogram）
+    """
+    columns = list(value_ranges)
+    histograms = {col: MedianHistogram() for col in columns}
+    reader = pd.read_csv(file_name, encoding='utf-8-sig', usecols=columns,
+                         dtype='string', chunksize=chunksize or 1000000)
+    for chunk in reader:
+        for col in columns:
+            histograms[col].add(pd.to_numeric(chunk[col], errors='coerce').fillna(0).to_numpy('int64'))
+    return {col: hist.median() for col, hist in histograms.items()}
+
+
+def replace_outliers(chunk, state):
+    """超出正常范围的值用中位数替换"""
+    for column, (min_val, max_val) in value_ranges.items():
+        too_low = chunk[column] < min_val
+        too_high = chunk[column] > max_val
+        state['outliers'][column][0] += int(too_low.sum())
+        state['outliers'][column][1] += int(too_high.sum())
+
+        outlier_mask = too_low | too_high
+        if outlier_mask.any():
+            # 保持整数类型
+            chunk.loc[outlier_mask, column] = int(round(state['medians'][column]))
+    return chunk
+
+
+STAGES = [check_duplicates, coerce_numeric, fill_missing, split_publish_time, replace_outliers]
+
+
+def run_stages(chunk, state, stages=STAGES):
+    for stage in stages:
+        with telemetry.span('stage', stage=stage.__name__) as span:
+            span.set(rows=len(chunk))
+            chunk = stage(chunk, state)
+    state['rows'] += len(chunk)
+    return chunk
+
+
+def print_report(state):
+    print("=== 缺失值检测 ===")
+    for col, count in state['missing'].items():
+        print(f"{col}: {count} 个缺失值")
+    print(f"\n视频简介具体缺失: {state['missing'].get('视频简介', 0)} 个（已替换为空字符串）")
+
+    print("\n=== 异常值检测 ===")
+    for column, (min_val, max_val) in value_ranges.items():
+        too_low, too_high = state['outliers'][column]
+        print(f"{column}:")
+        print(f"  低于{min_val}: {too_low} 个")
+        print(f"  高于{max_val}: {too_high} 个")
+        print(f"  总计异常: {too_low + too_high} 个")
+        if too_low + too_high > 0:
+            print(f"  已用中位数({state['medians'][column]})替换异常值")
+
+    print("\n=== 重复值检查 ===")
+    print(f"✓ 链接重复: {state['duplicates']['视频链接']}")
+    print(f"✓ 标题重复: {state['duplicates']['视频标题']}")
+    bound = sum(f.false_positives for f in state['seen'].values() if f is not None)
+    if bound >= 0.5:
+        print(f"  （分块处理时跨块重复由布隆过滤器判断，可能多计约 {bound:.0f} 个）")
+
+
+def clean_file(file_name="video_info_complete.csv", output_filename='bilibili_food_cleaned_final.csv',
+               chunksize=None, stages=STAGES):
     """
-    快速重复检查
+    清洗流水线入口
+    chunksize=None: 整个文件读入一次后处理；
+    chunksize=N: 每次处理N行并追加写出，内存占用只与N有关
     """
-    print("=== 重复值检查 ===")
-    
-    try:
-        # 读取数据
-        df = pd.read_csv(file, encoding='utf-8-sig')
-    except:
-        df = pd.read_csv(file, encoding='gbk')
-    
-    # 检查重复
-    results = []
-    if '视频链接' in df.columns:
-        link_dup = df['视频链接'].duplicated().sum()
-        results.append(f"链接重复: {link_dup}")
-    
-    if '视频标题' in df.columns:
-        title_dup = df['视频标题'].duplicated().sum()
-        results.append(f"标题重复: {title_dup}")
-    
-    # 输出结果
-    for r in results:
-        print(f"✓ {r}")
-    
-    print("检查完成")
-    return df
-
-# 使用
-# quick_duplicate_check()
-
-
-
-# 7. 另存为新文件
-output_filename = 'bilibili_food_cleaned_final.csv'
-df.to_csv(output_filename, index=False, encoding='utf-8-sig')
-
-print(f"处理完成！已保存为 '{output_filename}'")
-print(f"文件保存在: {os.path.abspath(output_filename)}")
-print("\n前几行数据预览:")
-print(df.head())
\ No newline at end of file
+    if os.path.abspath(file_name) == os.path.abspath(output_filename):
+        raise ValueError("输出文件不能与原始输入相同")
+
+    state = new_state(chunked=chunksize is not None)
+    if chunksize is None:
+        with telemetry.span('stage', stage='read_csv'):
+            df = pd.read_csv(file_name, encoding='utf-8-sig', dtype=RAW_DTYPES)
+        with telemetry.span('stage', stage='compute_medians'):
+            numeric = coerce_numeric(df[list(value_ranges)].copy(), state)
+            state['medians'] = {col: float(numeric[col].median()) for col in value_ranges}
+        chunks = iter([df])
+    else:
+        with telemetry.span('stage', stage='compute_medians'):
+            state['medians'] = compute_medians(file_name, chunksize)
+        chunks = pd.read_csv(file_name, encoding='utf-8-sig', dtype=RAW_DTYPES, chunksize=chunksize)
+
+    tmp_name = output_filename + '.tmp'
+    first = True
+    while True:
+        # 分块读取时，读下一块的耗时单独计入 read_csv
+        with telemetry.span('stage', stage='read_csv'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        cleaned = run_stages(chunk, state, stages)
+        with telemetry.span('stage', stage='write_csv'):
+            cleaned.to_csv(tmp_name, mode='w' if first else 'a', header=first,
+                           index=False, encoding='utf-8-sig' if first else 'utf-8')
+        first = False
+    os.replace(tmp_name, output_filename)
+
+    print_report(state)
+    print(f"\n处理完成！共 {state['rows']} 行，已保存为 '{output_filename}'")
+    print(f"文件保存在: {os.path.abspath(output_filename)}")
+    return state
+
+
+if __name__ == '__main__':
+    src = sys.argv[1] if len(sys.argv) > 1 else "video_info_complete.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else 'bilibili_food_cleaned_final.csv'
+    size = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    with telemetry.run('clean'):
+        clean_file(src, dst, size)
+    print("\n前几行数据预览:")
+    print(pd.read_csv(dst, encoding='utf-8-sig', nrows=5))
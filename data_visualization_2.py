@@ -12,10 +12,21 @@ B站美食视频数据可视化分析
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+import os
 import re
+import sys
 import warnings
+import agg_cube
+import feature_store
+import keyword_tagger
+import tag_vocab
+import time_parsing
+from agg_cube import DURATION_LABELS, cached_cube
+from feature_store import FeatureStore
+from keyword_tagger import LabelMatrix
+from render_scheduler import Chart, render_charts
+import telemetry
 warnings.filterwarnings('ignore')
 
 # 设置中文字体
@@ -35,58 +46,46 @@ def format_wan_detail(x, pos):
         return f'{x/10000:.1f}万'
     return f'{x:.0f}'
 
-# 读取数据
-df = pd.read_csv('video_info_complete.csv')
+# 读取数据：派生列（时长、发布时间、互动、关键词标签）由特征层按需计算，
+# 并按源文件内容哈希缓存在 feature_cache/，数据没变时重复运行不再重新解析/打标
+store = FeatureStore('video_info_complete.csv')
 
-# 数据预处理
-def parse_duration(duration_str):
-    """解析视频时长，返回秒数"""
-    if pd.isna(duration_str) or duration_str == '-':
-        return None
-    try:
-        parts = str(duration_str).split(':')
-        if len(parts) == 3:
-            return int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
-        elif len(parts) == 2:
-            return int(parts[0]) * 60 + int(parts[1])
-        else:
-            return int(parts[0])
-    except:
-        return None
+def get_labels():
+    """返回标题+标签的打标结果（LabelMatrix），来自特征层"""
+    return LabelMatrix.from_frame(store.group('labels'))
 
-def parse_datetime(dt_str):
-    """解析发布时间"""
-    try:
-        return pd.to_datetime(dt_str)
-    except:
-        return None
+_cube = None
 
-# 解析时长
-df['时长_秒'] = df['视频时长'].apply(parse_duration)
-df['发布时间_dt'] = df['发布时间'].apply(parse_datetime)
-df['发布小时'] = df['发布时间_dt'].dt.hour
-df['发布星期'] = df['发布时间_dt'].dt.dayofweek  # 0=周一
+def get_cube():
+    """
+    星期 × 小时 × 时长档 × 类别 × 封面类型 的预聚合立方体，图表直接从中切片；
+    存盘在 feature_cache/（主进程先建好，渲染进程直接读取），数据只追加了新行时只累加新行
+    """
+    global _cube
+    if _cube is None:
+        path = os.path.join(store.cache_dir, f"{store.cache_prefix}.cube.npz")
+        identity = '|'.join(store.cache_key(name) for name in ('time', 'engagement', 'labels'))
+        _cube = cached_cube(path, identity,
+                            lambda: store.frame('发布小时', '发布星期', '时长_秒', '互动率', '封面类型'))
+    return _cube
 
-# 计算互动指标
-df['总互动'] = df['点赞数'] + df['投币数'] + df['收藏数'] + df['分享数']
-df['互动率'] = df['总互动'] / df['播放量'] * 100
+def __getattr__(name):
+    # 兼容旧用法 `from data_visualization_2 import df`：返回带全部派生列的数据
+    if name == 'df':
+        return store.frame('时长_秒', '发布时间_dt', '发布小时', '发布星期', '总互动', '互动率')
+    raise AttributeError(name)
 
 # ================== 图1: 时间热力图 ==================
 def plot_time_heatmap():
     """什么时候发最容易火 - 时间热力图"""
+    import seaborn as sns   # 只有这张图用到（导入约0.5秒，连带 scipy），不在模块导入时加载
     fig, ax = plt.subplots(figsize=(14, 8))
     
-    # 创建星期-小时的透视表，使用平均播放量
-    heatmap_data = df.pivot_table(
-        values='播放量', 
-        index='发布星期', 
-        columns='发布小时', 
-        aggfunc='mean'
-    )
+    # 星期-小时的平均播放量，从预聚合立方体切片（没有视频的星期去掉）
+    heatmap_data = get_cube().pivot('播放量', '发布星期', '发布小时').dropna(how='all')
     
-    # 重新索引以包含所有小时
-    all_hours = list(range(24))
-    heatmap_data = heatmap_data.reindex(columns=all_hours, fill_value=0)
+    # 包含所有小时：整列没有视频的小时填0
+    heatmap_data.loc[:, heatmap_data.isna().all()] = 0
     
     # 星期标签
     weekday_labels = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
@@ -116,30 +115,15 @@ def plot_time_heatmap():
 # ================== 图2: Top地区柱状图 ==================
 def plot_region_bar():
     """哪些地方美食最受欢迎 - Top地区柱状图"""
+    df = store.raw
     fig, ax = plt.subplots(figsize=(14, 8))
     
-    # 定义地区关键词
-    regions = {
-        '东北': ['东北', '沈阳', '哈尔滨', '长春', '大连', '齐齐哈尔'],
-        '四川': ['四川', '成都', '重庆', '川菜', '火锅'],
-        '广东': ['广东', '广州', '深圳', '潮汕', '粤菜', '佛山'],
-        '上海': ['上海'],
-        '北京': ['北京'],
-        '云南': ['云南', '滇'],
-        '新疆': ['新疆', '阿克苏'],
-        '西安/陕西': ['西安', '陕西'],
-        '日本': ['日本', '大阪'],
-        '海外其他': ['芬兰', '丹麦', '美国', '西班牙', '俄罗斯', '泰国', '秘鲁', '中东', '卡塔尔'],
-        '广西': ['广西', '玉林', '螺蛳粉'],
-        '河南': ['河南', '洛阳'],
-        '宁夏': ['宁夏', '辣糊糊'],
-    }
-    
+    # 地区关键词见 keyword_config.json，标题和标签只扫描一次
+    labels = get_labels()
     region_stats = {}
     
-    for region, keywords in regions.items():
-        mask = df['视频标题'].str.contains('|'.join(keywords), case=False, na=False) | \
-               df['标签'].str.contains('|'.join(keywords), case=False, na=False)
+    for region in labels.group_labels('region'):
+        mask = labels.mask('region', region)
         count = mask.sum()
         if count > 0:
             avg_play = df.loc[mask, '播放量'].mean()
@@ -177,17 +161,10 @@ def plot_region_bar():
 # ================== 图3: 文化输出气泡散点图 ==================
 def plot_culture_bubble():
     """是否存在文化输出 - 气泡散点图"""
+    # 文化输出标记（关键词见 keyword_config.json）由特征层提供
+    df = store.frame('总互动', '文化输出')
     fig, ax = plt.subplots(figsize=(14, 10))
     
-    # 定义文化输出相关关键词
-    culture_keywords = ['文化输出', '老外', '外国人', '海外', '芬兰', '丹麦', '美国', '西班牙', 
-                       '俄罗斯', '日本美食', '泰国', '秘鲁', '中东', '外国人吃', '外国人做中餐',
-                       '外国人在中国', '中国美食', '在中国']
-    
-    # 标记文化输出相关视频
-    df['文化输出'] = df['视频标题'].str.contains('|'.join(culture_keywords), case=False, na=False) | \
-                     df['标签'].str.contains('|'.join(culture_keywords), case=False, na=False)
-    
     # 准备绘图数据
     scatter_df = df[['播放量', '总互动', '点赞数', '文化输出', '视频标题']].dropna()
     
@@ -239,27 +216,10 @@ def plot_duration_pie():
     """视频时长分布 - 饼图"""
     fig, ax = plt.subplots(figsize=(10, 8))
     
-    # 过滤有效时长数据
-    valid_df = df[df['时长_秒'].notna()].copy()
-    
-    # 将视频分为短、中、长
-    def categorize_duration(seconds):
-        if seconds <= 60:
-            return '短视频\n(≤1分钟)'
-        elif seconds <= 300:
-            return '中等视频\n(1-5分钟)'
-        elif seconds <= 600:
-            return '较长视频\n(5-10分钟)'
-        else:
-            return '长视频\n(>10分钟)'
-    
-    valid_df['时长类别'] = valid_df['时长_秒'].apply(categorize_duration)
-    
-    # 定义顺序和颜色
-    order = ['短视频\n(≤1分钟)', '中等视频\n(1-5分钟)', '较长视频\n(5-10分钟)', '长视频\n(>10分钟)']
+    # 短/中/长视频数量（时长档见 agg_cube.DURATION_LABELS，时长缺失的不计入），从预聚合立方体读取
     colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
-    pie_labels = ['短视频(≤1分钟)', '中等视频(1-5分钟)', '较长视频(5-10分钟)', '长视频(>10分钟)']
-    pie_counts = [len(valid_df[valid_df['时长类别']==cat]) for cat in order]
+    pie_labels = list(DURATION_LABELS)
+    pie_counts = get_cube().counts('时长档').reindex(pie_labels).tolist()
     
     # 计算百分比
     total = sum(pie_counts)
@@ -299,44 +259,17 @@ def plot_duration_pie():
 # ================== 图5: 封面类型分类柱状图 ==================
 def plot_cover_bar():
     """哪种封面更强 - 分类柱状图（简化版，只展示播放量和互动率）"""
+    # 根据视频标题和标签推断封面类型（按 keyword_config.json 中的顺序取第一个命中的类型，由特征层提供）
     fig, axes = plt.subplots(1, 2, figsize=(16, 8))
     
-    # 根据视频标题和标签推断封面类型
-    def classify_cover(row):
-        title = str(row['视频标题']).lower()
-        tags = str(row['标签']).lower()
-        combined = title + ' ' + tags
-        
-        # 人物类
-        if any(word in combined for word in ['博主', 'up主', '美女', '帅哥', '小姐姐', '小哥哥', '闺蜜', '老公', '老婆']):
-            return '人物出镜'
-        # 美食特写
-        elif any(word in combined for word in ['美食', '吃货', '干饭', '美味', '好吃', '香', '味']):
-            return '美食特写'
-        # 探店类
-        elif any(word in combined for word in ['探店', '餐厅', '饭店', '路边摊', '夜市', '摆摊']):
-            return '探店场景'
-        # 教程类
-        elif any(word in combined for word in ['教程', '做法', '制作', '厨艺', '烹饪', '炒', '煮', '烤']):
-            return '制作教程'
-        # 挑战类
-        elif any(word in combined for word in ['挑战', '测评', '试吃', '评测']):
-            return '挑战测评'
-        # Vlog类
-        elif any(word in combined for word in ['vlog', '日常', '记录', '生活']):
-            return '日常Vlog'
-        else:
-            return '其他类型'
-    
-    df['封面类型'] = df.apply(classify_cover, axis=1)
-    
-    # 统计每种封面类型的数据
-    cover_stats = df.groupby('封面类型').agg({
-        '播放量': ['mean', 'count'],
-        '互动率': 'mean',
-        '点赞数': 'mean'
+    # 统计每种封面类型的数据（从预聚合立方体切片）
+    stats = get_cube().table(['封面类型'], ['播放量', '互动率', '点赞数'])
+    cover_stats = pd.DataFrame({
+        '平均播放量': stats[('播放量', '平均值')],
+        '视频数量': stats[('播放量', '个数')],
+        '平均互动率': stats[('互动率', '平均值')],
+        '平均点赞数': stats[('点赞数', '平均值')],
     }).round(0)
-    cover_stats.columns = ['平均播放量', '视频数量', '平均互动率', '平均点赞数']
     cover_stats = cover_stats.sort_values('平均播放量', ascending=True)
     
     # 定义颜色
@@ -381,21 +314,35 @@ def plot_cover_bar():
     plt.close()
     print("图5 封面类型柱状图 已保存")
 
+# ================== 图表清单：输出文件 + 输入列（特征组名表示整组）+ 代码依赖 ==================
+# 依赖模块的源码计入图表哈希：特征层 / 打标 / 立方体的实现改了，相关图表也会重新渲染
+FEATURE_DEPS = [feature_store, keyword_tagger, time_parsing]
+CUBE_DEPS = FEATURE_DEPS + [agg_cube, tag_vocab]
+
+CHARTS = [
+    Chart(plot_time_heatmap, '1_时间热力图.png', ['播放量', '发布小时', '发布星期'], deps=CUBE_DEPS),
+    Chart(plot_region_bar, '2_地区柱状图.png', ['播放量', 'labels'], deps=FEATURE_DEPS),
+    Chart(plot_culture_bubble, '3_文化输出气泡图.png', ['播放量', '总互动', '点赞数', '视频标题', '文化输出'],
+          deps=FEATURE_DEPS),
+    Chart(plot_duration_pie, '4b_视频时长饼图.png', ['时长_秒'], deps=CUBE_DEPS),
+    Chart(plot_cover_bar, '5_封面类型柱状图.png', ['播放量', '互动率', '点赞数', '封面类型'], deps=CUBE_DEPS),
+]
+
 # ================== 执行所有绑图 ==================
 if __name__ == '__main__':
     print("="*50)
     print("B站美食视频数据可视化分析")
     print("="*50)
     
-    print(f"\n📊 数据概览: 共 {len(df)} 条视频记录\n")
+    print(f"\n📊 数据概览: 共 {len(store.raw)} 条视频记录\n")
     
-    # 生成所有图表
-    plot_time_heatmap()
-    plot_region_bar()
-    plot_culture_bubble()
-    plot_duration_boxplot()
-    plot_duration_pie()
-    plot_cover_bar()
+    # 生成所有图表：输入和代码都没变的图跳过，其余在进程池中并行渲染（清单见 render_manifest.json）
+    # 设置环境变量 BILI_METRICS=metrics/ 时另外输出各阶段 / 各图耗时（见 telemetry.py）
+    with telemetry.run('charts'):
+        with telemetry.span('stage', stage='cube'):
+            get_cube()     # 在主进程建好并存盘，渲染进程直接读取，不再各自从全部数据重建
+        render_charts(CHARTS, store, force='--force' in sys.argv)
+    store.report()
     
     print("\n" + "="*50)
     print("🎉 所有图表已生成完成！")
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+派生特征层（可视化用）
+- 派生列按组注册（时间 / 互动 / 关键词标签），第一次用到某一列时才计算所在的组
+- 计算结果以 Parquet 列式文件缓存在 feature_cache/ 下，缓存键 = 源文件内容哈希
+  + 特征组版本 + 依赖文件（如 keyword_config.json）的内容哈希；
+  数据没变时重新画图直接读缓存，不再解析时间、不再关键词打标
+- 同一进程内结果再放在内存里，多张图共用
+- 用法：
+    store = FeatureStore('video_info_complete.csv')
+    df = store.frame('发布小时', '发布星期')   # 原始列 + 需要的派生列（副本，可随意修改）
+    store.report()
+"""
+
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+import telemetry
+from keyword_tagger import CONFIG_FILE, KeywordTagger
+from time_parsing import parse_duration_seconds, time_parts
+
+CACHE_DIR = "feature_cache"
+
+
+def file_hash(path, block_size=1 << 20):
+    """文件内容的 sha256（前16位），分块读取"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+# ================== 特征组定义 ==================
+def compute_time(raw):
+    times = time_parts(raw['发布时间'])
+    return pd.DataFrame({
+        '时长_秒': parse_duration_seconds(raw['视频时长']),
+        '发布时间_dt': times['发布时间_dt'],
+        '发布小时': times['发布小时'],
+        '发布星期': times['发布星期'],  # 0=周一
+    })
+
+
+def compute_engagement(raw):
+    total = raw['点赞数'] + raw['投币数'] + raw['收藏数'] + raw['分享数']
+    return pd.DataFrame({'总互动': total, '互动率': total / raw['播放量'] * 100})
+
+
+def compute_labels(raw):
+    """关键词打标矩阵（列名 '分组:标签'）+ 文化输出 / 封面类型 两列汇总"""
+    labels = KeywordTagger.from_config().tag_frame(raw)
+    frame = labels.to_frame()
+    frame['文化输出'] = labels.any('culture')
+    frame['封面类型'] = labels.first('content_type')
+    return frame
+
+
+# 组名 -> 计算函数 / 版本（改了计算逻辑就加1，旧缓存自动失效）/ 依赖的其他文件
+FEATURES = {
+    'time': {'compute': compute_time, 'version': 1, 'depends': [],
+             'columns': ['时长_秒', '发布时间_dt', '发布小时', '发布星期']},
+    'engagement': {'compute': compute_engagement, 'version': 1, 'depends': [],
+                   'columns': ['总互动', '互动率']},
+    'labels': {'compute': compute_labels, 'version': 1, 'depends': [CONFIG_FILE],
+               'columns': ['文化输出', '封面类型']},
+}
+
+
+class FeatureStore:
+    def __init__(self, source, features=FEATURES, cache_dir=CACHE_DIR, read_csv_kw=None):
+        self.source = source
+        self.features = features
+        self.cache_dir = cache_dir
+        self.read_csv_kw = read_csv_kw or {}
+        self._raw = None
+        self._source_hash = None
+        self._groups = {}
+        self.counters = {'memo': 0, 'cache_hit': 0, 'computed': 0}
+
+    @property
+    def raw(self):
+        """原始CSV，只读取一次"""
+        if self._raw is None:
+            self._raw = pd.read_csv(self.source, **self.read_csv_kw)
+        return self._raw
+
+    @property
+    def source_hash(self):
+        if self._source_hash is None:
+            self._source_hash = file_hash(self.source)
+        return self._source_hash
+
+    def group_of(self, column):
+        for name, spec in self.features.items():
+            if column in spec['columns']:
+                return name
+        return None
+
+    def cache_key(self, name):
+        spec = self.features[name]
+        parts = [self.source_hash, f"v{spec['version']}"] + [file_hash(p) for p in spec['depends']]
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:16]
+
+    @property
+    def cache_prefix(self):
+        """缓存文件名前缀：源文件名 + 源文件绝对路径的哈希（不同目录下的同名文件互不干扰）"""
+        stem = os.path.splitext(os.path.basename(self.source))[0]
+        path_hash = hashlib.sha256(os.path.abspath(self.source).encode('utf-8')).hexdigest()[:8]
+        return f"{stem}-{path_hash}"
+
+    def cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{self.cache_prefix}.{name}.{self.cache_key(name)}.parquet")
+
+    def group(self, name):
+        """取一个特征组（DataFrame，索引与原始数据一致）：内存 -> 缓存文件 -> 计算"""
+        if name in self._groups:
+            self.counters['memo'] += 1
+            return self._groups[name]
+
+        path = self.cache_path(name)
+        frame = None
+        with telemetry.span('feature_group', group=name) as span:
+            if os.path.exists(path):
+                try:
+                    frame = pd.read_parquet(path)
+                    self.counters['cache_hit'] += 1
+                    span.set(source='cache')
+                except Exception as e:
+                    print(f"特征缓存读取失败，重新计算: {path} {e}")
+            if frame is None:
+                frame = self.features[name]['compute'](self.raw)
+                self.counters['computed'] += 1
+                self.save(name, frame, path)
+                span.set(source='computed')
+        frame.index = self.raw.index
+        self._groups[name] = frame
+        return frame
+
+    def save(self, name, frame, path):
+        """写入新缓存（临时文件 + 原子重命名），并删除同一源文件该组的旧缓存"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            frame.to_parquet(path + '.tmp', index=False)
+        except ImportError as e:
+            print(f"未安装 pyarrow，特征不做持久化缓存: {e}")
+            return
+        os.replace(path + '.tmp', path)
+        pattern = f"{glob.escape(self.cache_prefix)}.{name}.*.parquet"
+        for old in glob.glob(os.path.join(glob.escape(self.cache_dir), pattern)):
+            if old != path:
+                os.remove(old)
+
+    def column(self, column):
+        name = self.group_of(column)
+        if name is None:
+            return self.raw[column]
+        return self.group(name)[column]
+
+    def select(self, names):
+        """
+        按名称取数据（用于计算图表输入的哈希）：名称可以是原始列、派生列或特征组名（取整组）
+        """
+        parts = []
+        for name in names:
+            if name in self.features:
+                parts.append(self.group(name))
+            else:
+                parts.append(self.column(name).rename(name).to_frame())
+        return pd.concat(parts, axis=1)
+
+    def frame(self, *columns):
+        """原始列 + 指定的派生列，返回副本（画图函数可以随意加列，不影响其他图）"""
+        df = self.raw.copy()
+        for column in columns:
+            df[column] = self.column(column)
+        return df
+
+    def report(self):
+        c = self.counters
+        print(f"特征层: 内存命中 {c['memo']} 次, 缓存命中 {c['cache_hit']} 组, 重新计算 {c['computed']} 组")
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+关键词打标：地区 / 文化输出 / 内容类型一次完成
+- 所有关键词编译进一个 Aho-Corasick 自动机，每条 标题+标签 文本只扫描一次，
+  同时得到所有分组的标签（代替 13 个地区 × 2 列的 str.contains 和逐行 apply）
+- 相同文本只扫描一次（factorize 去重）
+- 关键词词典从 keyword_config.json 读取
+- 安装了 pyahocorasick 时使用其C实现，否则使用内置的纯Python自动机
+"""
+
+import json
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+CONFIG_FILE = "keyword_config.json"
+DEFAULT_CONTENT_TYPE = '其他类型'
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def load_keyword_config(path=CONFIG_FILE):
+    """读取关键词词典：{分组: {标签: [关键词, ...]}}"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Automaton:
+    """纯Python Aho-Corasick 自动机；输出为命中的标签编号集合"""
+
+    def __init__(self, keyword_labels):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for keyword, label_ids in keyword_labels.items():
+            state = 0
+            for ch in keyword:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state] |= set(label_ids)
+
+        # 广度优先构建失败指针，并把失败链上的输出合并进来
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] |= self.output[self.fail[nxt]]
+        self.output = [frozenset(o) for o in self.output]
+
+    def scan(self, text):
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        found = set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class CAutomaton:
+    """pyahocorasick 版本，接口与 Automaton 相同"""
+
+    def __init__(self, keyword_labels):
+        self.automaton = ahocorasick.Automaton()
+        for keyword, label_ids in keyword_labels.items():
+            self.automaton.add_word(keyword, frozenset(label_ids))
+        self.automaton.make_automaton()
+
+    def scan(self, text):
+        found = set()
+        for _, label_ids in self.automaton.iter(text):
+            found |= label_ids
+        return found
+
+
+class LabelMatrix:
+    """
+    打标结果：matrix 为 (视频数 × 标签数) 的布尔矩阵，labels 为 [(分组, 标签), ...]
+    """
+
+    def __init__(self, matrix, labels, index):
+        self.matrix = matrix
+        self.labels = labels
+        self.index = index
+        self.columns = {label: i for i, label in enumerate(labels)}
+
+    def group_labels(self, group):
+        return [label for g, label in self.labels if g == group]
+
+    def mask(self, group, label):
+        """某个标签的布尔 Series"""
+        return pd.Series(self.matrix[:, self.columns[(group, label)]], index=self.index)
+
+    def any(self, group):
+        """是否命中该分组的任意标签"""
+        cols = [self.columns[(group, label)] for label in self.group_labels(group)]
+        return pd.Series(self.matrix[:, cols].any(axis=1), index=self.index)
+
+    def first(self, group, default=DEFAULT_CONTENT_TYPE):
+        """按词典顺序取第一个命中的标签（用于互斥的内容类型）"""
+        labels = self.group_labels(group)
+        cols = [self.columns[(group, label)] for label in labels]
+        sub = self.matrix[:, cols]
+        choice = np.array(labels + [default], dtype=object)[
+            np.where(sub.any(axis=1), sub.argmax(axis=1), len(labels))]
+        return pd.Series(choice, index=self.index)
+
+    def to_frame(self):
+        return pd.DataFrame(self.matrix, index=self.index,
+                            columns=[f'{g}:{label}' for g, label in self.labels])
+
+    @classmethod
+    def from_frame(cls, frame):
+        """to_frame 的逆操作（用于从特征缓存恢复）；不含 ':' 的列忽略"""
+        cols = [c for c in frame.columns if ':' in c]
+        labels = [tuple(c.split(':', 1)) for c in cols]
+        return cls(frame[cols].to_numpy(dtype=bool), labels, frame.index)
+
+
+class KeywordTagger:
+    """
+    用法：
+        tagger = KeywordTagger.from_config()
+        labels = tagger.tag_frame(df)            # 扫描 视频标题 + 标签
+        df['文化输出'] = labels.any('culture')
+        df['封面类型'] = labels.first('content_type')
+    """
+
+    def __init__(self, config):
+        self.labels = [(group, label) for group, entries in config.items() for label in entries]
+        keyword_labels = {}
+        for i, (group, label) in enumerate(self.labels):
+            for keyword in config[group][label]:
+                keyword_labels.setdefault(keyword.lower(), set()).add(i)
+        self.automaton = (CAutomaton if ahocorasick is not None else Automaton)(keyword_labels)
+
+    @classmethod
+    def from_config(cls, path=CONFIG_FILE):
+        return cls(load_keyword_config(path))
+
+    def tag_texts(self, texts):
+        """对文本序列打标，返回布尔矩阵；相同文本只扫描一次"""
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object).fillna(''))
+        unique_matrix = np.zeros((len(uniques) + 1, len(self.labels)), dtype=bool)
+        for row, text in enumerate(uniques):
+            hits = self.automaton.scan(str(text).lower())
+            if hits:
+                unique_matrix[row, list(hits)] = True
+        # codes 为 -1（缺失）时取最后一行全 False
+        return unique_matrix[np.where(codes >= 0, codes, len(uniques))]
+
+    def tag_frame(self, df, columns=('视频标题', '标签')):
+        """把多列拼成一条文本（换行分隔，关键词不会跨列匹配）后统一打标"""
+        text = df[columns[0]].fillna('').astype(str)
+        for col in columns[1:]:
+            text = text + '\n' + df[col].fillna('').astype(str)
+        return LabelMatrix(self.tag_texts(text), self.labels, df.index)
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+热度得分的流式计算与 TOP-k 榜单
+- 与 data_visualization_1.ipynb 中 MinMaxScaler + 加权求和的定义相同：
+      热度得分 = Σ 权重 × (指标 - 最小值) / (最大值 - 最小值)
+  只是最小值 / 最大值改为随新快照到达而更新的累计值，权重可配置
+- 每个视频只保存最新一次快照的指标（numpy 矩阵），新快照到达时：
+  最小/最大值没变 -> 只重算有变化的视频；变了 -> 对已保存的矩阵整体重算（向量化，不需要历史数据）
+- 视频 / 博主榜单用带惰性删除的堆维护，查询 TOP-k 为 O(k log n)
+- 用法：
+    engine = PopularityEngine()
+    engine.update(df)                      # 每次轮询得到新快照后调用
+    engine.top_videos(10); engine.top_bloggers(15)
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+HOT_COLS = ['播放量', '点赞数', '投币数', '收藏数', '分享数', '视频评论数', '视频弹幕数']
+
+DEFAULT_WEIGHTS = {'播放量': 0.3, '点赞数': 0.3, '投币数': 0.2, '收藏数': 0.1,
+                   '分享数': 0.05, '视频评论数': 0.025, '视频弹幕数': 0.025}
+
+
+class LazyHeap:
+    """
+    最大堆 + 惰性删除：分数更新时直接压入新条目，旧条目在查询时按版本号丢弃；
+    过期条目过多时整体重建
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.current = {}    # key -> (分数, 版本号)
+        self.counter = 0
+
+    def set(self, key, score):
+        self.counter += 1
+        self.current[key] = (score, self.counter)
+        heapq.heappush(self.heap, (-score, self.counter, key))
+        if len(self.heap) > 2 * len(self.current) + 64:
+            self.rebuild()
+
+    def discard(self, key):
+        """删除一个键（堆中的旧条目在查询时丢弃）"""
+        self.current.pop(key, None)
+
+    def rebuild(self, scores=None):
+        """scores 为 {key: 分数} 时整体替换（重新缩放后使用）"""
+        if scores is not None:
+            self.current = {}
+            for key, score in scores.items():
+                self.counter += 1
+                self.current[key] = (score, self.counter)
+        self.heap = [(-score, version, key) for key, (score, version) in self.current.items()]
+        heapq.heapify(self.heap)
+
+    def top(self, k):
+        result, popped = [], []
+        while self.heap and len(result) < k:
+            item = heapq.heappop(self.heap)
+            neg_score, version, key = item
+            if self.current.get(key, (None, None))[1] != version:
+                continue            # 过期条目，直接丢弃
+            result.append((key, -neg_score))
+            popped.append(item)
+        for item in popped:
+            heapq.heappush(self.heap, item)
+        return result
+
+
+class PopularityEngine:
+    def __init__(self, weights=None, key_col='视频链接', blogger_col='博主名称', blogger_agg='mean'):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.metrics = list(self.weights)
+        self.w = np.array([self.weights[m] for m in self.metrics], dtype=np.float64)
+        self.key_col = key_col
+        self.blogger_col = blogger_col
+        self.blogger_agg = blogger_agg      # 'mean' 博主视频的平均热度 / 'sum' 总热度 / 'max'
+
+        self.lo = np.full(len(self.metrics), np.inf)
+        self.hi = np.full(len(self.metrics), -np.inf)
+        self.row_of = {}                     # 视频 -> 行号
+        self.keys = []
+        self.bloggers = []
+        self.blogger_rows = {}               # 博主 -> 其视频的行号
+        self.values = np.empty((0, len(self.metrics)), dtype=np.float64)
+        self.score = np.empty(0, dtype=np.float64)
+        self.video_heap = LazyHeap()
+        self.blogger_heap = LazyHeap()
+        self.counters = {'snapshots': 0, 'rows': 0, 'rescaled': 0}
+
+    # ---------- 更新 ----------
+    def _reserve(self, n):
+        """容量按倍数增长，追加新视频时不必每次复制整个矩阵"""
+        if n <= len(self.score):
+            return
+        capacity = max(n, 2 * len(self.score), 1024)
+        values = np.zeros((capacity, len(self.metrics)))
+        values[:len(self.values)] = self.values
+        score = np.zeros(capacity)
+        score[:len(self.score)] = self.score
+        self.values, self.score = values, score
+
+    def _scale(self, values):
+        span = self.hi - self.lo
+        scaled = np.where(span > 0, (values - self.lo) / np.where(span > 0, span, 1), 0.0)
+        return scaled @ self.w
+
+    def update(self, snapshot):
+        """
+        合并一个新快照（DataFrame，需含 key_col / blogger_col / 各指标列）
+        同一视频以最新一次为准；返回本次新增或变化的视频数
+        """
+        snapshot = snapshot.drop_duplicates(self.key_col, keep='last')
+        values = snapshot[self.metrics].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(np.float64)
+        keys = snapshot[self.key_col].astype(str).tolist()
+        bloggers = (snapshot[self.blogger_col].astype(str).tolist() if self.blogger_col in snapshot
+                    else ['N/A'] * len(keys))
+        self.counters['snapshots'] += 1
+        self.counters['rows'] += len(keys)
+        if not keys:
+            return 0
+
+        # 追加新视频的行，覆盖已有视频的指标
+        rows = np.empty(len(keys), dtype=np.int64)
+        new_keys = [k for k in keys if k not in self.row_of]
+        if new_keys:
+            start = len(self.keys)
+            self._reserve(start + len(new_keys))
+            for i, key in enumerate(new_keys):
+                self.row_of[key] = start + i
+            self.keys += new_keys
+            self.bloggers += [None] * len(new_keys)
+        touched = set()
+        for i, (key, blogger) in enumerate(zip(keys, bloggers)):
+            row = rows[i] = self.row_of[key]
+            old = self.bloggers[row]
+            if old != blogger:
+                if old is not None:
+                    self.blogger_rows[old].remove(row)
+                    if not self.blogger_rows[old]:
+                        del self.blogger_rows[old]     # 博主已没有视频，从排行中删除
+                    touched.add(old)
+                self.blogger_rows.setdefault(blogger, []).append(row)
+                self.bloggers[row] = blogger
+        self.values[rows] = values
+
+        lo = np.minimum(self.lo, values.min(axis=0))
+        hi = np.maximum(self.hi, values.max(axis=0))
+        if np.array_equal(lo, self.lo) and np.array_equal(hi, self.hi):
+            changed = rows
+        else:
+            # 缩放区间变了：所有视频的分数都要按新区间重算（只用保存的最新指标）
+            self.lo, self.hi = lo, hi
+            self.counters['rescaled'] += 1
+            changed = np.arange(len(self.keys))
+
+        self.score[changed] = self._scale(self.values[changed])
+        if len(changed) == len(self.keys):
+            self.video_heap.rebuild(dict(zip(self.keys, self.score[:len(self.keys)].tolist())))
+            self.blogger_heap.rebuild({name: self._blogger_score(name) for name in self.blogger_rows})
+        else:
+            for row in changed:
+                self.video_heap.set(self.keys[row], float(self.score[row]))
+            for name in touched | {self.bloggers[row] for row in changed}:
+                if name in self.blogger_rows:
+                    self.blogger_heap.set(name, self._blogger_score(name))
+                else:
+                    self.blogger_heap.discard(name)
+        return len(rows)
+
+    def _blogger_score(self, name):
+        """只用该博主自己的视频行计算"""
+        scores = self.score[self.blogger_rows[name]]
+        if len(scores) == 0:
+            return 0.0
+        return float(getattr(np, self.blogger_agg)(scores))
+
+    # ---------- 查询 ----------
+    def scores(self, keys=None):
+        """热度得分（0-1）；keys 为视频序列时按其顺序返回"""
+        series = pd.Series(self.score[:len(self.keys)], index=self.keys, name='热度得分')
+        if keys is None:
+            return series
+        return pd.Series(keys).astype(str).map(series).rename('热度得分')
+
+    def score_of(self, key):
+        row = self.row_of.get(str(key))
+        return None if row is None else float(self.score[row])
+
+    def top_videos(self, k=10):
+        top = self.video_heap.top(k)
+        return pd.DataFrame({
+            self.key_col: [key for key, _ in top],
+            self.blogger_col: [self.bloggers[self.row_of[key]] for key, _ in top],
+            '热度得分': [score for _, score in top],
+        })
+
+    def top_bloggers(self, k=15):
+        top = self.blogger_heap.top(k)
+        return pd.DataFrame({self.blogger_col: [name for name, _ in top],
+                             '热度得分': [score for _, score in top]})
+
+    def report(self):
+        c = self.counters
+        print(f"热度引擎: {len(self.keys)} 个视频, {c['snapshots']} 个快照, 共 {c['rows']} 行, "
+              f"缩放区间变化 {c['rescaled']} 次")
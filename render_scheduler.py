@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+图表渲染调度（类似构建系统）
+- 每张图声明输出文件、输入列和代码依赖（deps：它间接用到的其他模块，如 agg_cube）；
+  输入数据哈希 + 绘图函数源码（含它调用的本模块函数）+ 依赖模块源码的哈希
+  与上次一致、且输出文件还在时跳过，不再重新渲染
+- 需要渲染的图放进进程池并行执行（matplotlib 不是线程安全的，不能用线程池）
+- 每次运行写出清单 render_manifest.json：每张图的输出、输入、哈希、耗时、状态；
+  渲染耗时同时记入 telemetry（chart_seconds{chart}，工作进程里测得、主进程汇总）
+- 用法：
+    CHARTS = [Chart(plot_time_heatmap, '1_时间热力图.png', ['播放量', '发布小时', '发布星期'],
+                    deps=[agg_cube, feature_store])]
+    render_charts(CHARTS, store)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import telemetry
+
+MANIFEST_FILE = "render_manifest.json"
+
+
+class Chart:
+    def __init__(self, func, output, inputs, deps=()):
+        self.func = func
+        self.name = func.__name__
+        self.output = output
+        self.inputs = list(inputs)
+        self.deps = list(deps)      # 模块（或函数/类），其源码计入哈希
+
+
+def code_hash(func, deps=()):
+    """绘图函数源码 + 它用到的同模块函数（如 format_wan）的源码 + 声明的依赖模块源码"""
+    module = inspect.getmodule(func)
+    sources = [inspect.getsource(func)]
+    for name in sorted(set(func.__code__.co_names)):
+        helper = getattr(module, name, None)
+        if inspect.isfunction(helper) and helper is not func and helper.__module__ == func.__module__:
+            sources.append(inspect.getsource(helper))
+    for dep in sorted(deps, key=lambda obj: obj.__name__):
+        sources.append(inspect.getsource(dep))
+    return hashlib.sha256('\n'.join(sources).encode('utf-8')).hexdigest()
+
+
+def data_hash(frame):
+    h = hashlib.sha256('|'.join(map(str, frame.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def chart_hash(chart, store):
+    h = hashlib.sha256()
+    h.update(data_hash(store.select(chart.inputs)).encode())
+    h.update(code_hash(chart.func, chart.deps).encode())
+    return h.hexdigest()[:16]
+
+
+def load_manifest(path=MANIFEST_FILE):
+    if os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def init_worker():
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+
+def render_one(func):
+    """在工作进程中执行一个绘图函数，返回 (耗时, 错误信息 或 None)"""
+    started = time.perf_counter()
+    try:
+        func()
+        return time.perf_counter() - started, None
+    except Exception:
+        return time.perf_counter() - started, traceback.format_exc()
+
+
+def render_charts(charts, store, workers=None, force=False, manifest_path=MANIFEST_FILE):
+    """
+    渲染一组图表：输入和代码都没变的跳过，其余并行渲染，返回清单
+    force=True 时全部重新渲染
+    """
+    manifest = load_manifest(manifest_path)
+    started = time.perf_counter()
+
+    # 在主进程里先算好所有输入（派生特征只算一次，工作进程 fork 后直接复用）
+    with telemetry.span('stage', stage='chart_inputs'):
+        hashes = {chart.name: chart_hash(chart, store) for chart in charts}
+    todo = []
+    for chart in charts:
+        entry = manifest.get(chart.name, {})
+        if (not force and entry.get('hash') == hashes[chart.name]
+                and entry.get('status') != 'failed' and os.path.exists(chart.output)):
+            entry['status'] = 'skipped'
+            print(f"跳过（输入未变化）: {chart.output}")
+        else:
+            todo.append(chart)
+
+    workers = min(workers or os.cpu_count() or 1, len(todo)) if todo else 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            results = list(pool.map(render_one, [chart.func for chart in todo]))
+    else:
+        results = [render_one(chart.func) for chart in todo]
+
+    for chart, (seconds, error) in zip(todo, results):
+        telemetry.observe('chart_seconds', seconds, chart=chart.name)
+        if error is not None:
+            telemetry.count('chart_errors_total', chart=chart.name)
+        entry = {'output': chart.output, 'inputs': chart.inputs, 'hash': hashes[chart.name],
+                 'seconds': round(seconds, 3), 'rendered_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                 'status': 'rendered' if error is None else 'failed'}
+        if error is not None:
+            entry['error'] = error
+            print(f"✗ {chart.name} 渲染失败:\n{error}")
+        manifest[chart.name] = entry
+
+    save_manifest(manifest, manifest_path)
+    rendered = sum(1 for chart in todo if manifest[chart.name]['status'] == 'rendered')
+    print(f"图表渲染: 共 {len(charts)} 张, 渲染 {rendered} 张, 跳过 {len(charts) - len(todo)} 张, "
+          f"失败 {len(todo) - rendered} 张, 用时 {time.perf_counter() - started:.1f}s ({max(workers, 1)} 进程)")
+    return manifest
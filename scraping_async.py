@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+B站视频爬虫 - 异步并发模式
+- 固定数量的worker并发处理视频页面（有界并发）
+- 所有请求共用一个 aiohttp 连接池（长连接复用）
+- 全局令牌桶限速，代替每个视频之后的 random.uniform(2, 4) 固定等待
+- 遇到 412/429/5xx 时指数退避重试
+- 粉丝数 / 评论数 / 弹幕数经 scraping_stats.StatsLayer 去重和缓存
+- 每次请求的延迟 / 状态码 / 重试 / 字节数记入 telemetry（按接口区分：page / view / fans）
+
+页面地址和API地址都可以替换，方便指向本地回放服务器进行测试：
+    run_crawl(urls, on_record, api_base="http://127.0.0.1:8000")
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import aiohttp
+
+import telemetry
+from scraping_parse import empty_record, normalize_link, parse_video_html
+from scraping_stats import StatsLayer
+
+API_BASE = "https://api.bilibili.com"
+
+# 排行榜分区（/v/popular/rank/*）
+RANK_BOARDS = {
+    'all': 'https://www.bilibili.com/v/popular/rank/all',
+    'food': 'https://www.bilibili.com/v/popular/rank/food/',
+    'douga': 'https://www.bilibili.com/v/popular/rank/douga',
+    'music': 'https://www.bilibili.com/v/popular/rank/music',
+    'dance': 'https://www.bilibili.com/v/popular/rank/dance',
+    'game': 'https://www.bilibili.com/v/popular/rank/game',
+    'knowledge': 'https://www.bilibili.com/v/popular/rank/knowledge',
+    'tech': 'https://www.bilibili.com/v/popular/rank/tech',
+    'sports': 'https://www.bilibili.com/v/popular/rank/sports',
+    'car': 'https://www.bilibili.com/v/popular/rank/car',
+    'life': 'https://www.bilibili.com/v/popular/rank/life',
+    'animal': 'https://www.bilibili.com/v/popular/rank/animal',
+    'kichiku': 'https://www.bilibili.com/v/popular/rank/kichiku',
+    'fashion': 'https://www.bilibili.com/v/popular/rank/fashion',
+    'ent': 'https://www.bilibili.com/v/popular/rank/ent',
+    'cinephile': 'https://www.bilibili.com/v/popular/rank/cinephile',
+}
+
+HEADERS = {
+    'User-Agent': 'xxx',
+    'Referer': 'https://www.bilibili.com/',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+
+# 需要退避重试的状态码（412 = B站风控拦截）
+RETRY_STATUS = {412, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    全局令牌桶限速器
+    rate: 每秒补充的令牌数（即平均请求速率）
+    capacity: 桶容量（允许的突发请求数）
+    """
+
+    def __init__(self, rate=2.0, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def fetch(session, bucket, url, as_json=False, retries=4, backoff=1.0):
+    """
+    限速 + 重试的GET请求
+    成功返回文本（或JSON），失败返回 None
+    """
+    endpoint = telemetry.endpoint_of(url)
+    for attempt in range(retries + 1):
+        with telemetry.span('rate_limit_wait'):
+            await bucket.acquire()
+        try:
+            with telemetry.span('http_request', endpoint=endpoint) as span:
+                async with session.get(url) as response:
+                    span.set(status=response.status, attempt=attempt)
+                    if response.status == 200:
+                        body = await response.read()
+                        telemetry.record_response(endpoint, 200, len(body))
+                        if as_json:
+                            return await response.json(content_type=None)
+                        return await response.text()
+                    telemetry.record_response(endpoint, response.status)
+                    if response.status not in RETRY_STATUS:
+                        print(f'无法获取链接: {url}, 状态码: {response.status}')
+                        telemetry.count('http_failures_total', endpoint=endpoint)
+                        return None
+                    # 优先遵守服务器给出的 Retry-After
+                    retry_after = response.headers.get('Retry-After')
+                    status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            telemetry.record_response(endpoint, 'error')
+            retry_after = None
+            status = repr(e)
+
+        if attempt == retries:
+            break
+        telemetry.count('http_retries_total', endpoint=endpoint)
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+        print(f"请求失败({status})，{delay:.1f} 秒后第 {attempt + 1} 次重试: {url}")
+        await asyncio.sleep(delay)
+
+    print(f'重试后仍无法获取: {url}')
+    telemetry.count('http_failures_total', endpoint=endpoint)
+    return None
+
+
+async def get_up_fans(session, bucket, mid, api_base=API_BASE):
+    """获取UP主粉丝数"""
+    data = await fetch(session, bucket, f"{api_base}/x/relation/stat?vmid={mid}", as_json=True)
+    if data:
+        return (data.get("data") or {}).get("follower", "N/A")
+    return "N/A"
+
+
+async def get_video_stat(session, bucket, aid, api_base=API_BASE):
+    """获取视频评论数和弹幕数（同一个接口一次取回）"""
+    data = await fetch(session, bucket, f"{api_base}/x/web-interface/view?aid={aid}", as_json=True)
+    if data:
+        stat = (data.get("data") or {}).get("stat", {})
+        return stat.get("reply", "N/A"), stat.get("danmaku", "N/A")
+    return "N/A", "N/A"
+
+
+async def crawl_one(session, bucket, stats, link, api_base=API_BASE):
+    """抓取并解析单个视频，返回记录字典（封面由 scraping_covers.py 单独下载）"""
+    url = normalize_link(link)
+    html = await fetch(session, bucket, url)
+    if html is None:
+        # 即使请求失败，也返回默认值记录
+        return empty_record(url)
+
+    with telemetry.span('parse'):
+        record = parse_video_html(html, url)
+
+    async def fetch_view_stat(a):
+        return await get_video_stat(session, bucket, a, api_base)
+
+    async def fetch_fans(m):
+        return await get_up_fans(session, bucket, m, api_base)
+
+    await stats.fill_async(record, fetch_view_stat, fetch_fans)
+    return record
+
+
+async def crawl_async(urls, on_record, workers=8, rate=2.0, burst=None,
+                      api_base=API_BASE, timeout=15, stats=None):
+    """
+    异步并发爬取视频列表
+    urls: 视频链接列表
+    on_record: 回调 on_record(index, record)，index 为在 urls 中的位置
+    workers: 并发worker数量
+    rate / burst: 全局令牌桶的速率（请求/秒）和突发容量
+    stats: 扩展数据获取层，默认新建（使用 stats_cache.sqlite）
+    """
+    queue = asyncio.Queue()
+    for item in enumerate(urls):
+        queue.put_nowait(item)
+
+    bucket = TokenBucket(rate, burst)
+    if stats is None:
+        stats = StatsLayer()
+    connector = aiohttp.TCPConnector(limit=workers, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    done = 0
+    started = time.monotonic()
+
+    async def worker(session):
+        nonlocal done
+        while True:
+            try:
+                index, link = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                with telemetry.span('video'):
+                    record = await crawl_one(session, bucket, stats, link, api_base)
+                on_record(index, record)
+            except Exception as e:
+                print(f"处理视频出错: {link}, 错误: {e}")
+            done += 1
+            print(f"处理进度: {done}/{len(urls)}")
+
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector,
+                                     timeout=client_timeout) as session:
+        await asyncio.gather(*(worker(session) for _ in range(min(workers, len(urls)) or 1)))
+
+    elapsed = time.monotonic() - started
+    print(f"异步爬取完成: {done} 个视频，用时 {elapsed:.1f} 秒")
+    stats.report()
+
+
+def run_crawl(urls, on_record, **kwargs):
+    """
+    同步入口：在普通脚本中直接 asyncio.run；
+    在Jupyter等已有事件循环的环境中，放到新线程里运行
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(crawl_async(urls, on_record, **kwargs))
+
+    error = []
+
+    def target():
+        try:
+            asyncio.run(crawl_async(urls, on_record, **kwargs))
+        except BaseException as e:
+            error.append(e)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if error:
+        raise error[0]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+断点续爬：以BV号为键的爬取进度检查点
+- 抓完的视频先记在内存，每 flush_every 个或每 flush_seconds 秒原子写盘一次（先写临时文件再 os.replace），
+  不在异步爬虫的回调里逐个整文件重写 + fsync（会卡住事件循环）；进程被杀最多丢最后一批，下次重抓
+- 新鲜期内（默认 DEFAULT_FRESH_HOURS = 2 小时，大于每小时一次的定时爬取间隔）已抓过的视频直接跳过，
+  重新运行时从中断处继续
+- 加载时删掉已过新鲜期的记录（反正要重新抓），检查点文件不会随运行次数一直变大
+- 最终CSV由检查点中的记录按榜单顺序重新生成
+"""
+
+import json
+import os
+import re
+import time
+
+CHECKPOINT_FILE = "crawl_checkpoint.json"
+DEFAULT_FRESH_HOURS = 2
+
+BVID_PATTERN = re.compile(r'BV[0-9A-Za-z]{10}')
+
+
+def bvid_from_link(link):
+    """从视频链接中提取BV号，没有BV号时返回链接本身"""
+    match = BVID_PATTERN.search(link)
+    return match.group(0) if match else link
+
+
+class CrawlCheckpoint:
+    """
+    检查点文件格式：{BV号: {"fetched_at": 时间戳, "record": 记录字典}}
+    用完调用 flush()（或用 with 语句）把最后一批写盘
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE, fresh_seconds=DEFAULT_FRESH_HOURS * 3600,
+                 flush_every=20, flush_seconds=5.0):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.entries = {}
+        self.dirty = 0
+        self.flushed_at = time.time()
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+                print(f"已加载检查点: {path}（{len(self.entries)} 个视频）")
+            except (OSError, ValueError) as e:
+                print(f"检查点文件损坏，重新开始: {e}")
+        self.prune()
+
+    def prune(self, now=None):
+        """删除已过新鲜期的记录，返回删除个数（下次 save 时写盘）"""
+        now = time.time() if now is None else now
+        expired = [bvid for bvid in self.entries if not self.is_fresh(bvid, now)]
+        for bvid in expired:
+            del self.entries[bvid]
+        if expired:
+            self.dirty += 1
+            print(f"检查点: 删除 {len(expired)} 个已过期的视频")
+        return len(expired)
+
+    def is_fresh(self, bvid, now=None):
+        entry = self.entries.get(bvid)
+        if entry is None:
+            return False
+        now = time.time() if now is None else now
+        return now - entry['fetched_at'] <= self.fresh_seconds
+
+    def pending(self, links):
+        """返回需要重新抓取的链接（不在新鲜期内的）"""
+        now = time.time()
+        todo = [link for link in links if not self.is_fresh(bvid_from_link(link), now)]
+        print(f"检查点: 共 {len(links)} 个视频，{len(links) - len(todo)} 个仍在新鲜期内跳过，"
+              f"需抓取 {len(todo)} 个")
+        return todo
+
+    def get(self, bvid):
+        entry = self.entries.get(bvid)
+        return entry['record'] if entry else None
+
+    def save(self, bvid, record):
+        """记录一个视频；攒够 flush_every 个或距上次写盘超过 flush_seconds 秒时写盘"""
+        now = time.time()
+        self.entries[bvid] = {'fetched_at': now, 'record': record}
+        self.dirty += 1
+        if self.dirty >= self.flush_every or now - self.flushed_at >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """有未写盘的改动时原子写盘"""
+        if not self.dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.dirty = 0
+        self.flushed_at = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+封面下载阶段（与页面爬取分开执行）
+- 线程池并发下载，所有线程共用一个 requests.Session 连接池
+- 流式写入临时文件，完成后原子重命名，不会留下半张图片
+- covers/ 中已存在的封面直接跳过；revalidate=True 时用 ETag / Last-Modified
+  发条件请求，CDN返回304则不重新下载
+- 用法：
+    paths = download_covers([(aid, cover_url), ...])   # {aid: 本地路径 或 None}
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import telemetry
+
+HEADERS = {
+    'User-Agent': 'xxx',
+    'Referer': 'https://www.bilibili.com/',
+}
+
+
+def make_session(workers):
+    """连接池大小与线程数一致的共享会话"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def validators_path(save_dir):
+    """每张封面的 ETag / Last-Modified 保存在封面目录旁边（不放进目录，免得被当成图片读取）"""
+    return os.path.normpath(save_dir) + '_validators.json'
+
+
+def load_validators(save_dir):
+    path = validators_path(save_dir)
+    if os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_validators(save_dir, validators):
+    path = validators_path(save_dir)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(validators, f)
+    os.replace(path + '.tmp', path)
+
+
+def fetch_cover(session, aid, url, save_dir, validators, lock, revalidate=False, timeout=8):
+    """
+    下载单张封面，返回 (本地路径 或 None, 状态)
+    状态: 'skipped' 已存在 / 'not_modified' 304 / 'downloaded' / 'failed'
+    """
+    save_path = f"{save_dir}/{aid}.jpg"
+    exists = os.path.exists(save_path)
+    if exists and not revalidate:
+        return save_path, 'skipped'
+
+    headers = {}
+    if exists:
+        with lock:
+            cached = validators.get(str(aid), {})
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    tmp_path = f"{save_path}.{threading.get_ident()}.part"
+    try:
+        with telemetry.span('http_request', endpoint='cover') as span, \
+                session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            span.set(status=response.status_code)
+            if response.status_code == 304 and exists:
+                telemetry.record_response('cover', 304)
+                return save_path, 'not_modified'
+            response.raise_for_status()
+            size = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+                    size += len(chunk)
+            telemetry.record_response('cover', response.status_code, size)
+            os.replace(tmp_path, save_path)
+            with lock:
+                validators[str(aid)] = {'etag': response.headers.get('ETag'),
+                                        'last_modified': response.headers.get('Last-Modified')}
+        return save_path, 'downloaded'
+    except Exception as e:
+        print(f"封面下载失败: {aid} {e}")
+        telemetry.record_response('cover', getattr(getattr(e, 'response', None), 'status_code', None) or 'error')
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return (save_path if exists else None), 'failed'
+
+
+def download_covers(items, save_dir="covers", workers=8, revalidate=False, session=None):
+    """
+    并发下载一批封面
+    items: 可迭代的 (aid, cover_url)
+    返回 {aid: 本地路径 或 None}
+    """
+    os.makedirs(save_dir, exist_ok=True)
+    items = [(aid, url) for aid, url in items if aid != 'N/A' and url and url != 'N/A']
+    session = session or make_session(workers)
+    validators = load_validators(save_dir)
+    lock = threading.Lock()
+    counts = {'skipped': 0, 'not_modified': 0, 'downloaded': 0, 'failed': 0}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_cover, session, aid, url, save_dir, validators, lock, revalidate): aid
+                   for aid, url in items}
+        for future, aid in futures.items():
+            path, status = future.result()
+            results[aid] = path
+            counts[status] += 1
+            telemetry.count('covers_total', status=status)
+
+    save_validators(save_dir, validators)
+    print(f"封面下载完成: 新下载 {counts['downloaded']} 张, 已存在跳过 {counts['skipped']} 张, "
+          f"未变化(304) {counts['not_modified']} 张, 失败 {counts['failed']} 张")
+    return results
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+B站视频页面解析
+从 data_scraping_bilibili.ipynb 的 parse_video_page 中拆出的纯解析部分，
+只负责把页面HTML解析成一条记录（不发请求、不写文件），
+供同步爬虫和异步爬虫（scraping_async.py）共用。
+"""
+
+import json
+import re
+import time
+from bs4 import BeautifulSoup
+
+# CSV表头（前19列与 write_to_csv 保持一致；UP主ID（mid）为新增列，博主昵称可能改名或重名，
+# 按博主汇总时以它为键，见 blogger_index.py）
+CSV_HEADER = [
+    '序号', '视频链接', '博主名称', '视频标题', '标签', '类别', '播放量',
+    '点赞数', '投币数', '收藏数', '分享数', '发布时间', '视频简介',
+    '视频时长', '封面URL', '封面路径', 'UP主粉丝数', '视频评论数', '视频弹幕数', 'UP主ID'
+]
+
+
+def normalize_link(link):
+    """确保链接格式正确"""
+    if link.startswith('//'):
+        return 'https:' + link
+    elif link.startswith('/'):
+        return 'https://www.bilibili.com' + link
+    return link
+
+
+def empty_record(video_link):
+    """
+    初始化一条记录，所有字段默认为 N/A
+    键名与 write_to_csv 的参数名一致，另附 aid / mid 供API调用
+    """
+    return {
+        'video_link': video_link,
+        'blogger_name': 'N/A',
+        'title': 'N/A',
+        'tags': 'N/A',
+        'categories': 'N/A',
+        'play_count': 'N/A',
+        'like_count': 'N/A',
+        'coin_count': 'N/A',
+        'fav_count': 'N/A',
+        'share_count': 'N/A',
+        'publish_time': 'N/A',
+        'video_description': 'N/A',
+        'duration': 'N/A',       # 视频时长
+        'cover_url': 'N/A',      # 封面URL
+        'cover_path': 'N/A',     # 封面本地路径
+        'fans_count': 'N/A',     # 粉丝数
+        'comments_count': 'N/A', # 评论数
+        'danmaku_count': 'N/A',  # 弹幕数
+        'aid': 'N/A',            # 视频aid，用于API调用和封面下载
+        'mid': 'N/A',            # UP主mid，用于API调用
+    }
+
+
+def extract_tags_from_html(soup):
+    """
+    B组辅助函数：从HTML中提取标签
+    """
+    tags = []
+
+    # 查找所有class为"tag-link"的a标签
+    tag_links = soup.find_all('a', {'class': 'tag-link'})
+    for tag_link in tag_links:
+        tag_text = tag_link.text.strip()
+        if tag_text and tag_text not in tags:
+            tags.append(tag_text)
+
+    return tags if tags else "N/A"
+
+
+STATE_MARKER = 'window.__INITIAL_STATE__='
+VIDEO_DATA_KEY = '"videoData":'
+_decoder = json.JSONDecoder()
+
+
+def extract_video_data(html):
+    """
+    快速提取 window.__INITIAL_STATE__ 中的 videoData，不构建 BeautifulSoup 树
+    1. 字符串查找定位 window.__INITIAL_STATE__=
+    2. 在其后定位 "videoData": ，用 raw_decode 只解码这一个子对象
+       （raw_decode 在JSON对象结束处自动停止，不依赖 ';(function()' 切分）
+    3. 子对象不像 videoData 时，解码整个 state 再取 videoData
+    找不到时返回 None，由调用方回退到HTML选择器解析
+    """
+    start = html.find(STATE_MARKER)
+    if start == -1:
+        return None
+    start += len(STATE_MARKER)
+
+    key = html.find(VIDEO_DATA_KEY, start)
+    if key != -1:
+        try:
+            video_data, _ = _decoder.raw_decode(html, key + len(VIDEO_DATA_KEY))
+            if isinstance(video_data, dict) and ('aid' in video_data or 'bvid' in video_data):
+                return video_data
+        except ValueError:
+            pass
+
+    try:
+        state, _ = _decoder.raw_decode(html, start)
+    except ValueError as e:
+        print(f"解析JSON数据失败: {e}")
+        return None
+    video_data = state.get('videoData') if isinstance(state, dict) else None
+    return video_data or None
+
+
+def extract_video_data_from_soup(soup):
+    """
+    原始方法：遍历 <script> 标签，切片提取 window.__INITIAL_STATE__ 中的 videoData
+    （保留用于对比测试，见 benchmarks/bench_extract.py）
+    """
+    for script in soup.find_all('script'):
+        if script.string and 'window.__INITIAL_STATE__' in script.string:
+            # 提取JavaScript中的数据
+            script_text = script.string
+            start = script_text.find('window.__INITIAL_STATE__=') + len('window.__INITIAL_STATE__=')
+            end = script_text.find(';(function()') if ';(function()' in script_text else script_text.rfind('}') + 1
+
+            if start != -1 and end != 0:
+                try:
+                    json_data = json.loads(script_text[start:end])
+                    return json_data.get('videoData', {})
+                except Exception as e:
+                    print(f"解析JSON数据失败: {e}")
+                    continue
+    return None
+
+
+def fill_from_video_data(record, video_data):
+    """用 videoData 填充记录（首选方法）"""
+    # 提取基础信息
+    record['aid'] = video_data.get('aid', 'N/A')
+    record['title'] = video_data.get('title', 'N/A')
+
+    # 提取UP主信息
+    owner = video_data.get('owner', {})
+    record['blogger_name'] = owner.get('name', 'N/A')
+    record['mid'] = owner.get('mid', 'N/A')
+
+    # 提取统计数据
+    stat = video_data.get('stat', {})
+    record['like_count'] = stat.get('like', 'N/A')
+    record['coin_count'] = stat.get('coin', 'N/A')
+    record['fav_count'] = stat.get('favorite', 'N/A')
+    record['share_count'] = stat.get('share', 'N/A')
+    record['play_count'] = stat.get('view', 'N/A')
+    # 评论数、弹幕数页面里已有，无需再调用 /x/web-interface/view
+    record['comments_count'] = stat.get('reply', 'N/A')
+    record['danmaku_count'] = stat.get('danmaku', 'N/A')
+
+    # 提取发布时间
+    publish_time = video_data.get('pubdate', 'N/A')
+    if publish_time != 'N/A':
+        try:
+            publish_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(publish_time))
+        except:
+            pass
+    record['publish_time'] = publish_time
+
+    # 提取视频简介
+    record['video_description'] = video_data.get('desc', 'N/A')
+
+    # 提取视频时长
+    duration = video_data.get('duration', 'N/A')
+    if duration != 'N/A':
+        try:
+            # 将秒转换为分钟:秒格式
+            duration = f"{duration // 60}:{duration % 60:02d}"
+        except:
+            pass
+    record['duration'] = duration
+
+    # 提取封面URL
+    record['cover_url'] = video_data.get('pic', 'N/A')
+
+    # 提取标签
+    tags_data = video_data.get('tags', [])
+    tags = []
+    if isinstance(tags_data, list):
+        for tag in tags_data:
+            if isinstance(tag, dict):
+                tag_name = tag.get('tag_name', '')
+                if tag_name:
+                    tags.append(tag_name)
+            elif isinstance(tag, str):
+                tags.append(tag)
+    record['tags'] = tags if tags else None
+
+    # 提取类别
+    tname = video_data.get('tname', 'N/A')
+    record['categories'] = [tname] if tname != 'N/A' else []
+    return record
+
+
+def fill_from_html(record, soup, url):
+    """如果无法从JS获取数据，则从HTML中提取"""
+    # 提取视频标题
+    title_element = soup.find('h1', {'class': 'video-title'})
+    if not title_element:
+        title_element = soup.find('h1', {'class': re.compile('title')})
+    record['title'] = title_element.text.strip() if title_element else "N/A"
+
+    # 提取博主名称
+    name_element = soup.find('a', {'class': 'username'})
+    if not name_element:
+        name_element = soup.find('a', {'class': re.compile('name')})
+        if not name_element:
+            name_element = soup.find('div', {'class': 'up-name'})
+    record['blogger_name'] = name_element.text.strip() if name_element else "N/A"
+
+    # 提取播放量
+    view_element = soup.find('span', {'class': 'view'})
+    if not view_element:
+        view_element = soup.find('span', {'class': re.compile('view')})
+        if not view_element:
+            view_element = soup.find('div', {'class': 'video-data'})
+    record['play_count'] = view_element.text.strip() if view_element else "N/A"
+
+    # 提取点赞数、投币数、收藏数、分享数
+    tool_bar = soup.find('div', {'class': 'ops'})
+    if not tool_bar:
+        tool_bar = soup.find('div', {'class': re.compile('toolbar|action')})
+
+    if tool_bar:
+        for key, exact, pattern in [('like_count', 'like', 'like'),
+                                    ('coin_count', 'coin', 'coin'),
+                                    ('fav_count', 'collect', 'collect|fav'),
+                                    ('share_count', 'share', 'share')]:
+            element = tool_bar.find('span', {'class': exact})
+            if not element:
+                element = tool_bar.find('span', {'class': re.compile(pattern)})
+            record[key] = element.text.strip() if element else "N/A"
+
+    # 提取发布时间
+    time_element = soup.find('div', {'class': 'video-info'})
+    if not time_element:
+        time_element = soup.find('div', {'class': re.compile('video-info|publish')})
+        if not time_element:
+            time_element = soup.find('span', {'class': 'pudate-text'})
+
+    if time_element:
+        time_match = re.search(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}', time_element.text)
+        record['publish_time'] = time_match.group(0) if time_match else "N/A"
+
+    # 提取视频简介
+    desc_element = soup.find('div', {'class': 'desc-info'})
+    if not desc_element:
+        desc_element = soup.find('div', {'class': re.compile('desc|info|introduction')})
+    record['video_description'] = desc_element.text.strip() if desc_element else "N/A"
+
+    # 提取标签
+    record['tags'] = extract_tags_from_html(soup)
+
+    # 提取类别
+    categories = []
+    for category_element in soup.find_all('a', href=re.compile(r'//www\.bilibili\.com/v/')):
+        category_text = category_element.text.strip()
+        if category_text and category_text not in categories:
+            categories.append(category_text)
+    record['categories'] = categories
+
+    # 尝试从HTML中提取时长
+    duration_element = soup.find('span', {'class': 'duration'})
+    if not duration_element:
+        duration_element = soup.find('span', {'class': re.compile('time|duration')})
+    record['duration'] = duration_element.text.strip() if duration_element else "N/A"
+
+    # 从HTML中提取封面URL
+    meta_image = soup.find('meta', {'property': 'og:image'})
+    if meta_image:
+        record['cover_url'] = meta_image.get('content', 'N/A')
+
+    # 从URL中提取aid
+    aid_match = re.search(r'av(\d+)', url)
+    if aid_match:
+        record['aid'] = aid_match.group(1)
+    return record
+
+
+def parse_video_html(html, url):
+    """
+    B组主功能：把视频页面HTML解析为一条记录
+    封面下载和API扩展数据（粉丝数/评论数/弹幕数）由调用方负责
+    """
+    record = empty_record(url)
+
+    # 首选：直接从 __INITIAL_STATE__ 提取，无需解析整个页面
+    video_data = extract_video_data(html)
+    if video_data:
+        print("使用JavaScript数据")
+        fill_from_video_data(record, video_data)
+        if record['tags'] is None:
+            record['tags'] = extract_tags_from_html(BeautifulSoup(html, 'html.parser'))
+    else:
+        # 使用BeautifulSoup解析HTML
+        print("使用HTML解析")
+        fill_from_html(record, BeautifulSoup(html, 'html.parser'), url)
+
+    return record
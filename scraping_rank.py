@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+排行榜页面：用 Selenium 打开榜单（动态加载），提取视频链接
+从 data_scraping_bilibili.ipynb 中拆出，供 notebook 和命令行（cli.py crawl）共用；
+selenium 只在真正打开榜单时才导入，用 --urls 直接给出链接时不需要安装
+"""
+
+from bs4 import BeautifulSoup
+
+
+def analyurl_mainhtml(url):
+    """
+    B组：使用Selenium获取并解析排行榜页面
+    处理动态加载的页面内容
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    # 配置Chrome选项
+    options = Options()
+    options.add_argument('--headless')  # 无界面模式
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    # 初始化WebDriver
+    driver = webdriver.Chrome(options=options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    # 访问目标页面
+    driver.get(url)
+
+    # 等待页面加载完成
+    wait = WebDriverWait(driver, 15)
+    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '.rank-item')))
+
+    # 获取网页的HTML内容
+    html = driver.page_source
+
+    # 关闭WebDriver
+    driver.quit()
+
+    # 解析HTML
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup
+
+
+def extract_video_links(soup, limit=100):
+    """
+    从排行榜页面提取视频链接（默认最多100个）
+    """
+    links = []
+    info_divs = soup.find_all('div', class_='info')
+    count = 0
+
+    for info_div in info_divs:
+        title_element = info_div.find('a', class_='title')
+        if title_element:
+            href = title_element.get('href')
+            if href:
+                print(f"找到链接: {href}")
+                links.append(href)
+                count = count + 1
+                if len(links) == limit:  # 限制为100个视频
+                    break
+
+    print(f"链接提取完成，共找到 {count} 个链接")
+    return links
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫输出：带类型的批量写入
+- 统一的字段表（SCHEMA）：数值列为整数，发布时间为真正的时间，缺失为空值（不再写 'N/A'）
+- 按批缓冲写入，不再每行打开一次文件
+- 支持 CSV 和 Parquet（列式，需要 pyarrow）两种后端，可同时写；另可追加到历史快照目录
+- load_videos() 供下游按类型直接读取
+"""
+
+import csv
+import math
+import os
+import re
+from datetime import datetime
+
+import telemetry
+from scraping_parse import CSV_HEADER
+
+# (列名, 记录字典中的键, 类型)
+SCHEMA = [
+    ('序号', 'index', 'int'),
+    ('视频链接', 'video_link', 'str'),
+    ('博主名称', 'blogger_name', 'str'),
+    ('视频标题', 'title', 'str'),
+    ('标签', 'tags', 'list'),
+    ('类别', 'categories', 'list'),
+    ('播放量', 'play_count', 'int'),
+    ('点赞数', 'like_count', 'int'),
+    ('投币数', 'coin_count', 'int'),
+    ('收藏数', 'fav_count', 'int'),
+    ('分享数', 'share_count', 'int'),
+    ('发布时间', 'publish_time', 'datetime'),
+    ('视频简介', 'video_description', 'str'),
+    ('视频时长', 'duration', 'str'),
+    ('封面URL', 'cover_url', 'str'),
+    ('封面路径', 'cover_path', 'str'),
+    ('UP主粉丝数', 'fans_count', 'int'),
+    ('视频评论数', 'comments_count', 'int'),
+    ('视频弹幕数', 'danmaku_count', 'int'),
+    ('UP主ID', 'mid', 'int'),
+]
+assert [name for name, _, _ in SCHEMA] == CSV_HEADER
+
+INT_COLUMNS = [name for name, _, kind in SCHEMA if kind == 'int']
+TIME_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M"]
+
+
+def to_int(value):
+    """转为整数；支持 '112.2万' / '1.5亿' 这类HTML文本，无法转换（含 NaN / inf）时返回 None"""
+    if value is None or value == 'N/A' or value == '':
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if math.isfinite(value) else None
+    text = str(value).strip().replace(',', '')
+    match = re.fullmatch(r'([\d.]+)\s*(万|亿)?', text)
+    if not match:
+        return None
+    try:
+        number = float(match.group(1))
+    except ValueError:
+        return None
+    unit = {'万': 10000, '亿': 100000000}.get(match.group(2), 1)
+    return int(round(number * unit))
+
+
+def to_datetime(value):
+    """时间戳 / 时间字符串 -> datetime，无法转换时返回 None"""
+    if value is None or value == 'N/A' or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def to_list(value):
+    if value is None or value == 'N/A':
+        return None
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+def to_str(value):
+    if value is None or value == 'N/A':
+        return None
+    return str(value)
+
+
+CONVERTERS = {'int': to_int, 'datetime': to_datetime, 'list': to_list, 'str': to_str}
+
+
+def typed_row(index, record):
+    """把爬虫记录转换为带类型的一行（字典，键为中文列名）"""
+    values = dict(record, index=index + 1)  # 序号从1开始
+    return {name: CONVERTERS[kind](values.get(key)) for name, key, kind in SCHEMA}
+
+
+class CsvSink:
+    """
+    缓冲CSV写入：数值按整数写出，空值写为空串，时间统一为 %Y-%m-%d %H:%M:%S，
+    列表列仍写为Python列表字符串（与原CSV格式兼容）
+    先写临时文件，关闭时 os.replace 覆盖原文件（与 ParquetSink 一样覆盖，中途失败不会留下半个文件）
+    """
+
+    def __init__(self, path='video_info_complete.csv'):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_HEADER)
+
+    @staticmethod
+    def format(value):
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        return str(value)
+
+    def write_rows(self, rows):
+        self.writer.writerows([[self.format(row[name]) for name in CSV_HEADER] for row in rows])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class ParquetSink:
+    """
+    Parquet列式写入（需要 pyarrow）：每个批次写一个 row group，
+    打开时覆盖已有文件
+    """
+
+    def __init__(self, path='video_info_complete.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet输出需要 pyarrow，请安装: pip install pyarrow")
+        self.pa = pa
+        self.path = path
+        types = {'int': pa.int64(), 'str': pa.string(),
+                 'list': pa.list_(pa.string()), 'datetime': pa.timestamp('s')}
+        self.schema = pa.schema([(name, types[kind]) for name, _, kind in SCHEMA])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write_rows(self, rows):
+        columns = {name: [row[name] for row in rows] for name in self.schema.names}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class VideoSink:
+    """
+    批量写入入口，可同时写多个后端
+    用法：
+        with open_sink(['video_info_complete.csv', 'video_info_complete.parquet']) as sink:
+            sink.write(index, record)
+    """
+
+    def __init__(self, backends, batch_size=50):
+        self.backends = backends
+        self.batch_size = batch_size
+        self.buffer = []
+        self.count = 0
+
+    def write(self, index, record):
+        self.buffer.append(typed_row(index, record))
+        self.count += 1
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            for backend in self.backends:
+                with telemetry.span('sink_write', backend=type(backend).__name__) as span:
+                    span.set(rows=len(self.buffer))
+                    backend.write_rows(self.buffer)
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        for backend in self.backends:
+            backend.close()
+        print(f"已写入 {self.count} 条记录: {', '.join(b.path for b in self.backends)}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_sink(paths, batch_size=50):
+    """按文件扩展名选择后端（.csv / .parquet）；以 '/' 结尾的路径为历史快照目录（见 snapshot_store.py）"""
+    if isinstance(paths, str):
+        paths = [paths]
+    backends = []
+    for path in paths:
+        if path.endswith(('/', os.sep)):
+            from snapshot_store import SnapshotSink
+            backends.append(SnapshotSink(path.rstrip('/' + os.sep)))
+        elif path.endswith('.parquet'):
+            backends.append(ParquetSink(path))
+        else:
+            backends.append(CsvSink(path))
+    return VideoSink(backends, batch_size)
+
+
+def load_videos(path='video_info_complete.csv'):
+    """
+    按类型读取爬虫输出：Parquet直接读取；CSV使用显式类型表解析
+    """
+    import pandas as pd
+
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # 含空值的整数列保持为可空整数，而不是退化成 float
+        return pq.read_table(path).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+    dtype = {name: 'Int64' for name in INT_COLUMNS}
+    df = pd.read_csv(path, encoding='utf-8-sig', dtype=dtype, na_values=['N/A', '-'])
+    df['发布时间'] = pd.to_datetime(df['发布时间'], format='mixed', errors='coerce')
+    return df
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+B站扩展数据（粉丝数 / 评论数 / 弹幕数）获取层
+- 评论数、弹幕数直接取自页面 videoData.stat（reply / danmaku），不再单独请求
+  /x/web-interface/view；只有页面里没有时才回退到接口，且一次请求同时取两项
+- 同一次运行中，同一个UP主（mid）只请求一次，并发请求会合并
+- SQLite 磁盘缓存带过期时间（TTL），TTL 内重复爬取不再发请求
+- 记录缓存命中 / 未命中次数
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+
+import telemetry
+
+CACHE_FILE = "stats_cache.sqlite"
+DEFAULT_TTL = 6 * 3600  # 粉丝数变化慢，默认缓存6小时
+
+
+class StatsCache:
+    """
+    SQLite TTL 缓存，键为 (kind, key)，值以JSON保存
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS api_cache ("
+            " kind TEXT, key TEXT, value TEXT, fetched_at REAL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        self.conn.commit()
+
+    def get(self, kind, key):
+        row = self.conn.execute(
+            "SELECT value, fetched_at FROM api_cache WHERE kind = ? AND key = ?",
+            (kind, str(key)),
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, kind, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO api_cache VALUES (?, ?, ?, ?)",
+            (kind, str(key), json.dumps(value), time.time()),
+        )
+        self.conn.commit()
+
+    def purge(self):
+        """删除已过期的缓存"""
+        self.conn.execute("DELETE FROM api_cache WHERE fetched_at < ?", (time.time() - self.ttl,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def is_missing(value):
+    return value is None or value == 'N/A'
+
+
+class StatsLayer:
+    """
+    扩展数据获取层：本次运行内存去重 -> 磁盘TTL缓存 -> 真正发请求
+    fetch 回调由调用方提供（同步爬虫用 requests，异步爬虫用 aiohttp）
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else StatsCache()
+        self.memo = {}      # 本次运行已取到的值
+        self.pending = {}   # 异步模式下正在进行中的请求
+        self.counters = {'page': 0, 'memo': 0, 'cache_hit': 0, 'cache_miss': 0}
+
+    def _cached(self, kind, key):
+        if (kind, key) in self.memo:
+            self.counters['memo'] += 1
+            return self.memo[(kind, key)]
+        value = self.cache.get(kind, key)
+        if value is not None:
+            self.counters['cache_hit'] += 1
+            self.memo[(kind, key)] = value
+            return value
+        self.counters['cache_miss'] += 1
+        return None
+
+    def _store(self, kind, key, value):
+        # 失败的结果（N/A）不缓存，下次再试
+        if not is_missing(value) and value != ['N/A', 'N/A']:
+            self.memo[(kind, key)] = value
+            self.cache.put(kind, key, value)
+
+    def lookup(self, kind, key, fetch):
+        """同步查询"""
+        value = self._cached(kind, key)
+        if value is None:
+            value = fetch(key)
+            self._store(kind, key, value)
+        return value
+
+    async def lookup_async(self, kind, key, fetch):
+        """异步查询，同一个键的并发请求只发一次"""
+        if (kind, key) in self.pending:
+            self.counters['memo'] += 1
+            return await self.pending[(kind, key)]
+        value = self._cached(kind, key)
+        if value is not None:
+            return value
+        future = asyncio.get_running_loop().create_future()
+        self.pending[(kind, key)] = future
+        try:
+            value = await fetch(key)
+            self._store(kind, key, value)
+            future.set_result(value)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self.pending[(kind, key)]
+        return value
+
+    def fill(self, record, fetch_view_stat, fetch_fans):
+        """
+        同步补全记录中的扩展数据
+        fetch_view_stat(aid) -> (评论数, 弹幕数)；fetch_fans(mid) -> 粉丝数
+        """
+        aid, mid = record['aid'], record['mid']
+        if aid != 'N/A':
+            if is_missing(record['comments_count']) or is_missing(record['danmaku_count']):
+                record['comments_count'], record['danmaku_count'] = self.lookup(
+                    'view', aid, lambda a: list(fetch_view_stat(a)))
+            else:
+                self.counters['page'] += 1
+        if mid != 'N/A':
+            record['fans_count'] = self.lookup('fans', mid, fetch_fans)
+        return record
+
+    async def fill_async(self, record, fetch_view_stat, fetch_fans):
+        """异步补全记录中的扩展数据（回调为协程函数）"""
+        aid, mid = record['aid'], record['mid']
+        if aid != 'N/A':
+            if is_missing(record['comments_count']) or is_missing(record['danmaku_count']):
+                async def fetch_view(a):
+                    return list(await fetch_view_stat(a))
+                record['comments_count'], record['danmaku_count'] = await self.lookup_async(
+                    'view', aid, fetch_view)
+            else:
+                self.counters['page'] += 1
+        if mid != 'N/A':
+            record['fans_count'] = await self.lookup_async('fans', mid, fetch_fans)
+        return record
+
+    def report(self):
+        c = self.counters
+        print(f"扩展数据统计: 页面直取 {c['page']} 次, 本次运行去重 {c['memo']} 次, "
+              f"缓存命中 {c['cache_hit']} 次, 缓存未命中(发请求) {c['cache_miss']} 次")
+        for source, n in c.items():
+            telemetry.gauge('stats_lookups', n, source=source)
+        return dict(c)
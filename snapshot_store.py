@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+排行榜历史快照存储（只追加，按日期/小时分区的 Parquet）
+- 每次爬取写一个文件：snapshots/date=YYYY-MM-DD/hour=HH/crawl-YYYYmmddTHHMMSS.parquet，
+  不覆盖、不修改已有文件；行按 BV号 排序，每行带 抓取时间
+- 读取全部通过 pyarrow 内存映射（memory_map），查询只读需要的文件 / 列 / row group，
+  不把整个历史读进 pandas：
+    latest()              最近一次快照
+    history(bvid)         一个视频在所有快照中的记录（按 BV号 过滤下推到 row group 统计信息）
+    deltas(t0, t1)        两次快照之间各视频的增量和每小时增速
+- 写入端 SnapshotSink 与 scraping_sink 的 CsvSink / ParquetSink 接口相同，
+  open_sink 中以 '/' 结尾的路径即为快照目录
+"""
+
+import os
+import re
+from datetime import datetime
+
+from scraping_checkpoint import bvid_from_link
+from scraping_sink import SCHEMA
+
+SNAPSHOT_DIR = "snapshots"
+CRAWL_TIME_COL = '抓取时间'
+FILE_PATTERN = re.compile(r'crawl-(\d{8}T\d{6})\.parquet$')
+DEFAULT_METRICS = ('播放量', '点赞数', '投币数', '收藏数', '分享数', '视频评论数', '视频弹幕数')
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("快照存储需要 pyarrow，请安装: pip install pyarrow")
+    return pa, pq
+
+
+def snapshot_schema(pa):
+    types = {'int': pa.int64(), 'str': pa.string(),
+             'list': pa.list_(pa.string()), 'datetime': pa.timestamp('s')}
+    return pa.schema([('bvid', pa.string()), (CRAWL_TIME_COL, pa.timestamp('s'))]
+                     + [(name, types[kind]) for name, _, kind in SCHEMA])
+
+
+def partition_path(root, crawl_time):
+    return os.path.join(root, f"date={crawl_time:%Y-%m-%d}", f"hour={crawl_time:%H}",
+                        f"crawl-{crawl_time:%Y%m%dT%H%M%S}.parquet")
+
+
+class SnapshotSink:
+    """
+    一次爬取 = 一个快照文件；关闭时按 BV号 排序后一次写出（临时文件 + 原子重命名）
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR, crawl_time=None, row_group_size=4096):
+        self.pa, self.pq = _arrow()
+        self.root = root
+        self.crawl_time = (crawl_time or datetime.now()).replace(microsecond=0)
+        self.row_group_size = row_group_size
+        self.path = partition_path(root, self.crawl_time)
+        if os.path.exists(self.path):
+            raise FileExistsError(f"快照已存在（只追加，不覆盖）: {self.path}")
+        self.schema = snapshot_schema(self.pa)
+        self.rows = []
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.rows.append(dict(row, bvid=bvid_from_link(row['视频链接'] or ''),
+                                  **{CRAWL_TIME_COL: self.crawl_time}))
+
+    def close(self):
+        self.rows.sort(key=lambda row: row['bvid'])
+        columns = {name: [row[name] for row in self.rows] for name in self.schema.names}
+        table = self.pa.Table.from_pydict(columns, schema=self.schema)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.pq.write_table(table, self.path + '.tmp', row_group_size=self.row_group_size)
+        os.replace(self.path + '.tmp', self.path)
+
+
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.pa, self.pq = _arrow()
+        self.root = root
+
+    def crawls(self):
+        """所有快照 [(抓取时间, 文件路径), ...]，按时间排序；只列目录，不读文件"""
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                match = FILE_PATTERN.match(filename)
+                if match:
+                    found.append((datetime.strptime(match.group(1), '%Y%m%dT%H%M%S'),
+                                  os.path.join(dirpath, filename)))
+        return sorted(found)
+
+    def _crawl_path(self, crawl_time):
+        for when, path in self.crawls():
+            if when == crawl_time:
+                return path
+        raise KeyError(f"没有该时间的快照: {crawl_time}")
+
+    def read(self, path, columns=None, filters=None):
+        """内存映射读取一个快照文件（可只读部分列 / 按条件过滤 row group）"""
+        return self.pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+
+    def dataset(self):
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+        return ds.dataset(self.root, format='parquet', partitioning='hive',
+                          filesystem=fs.LocalFileSystem(use_mmap=True))
+
+    def latest(self, columns=None):
+        """最近一次快照（pandas DataFrame）"""
+        crawls = self.crawls()
+        if not crawls:
+            return None
+        return self.read(crawls[-1][1], columns).to_pandas()
+
+    def history(self, bvid, columns=None):
+        """一个视频的全部快照记录，按抓取时间排序"""
+        import pyarrow.dataset as ds
+        columns = None if columns is None else list(dict.fromkeys(['bvid', CRAWL_TIME_COL] + list(columns)))
+        table = self.dataset().to_table(columns=columns, filter=ds.field('bvid') == bvid)
+        return table.to_pandas().sort_values(CRAWL_TIME_COL).reset_index(drop=True)
+
+    def deltas(self, start=None, end=None, metrics=DEFAULT_METRICS):
+        """
+        两次快照之间的增量：默认最近两次；start / end 为抓取时间（datetime）
+        返回每个视频（两次都出现）的 指标_增量 和 指标_每小时
+        """
+        crawls = self.crawls()
+        if start is None or end is None:
+            if len(crawls) < 2:
+                raise ValueError("至少需要两次快照才能计算增量")
+            (start, start_path), (end, end_path) = crawls[-2], crawls[-1]
+        else:
+            start_path, end_path = self._crawl_path(start), self._crawl_path(end)
+
+        columns = ['bvid', '视频标题'] + list(metrics)
+        old = self.read(start_path, ['bvid'] + list(metrics))
+        new = self.read(end_path, columns)
+        old = old.rename_columns(['bvid'] + [f'{m}_旧' for m in metrics])
+        df = new.join(old, 'bvid', join_type='inner').to_pandas()
+
+        hours = (end - start).total_seconds() / 3600
+        for m in metrics:
+            df[f'{m}_增量'] = df[m] - df[f'{m}_旧']
+            df[f'{m}_每小时'] = df[f'{m}_增量'] / hours if hours > 0 else float('nan')
+        df = df.drop(columns=[f'{m}_旧' for m in metrics])
+        df.attrs.update(start=start, end=end)
+        return df.sort_values(f'{metrics[0]}_增量', ascending=False).reset_index(drop=True)
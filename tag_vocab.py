@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+标签 / 类别词表（整数编码 + CSR 稀疏矩阵）
+- 爬虫把 标签 / 类别 写成 Python 列表字符串（"['火锅', '火锅底料', 'Vlog']"），
+  这里只解析一次（相同字符串只解析一次），之后全部用整数编码：
+    vocab    词表（标签字符串，按首次出现顺序）
+    indptr   第 i 个视频的标签编码为 indices[indptr[i]:indptr[i+1]]（CSR）
+    indices  标签编码（int32）
+  按标签查视频时另建一份按标签排序的转置（CSC），第一次用到时才建
+- 查询：含某标签的视频 / 标签共现 / 按标签汇总播放量等指标 / 展开成 (视频, 标签) 长表
+- 用法：
+    tags = TagVocab.from_series(df['标签'])
+    df[tags.mask('火锅')]; tags.cooccurrence('火锅'); tags.aggregate(df['播放量'])
+"""
+
+import ast
+
+import numpy as np
+import pandas as pd
+
+
+def parse_tag_list(value):
+    """一个单元格 -> 标签列表；支持列表（Parquet）、列表字符串（CSV）、逗号分隔字符串"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(v) for v in value]
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA:
+        return []
+    text = str(value).strip()
+    if text in ('', 'N/A', '[]'):
+        return []
+    if text.startswith('['):
+        try:
+            return [str(v).strip() for v in ast.literal_eval(text) if str(v).strip()]
+        except (ValueError, SyntaxError):
+            text = text.strip('[]')
+    return [t.strip(" '\"") for t in text.split(',') if t.strip(" '\"")]
+
+
+class TagVocab:
+    def __init__(self, vocab, indptr, indices, index=None):
+        self.vocab = pd.Index(vocab, dtype=object)
+        self.indptr = indptr
+        self.indices = indices
+        self.index = index if index is not None else pd.RangeIndex(len(indptr) - 1)
+        self._code_of = {tag: code for code, tag in enumerate(self.vocab)}
+        self._csc = None
+
+    @classmethod
+    def from_series(cls, series):
+        """从 标签 / 类别 列构建；同样的原始字符串只解析一次"""
+        series = pd.Series(series)
+        code_of = {}
+        parsed = {}
+        lengths = np.zeros(len(series), dtype=np.int64)
+        chunks = []
+        for i, value in enumerate(series.tolist()):
+            key = value if isinstance(value, str) else None
+            codes = parsed.get(key) if key is not None else None
+            if codes is None:
+                tags = list(dict.fromkeys(parse_tag_list(value)))   # 去重，保留顺序
+                codes = np.array([code_of.setdefault(tag, len(code_of)) for tag in tags], dtype=np.int32)
+                if key is not None:
+                    parsed[key] = codes
+            lengths[i] = len(codes)
+            chunks.append(codes)
+        indptr = np.zeros(len(series) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+        return cls(list(code_of), indptr, indices.astype(np.int32, copy=False), series.index)
+
+    # ---------- 基本信息 ----------
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self):
+        """编码后占用的内存（数组 + 词表字符串）"""
+        return (self.indptr.nbytes + self.indices.nbytes
+                + int(self.vocab.memory_usage(deep=True)))
+
+    def code(self, tag):
+        if tag not in self._code_of:
+            raise KeyError(f"词表中没有该标签: {tag}")
+        return self._code_of[tag]
+
+    def row_ids(self):
+        """indices 中每个元素所属的视频行号"""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.indptr))
+
+    def tags_of(self, row):
+        return self.vocab[self.indices[self.indptr[row]:self.indptr[row + 1]]].tolist()
+
+    def counts(self):
+        """每个标签出现的视频数，降序"""
+        counts = np.bincount(self.indices, minlength=len(self.vocab))
+        return pd.Series(counts, index=self.vocab, name='视频数').sort_values(ascending=False)
+
+    # ---------- 按标签查视频 ----------
+    def _transpose(self):
+        if self._csc is None:
+            rows = self.row_ids()
+            order = np.argsort(self.indices, kind='stable')
+            tag_ptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=len(self.vocab)), out=tag_ptr[1:])
+            self._csc = (tag_ptr, rows[order])
+        return self._csc
+
+    def rows_with(self, tag):
+        """含该标签的视频行号（升序）"""
+        tag_ptr, rows = self._transpose()
+        code = self.code(tag)
+        return rows[tag_ptr[code]:tag_ptr[code + 1]]
+
+    def mask(self, tag):
+        """布尔 Series（索引与原数据一致），可直接用于 df[...]"""
+        result = np.zeros(len(self), dtype=bool)
+        if tag in self._code_of:
+            result[self.rows_with(tag)] = True
+        return pd.Series(result, index=self.index)
+
+    # ---------- 共现 / 汇总 ----------
+    def cooccurrence(self, tag, k=None):
+        """与该标签同时出现的其他标签及次数，降序"""
+        rows = self.rows_with(tag)
+        starts, stops = self.indptr[rows], self.indptr[rows + 1]
+        picked = np.concatenate([self.indices[a:b] for a, b in zip(starts, stops)]) if len(rows) else []
+        counts = np.bincount(np.asarray(picked, dtype=np.int64), minlength=len(self.vocab))
+        counts[self.code(tag)] = 0
+        result = pd.Series(counts, index=self.vocab, name='共现次数')
+        result = result[result > 0].sort_values(ascending=False)
+        return result if k is None else result.head(k)
+
+    def cooccurrence_matrix(self, top=30):
+        """出现最多的 top 个标签两两共现次数（DataFrame，对角线为各自的视频数）"""
+        codes = np.argsort(-np.bincount(self.indices, minlength=len(self.vocab)), kind='stable')[:top]
+        position = np.full(len(self.vocab), -1)
+        position[codes] = np.arange(len(codes))
+        dense = np.zeros((len(self), len(codes)), dtype=np.int32)
+        keep = position[self.indices] >= 0
+        dense[self.row_ids()[keep], position[self.indices[keep]]] = 1
+        names = self.vocab[codes]
+        return pd.DataFrame(dense.T @ dense, index=names, columns=names)
+
+    def explode(self, frame, name='标签'):
+        """
+        展开成 (视频, 标签) 长表：frame 的行按标签重复，加一列 name（分类类型，只存编码）；
+        用于 groupby(name) 做任意汇总
+        """
+        rows = self.row_ids()
+        result = frame.iloc[rows].copy()
+        result[name] = pd.Categorical.from_codes(self.indices, categories=self.vocab)
+        return result
+
+    def aggregate(self, values, funcs=('count', 'sum', 'mean', 'median')):
+        """按标签汇总一个数值列（如 播放量），按第一个汇总值降序"""
+        values = pd.Series(values).to_numpy()
+        result = (pd.Series(values[self.row_ids()])
+                  .groupby(pd.Categorical.from_codes(self.indices, categories=self.vocab), observed=True)
+                  .agg(list(funcs)))
+        return result.sort_values(result.columns[0], ascending=False)
+
+    def to_scipy(self):
+        """scipy.sparse.csr_matrix（视频 × 标签，值为1），需要 scipy"""
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError("需要 scipy，请安装: pip install scipy")
+        data = np.ones(len(self.indices), dtype=np.int32)
+        return csr_matrix((data, self.indices, self.indptr), shape=(len(self), len(self.vocab)))
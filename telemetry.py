@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标（阶段耗时 / 请求延迟 / 错误与重试次数 / 下载字节数）
+- span(name, **labels)：给一段代码计时，结束时记入延迟直方图 <name>_seconds{labels}；
+  代码抛出异常时另记 <name>_errors_total
+- count / gauge / observe：计数器（如 http_requests_total{endpoint, status}）、当前值、直接记一个耗时
+- 每次运行输出到一个文件：.jsonl（每个 span 一行事件，结尾附汇总）或 .prom（Prometheus 文本格式，
+  可交给 node_exporter 的 textfile collector）；给的是目录时两种都写，文件名为 <运行名>-<时间>
+- 可选：cProfile 统计整个运行（主线程，另存 .prof，汇总里附累计耗时最多的函数）；
+  tracemalloc 记录每个 span 期间的内存峰值（重叠的 span 都计入同一个峰值）
+- 没有启用时 span() 返回同一个空对象、count() 直接返回，开销可以忽略
+- 用法：
+    with telemetry.run('crawl', 'metrics/'):     # 或设置环境变量 BILI_METRICS=metrics/
+        with telemetry.span('stage', stage='covers'):
+            ...
+        telemetry.count('http_bytes_total', len(body), endpoint='cover')
+  环境变量 BILI_PROFILE=1 / BILI_TRACEMALLOC=1 打开 cProfile / tracemalloc
+"""
+
+import bisect
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+ENV_PATH = 'BILI_METRICS'
+ENV_PROFILE = 'BILI_PROFILE'
+ENV_TRACEMALLOC = 'BILI_TRACEMALLOC'
+
+PREFIX = 'bilibili_'     # Prometheus 指标名前缀
+# 延迟直方图的桶上界（秒），覆盖从单次解析到整页请求 / 整个阶段
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, math.inf)
+
+_recorder = None
+
+
+def endpoint_of(url):
+    """请求地址 -> 接口名（直方图 / 计数器的 endpoint 标签）"""
+    if '/x/relation/stat' in url:
+        return 'fans'
+    if '/x/web-interface/view' in url:
+        return 'view'
+    if '/video/' in url:
+        return 'page'
+    return 'other'
+
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# ================== 直方图 / span ==================
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)    # 各桶（不累计）的个数
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """按桶估计分位数（桶内线性插值）"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = max(BUCKETS[i - 1] if i else 0.0, self.min)
+                upper = min(BUCKETS[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': round(self.sum, 6),
+                'mean': round(self.sum / self.count, 6) if self.count else None,
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95), 'max': round(self.max, 6)}
+
+
+class Span:
+    __slots__ = ('recorder', 'name', 'labels', 'fields', 'wall', 'started', 'memory')
+
+    def __init__(self, recorder, name, labels):
+        self.recorder = recorder
+        self.name = name
+        self.labels = labels
+        self.fields = {}
+        self.memory = None
+
+    def set(self, **fields):
+        """附加信息（行数、状态码等），只写进 JSONL 事件，不作为标签"""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        if self.recorder.trace_memory:
+            self.recorder.memory_enter(self)
+        self.wall = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        if self.memory is not None:
+            self.recorder.memory_exit(self)
+        self.recorder.finish_span(self, seconds)
+        return False
+
+
+class NullSpan:
+    """未启用时的空 span（全局只有一个）"""
+    __slots__ = ()
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+# ================== 记录器 ==================
+def output_paths(path, run_id):
+    """输出路径 -> (JSONL 路径 或 None, Prometheus 路径 或 None)"""
+    if path.endswith('.jsonl'):
+        return path, None
+    if path.endswith('.prom'):
+        return None, path
+    return os.path.join(path, run_id + '.jsonl'), os.path.join(path, run_id + '.prom')
+
+
+class Recorder:
+    def __init__(self, run_name, path, profile=False, trace_memory=False):
+        self.run_name = run_name
+        self.run_id = f"{run_name}-{time.strftime('%Y%m%d_%H%M%S')}"
+        self.jsonl_path, self.prom_path = output_paths(path, self.run_id)
+        for p in (self.jsonl_path, self.prom_path):
+            if p and os.path.dirname(p):
+                os.makedirs(os.path.dirname(p), exist_ok=True)
+        self.histograms = {}           # (指标名, 标签) -> Histogram
+        self.counters = {}             # (指标名, 标签) -> 累计值
+        self.gauges = {}               # (指标名, 标签) -> 当前值
+        self.lock = threading.Lock()   # 封面下载等线程池里也会记录
+        self.events = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1) if self.jsonl_path else None
+        self.profiler = cProfile.Profile() if profile else None
+        self.trace_memory = trace_memory
+        self.started_tracemalloc = False
+        self.open_spans = set()        # tracemalloc 模式下尚未结束的 span
+        self.started = time.time()
+
+    # ---------- 开始 / 结束 ----------
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        if self.profiler is not None:
+            self.profiler.enable()
+        self.write_event({'event': 'run_start', 'run': self.run_id})
+
+    def close(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.write_profile()
+        if self.trace_memory and tracemalloc.is_tracing():
+            top = tracemalloc.take_snapshot().statistics('lineno')[:15]
+            self.write_event({'event': 'memory_top', 'sites': [
+                {'site': str(stat.traceback), 'size_mb': round(stat.size / 2 ** 20, 3), 'count': stat.count}
+                for stat in top]})
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+        self.gauge('run_seconds', time.time() - self.started)
+        for (name, labels), hist in sorted(self.histograms.items()):
+            self.write_event({'event': 'histogram', 'name': name, 'labels': dict(labels), **hist.to_dict()})
+        for (name, labels), value in sorted(self.counters.items()):
+            self.write_event({'event': 'counter', 'name': name, 'labels': dict(labels), 'value': value})
+        for (name, labels), value in sorted(self.gauges.items()):
+            self.write_event({'event': 'gauge', 'name': name, 'labels': dict(labels), 'value': value})
+        if self.events is not None:
+            self.events.close()
+        if self.prom_path:
+            self.write_prometheus()
+        self.report()
+
+    # ---------- 记录 ----------
+    def write_event(self, event):
+        if self.events is not None:
+            line = json.dumps(event, ensure_ascii=False, default=str)
+            with self.lock:
+                self.events.write(line + '\n')
+
+    def finish_span(self, span, seconds):
+        with self.lock:
+            key = (span.name + '_seconds', label_key(span.labels))
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(seconds)
+            if 'error' in span.fields:
+                self._count(span.name + '_errors_total', 1, key[1])
+        if self.events is not None:
+            self.write_event({'event': 'span', 'name': span.name, **span.labels,
+                              'start': round(span.wall, 6), 'seconds': round(seconds, 6), **span.fields})
+
+    def _count(self, name, n, labels):
+        self.counters[(name, labels)] = self.counters.get((name, labels), 0) + n
+
+    def count(self, name, n=1, **labels):
+        with self.lock:
+            self._count(name, n, label_key(labels))
+
+    def gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, label_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        with self.lock:
+            key = (name, label_key(labels))
+            self.histograms.setdefault(key, Histogram()).observe(seconds)
+
+    # ---------- tracemalloc ----------
+    def memory_enter(self, span):
+        """当前峰值先计入所有未结束的 span，再把峰值清零，从这里开始重新统计"""
+        with self.lock:
+            current, peak = tracemalloc.get_traced_memory()
+            for other in self.open_spans:
+                other.memory[1] = max(other.memory[1], peak)
+            tracemalloc.reset_peak()
+            span.memory = [current, current]    # [开始时的占用, 期间的峰值]
+            self.open_spans.add(span)
+
+    def memory_exit(self, span):
+        with self.lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.open_spans.discard(span)
+            span.memory[1] = max(span.memory[1], peak)
+            for other in self.open_spans:
+                other.memory[1] = max(other.memory[1], peak)
+            span.fields['mem_peak_mb'] = round((span.memory[1] - span.memory[0]) / 2 ** 20, 3)
+
+    # ---------- 输出 ----------
+    def write_profile(self):
+        base = self.jsonl_path or self.prom_path
+        prof_path = os.path.splitext(base)[0] + '.prof'
+        self.profiler.dump_stats(prof_path)
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        top = []
+        for (file, line, func), (cc, nc, tt, ct, callers) in sorted(
+                stats.stats.items(), key=lambda item: -item[1][3])[:25]:
+            top.append({'function': f"{os.path.basename(file)}:{line}({func})", 'calls': nc,
+                        'self_seconds': round(tt, 4), 'cumulative_seconds': round(ct, 4)})
+        self.write_event({'event': 'profile', 'file': prof_path, 'top': top})
+
+    def write_prometheus(self):
+        def fmt_labels(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            escaped = [(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in items]
+            return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+        run = (('run', self.run_name),)
+        lines = []
+        for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+            for name in sorted({name for name, _ in metrics}):
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                for (n, labels), value in sorted(metrics.items()):
+                    if n == name:
+                        lines.append(f"{PREFIX}{name}{fmt_labels(run + labels)} {value}")
+        for name in sorted({name for name, _ in self.histograms}):
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for (n, labels), hist in sorted(self.histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, hist.buckets):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f"{PREFIX}{name}_bucket{fmt_labels(run + labels, [('le', le)])} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{fmt_labels(run + labels)} {hist.sum}")
+                lines.append(f"{PREFIX}{name}_count{fmt_labels(run + labels)} {hist.count}")
+        # 先写临时文件再替换，textfile collector 不会读到写了一半的文件
+        with open(self.prom_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(self.prom_path + '.tmp', self.prom_path)
+
+    def report(self):
+        print(f"运行指标[{self.run_id}]: 用时 {time.time() - self.started:.1f}s, 已写入 "
+              f"{', '.join(p for p in (self.jsonl_path, self.prom_path) if p)}")
+        for (name, labels), hist in sorted(self.histograms.items(), key=lambda item: -item[1].sum)[:12]:
+            tags = ','.join(f"{k}={v}" for k, v in labels)
+            print(f"  {name}{{{tags}}}: {hist.count} 次, 共 {hist.sum:.2f}s, "
+                  f"p50 {hist.quantile(0.5):.3f}s, p95 {hist.quantile(0.95):.3f}s, 最大 {hist.max:.3f}s")
+        for (name, labels), value in sorted(self.counters.items()):
+            tags = ','.join(f"{k}={v}" for k, v in labels)
+            print(f"  {name}{{{tags}}}: {value}")
+
+
+# ================== 模块级接口 ==================
+def enabled():
+    return _recorder is not None
+
+
+def span(name, **labels):
+    if _recorder is None:
+        return NULL_SPAN
+    return Span(_recorder, name, labels)
+
+
+def count(name, n=1, **labels):
+    if _recorder is not None:
+        _recorder.count(name, n, **labels)
+
+
+def gauge(name, value, **labels):
+    if _recorder is not None:
+        _recorder.gauge(name, value, **labels)
+
+
+def observe(name, seconds, **labels):
+    """直接记一个耗时（如工作进程里测得、由主进程汇总的渲染时间）"""
+    if _recorder is not None:
+        _recorder.observe(name, seconds, **labels)
+
+
+def record_response(endpoint, status, nbytes=0):
+    """一次HTTP请求的结果：状态码（请求异常时为 'error'）和响应体字节数"""
+    if _recorder is not None:
+        _recorder.count('http_requests_total', 1, endpoint=endpoint, status=status)
+        if nbytes:
+            _recorder.count('http_bytes_total', nbytes, endpoint=endpoint)
+
+
+def start(run_name, path=None, profile=None, trace_memory=None):
+    """
+    开始记录；path 为 None 时取环境变量 BILI_METRICS，也没有则不启用（返回 None）
+    profile / trace_memory 为 None 时取环境变量 BILI_PROFILE / BILI_TRACEMALLOC
+    """
+    global _recorder
+    path = path or os.environ.get(ENV_PATH)
+    if not path:
+        return None
+    if profile is None:
+        profile = os.environ.get(ENV_PROFILE, '') not in ('', '0')
+    if trace_memory is None:
+        trace_memory = os.environ.get(ENV_TRACEMALLOC, '') not in ('', '0')
+    _recorder = Recorder(run_name, path, profile, trace_memory)
+    _recorder.start()
+    return _recorder
+
+
+def finish():
+    """结束记录并写出文件"""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+
+
+@contextmanager
+def run(run_name, path=None, **kwargs):
+    """一次运行的记录范围；已经在记录中（如被其他入口调用）时沿用外层的记录器"""
+    if _recorder is not None:
+        yield _recorder
+        return
+    recorder = start(run_name, path, **kwargs)
+    try:
+        yield recorder
+    finally:
+        if recorder is not None:
+            finish()
+
+
+def _detach():
+    """fork 出的子进程（如渲染进程池）不沿用父进程的记录器，免得写乱父进程的文件"""
+    global _recorder
+    _recorder = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_detach)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""异步爬虫对着本地回放服务器（tests/fixtures/ 中录制的页面）离线测试：多分区、重试、限速"""
+
+import os
+import time
+from urllib.request import urlopen
+
+import pytest
+from bs4 import BeautifulSoup
+
+from crawl_replay_server import start_server
+from scraping_async import run_crawl
+from scraping_checkpoint import bvid_from_link
+from scraping_rank import extract_video_links
+from scraping_stats import StatsCache, StatsLayer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture
+def replay(request):
+    """启动回放服务器；参数为 start_server 的关键字参数"""
+    server, base = start_server(FIXTURES, **getattr(request, 'param', {}))
+    yield server, base
+    server.shutdown()
+
+
+def board_links(base, boards):
+    """从回放的排行榜页面提取链接，指向回放服务器"""
+    links = []
+    for board in boards:
+        with urlopen(f"{base}/v/popular/rank/{board}") as response:
+            soup = BeautifulSoup(response.read().decode('utf-8'), 'html.parser')
+        links += [f"{base}/video/{bvid_from_link(href)}" for href in extract_video_links(soup)]
+    return links
+
+
+def crawl(base, links, tmp_path, **kwargs):
+    records = {}
+    stats = StatsLayer(StatsCache(str(tmp_path / 'stats_cache.sqlite')))
+    kwargs.setdefault('rate', 100)
+    run_crawl(links, lambda index, record: records.__setitem__(index, record),
+              api_base=base, stats=stats, **kwargs)
+    return [records[i] for i in range(len(links))]
+
+
+def test_multi_board_crawl(replay, tmp_path):
+    server, base = replay
+    links = board_links(base, ['food', 'douga'])
+    assert [bvid_from_link(link) for link in links] == ['BV1Fx411c7aa', 'BV1Fx411c7bb', 'BV1Fx411c7cc']
+
+    records = crawl(base, links, tmp_path)
+    assert [r['title'] for r in records] == ['一口气吃遍成都苍蝇馆子', '在家复刻米其林三星甜品',
+                                             '动画里的美食做出来是什么味道']
+    first, second, third = records
+    assert first['play_count'] == 120000 and first['comments_count'] == 210 and first['danmaku_count'] == 640
+    # 页面里没有评论数 / 弹幕数时调用 view 接口补全
+    assert second['comments_count'] == 51 and second['danmaku_count'] == 71
+    assert [r['fans_count'] for r in records] == [5010000, 5020000, 5010000]
+    assert third['tags'] == ['美食', '动画'] and third['categories'] == ['综合']
+    # 3 个页面 + 1 次 view + 2 个不同UP主的粉丝数（同一UP主只请求一次）+ 2 个排行榜页面
+    assert server.counts == {'requests': 8, 'failed': 0}
+
+
+@pytest.mark.parametrize('replay', [{'fail_every': 2, 'fail_status': 429},
+                                    {'fail_every': 2, 'fail_status': 412}], indirect=True)
+def test_retry_on_rate_limit_status(replay, tmp_path):
+    server, base = replay
+    links = [f"{base}/video/BV1Fx411c7aa", f"{base}/video/BV1Fx411c7bb"]
+    records = crawl(base, links, tmp_path, workers=2)
+
+    assert server.counts['failed'] > 0
+    assert [r['title'] for r in records] == ['一口气吃遍成都苍蝇馆子', '在家复刻米其林三星甜品']
+    assert records[1]['comments_count'] == 51
+    assert [r['fans_count'] for r in records] == [5010000, 5020000]
+
+
+def test_token_bucket_paces_requests(replay, tmp_path):
+    server, base = replay
+    links = [f"{base}/video/BV1Fx411c7aa", f"{base}/video/BV1Fx411c7bb", f"{base}/video/BV1Fx411c7cc"]
+    rate = 10
+    started = time.monotonic()
+    crawl(base, links, tmp_path, workers=3, rate=rate, burst=1)
+    elapsed = time.monotonic() - started
+
+    requests = server.counts['requests']
+    assert requests == 6
+    # 桶容量为1：第一个请求立即发出，之后每个请求至少间隔 1/rate 秒
+    assert elapsed >= (requests - 1) / rate * 0.9
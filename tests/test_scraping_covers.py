@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""封面下载对着本地回放服务器的 /covers/ 测试：跳过已有、ETag 条件请求（304）、失败时清理 .part 临时文件"""
+
+import os
+import threading
+
+import pytest
+
+from crawl_replay_server import start_server
+from scraping_covers import download_covers, fetch_cover, load_validators, make_session
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture
+def replay():
+    server, base = start_server(FIXTURES)
+    yield server, base
+    server.shutdown()
+
+
+def fixture_bytes():
+    with open(os.path.join(FIXTURES, 'covers', '1001.jpg'), 'rb') as f:
+        return f.read()
+
+
+def test_download_then_skip_existing(replay, tmp_path, capsys):
+    server, base = replay
+    save_dir = str(tmp_path / 'covers')
+    items = [(1001, f"{base}/covers/1001.jpg"), ('N/A', 'N/A')]
+
+    paths = download_covers(items, save_dir=save_dir, workers=2)
+    assert paths == {1001: f"{save_dir}/1001.jpg"}
+    with open(paths[1001], 'rb') as f:
+        assert f.read() == fixture_bytes()
+    assert load_validators(save_dir)['1001']['etag']
+    assert server.counts['requests'] == 1
+
+    # 已存在：不发请求
+    capsys.readouterr()
+    assert download_covers(items, save_dir=save_dir, workers=2) == paths
+    assert server.counts['requests'] == 1
+    assert '已存在跳过 1 张' in capsys.readouterr().out
+
+
+def test_revalidate_with_etag_returns_not_modified(replay, tmp_path):
+    server, base = replay
+    save_dir = str(tmp_path / 'covers')
+    url = f"{base}/covers/1001.jpg"
+    download_covers([(1001, url)], save_dir=save_dir, workers=1)
+    mtime = os.stat(f"{save_dir}/1001.jpg").st_mtime_ns
+
+    validators = load_validators(save_dir)
+    path, status = fetch_cover(make_session(1), 1001, url, save_dir, validators, threading.Lock(),
+                               revalidate=True)
+    assert (path, status) == (f"{save_dir}/1001.jpg", 'not_modified')
+    assert server.counts['requests'] == 2
+    assert os.stat(path).st_mtime_ns == mtime
+
+    # ETag 对不上（本地记录丢了）时重新下载
+    path, status = fetch_cover(make_session(1), 1001, url, save_dir, {}, threading.Lock(), revalidate=True)
+    assert status == 'downloaded'
+
+
+def test_interrupted_download_removes_part_file(replay, tmp_path):
+    server, base = replay
+    save_dir = str(tmp_path / 'covers')
+    os.makedirs(save_dir)
+
+    path, status = fetch_cover(make_session(1), 1001, f"{base}/covers/1001.jpg?truncate=100", save_dir,
+                               {}, threading.Lock())
+    assert (path, status) == (None, 'failed')
+    assert os.listdir(save_dir) == []
+
+    # 已有旧封面时下载失败：保留旧文件，同样不留临时文件
+    with open(f"{save_dir}/1001.jpg", 'wb') as f:
+        f.write(b'old')
+    path, status = fetch_cover(make_session(1), 1001, f"{base}/covers/1001.jpg?truncate=100", save_dir,
+                               {}, threading.Lock(), revalidate=True)
+    assert (path, status) == (f"{save_dir}/1001.jpg", 'failed')
+    assert os.listdir(save_dir) == ['1001.jpg']
+    with open(path, 'rb') as f:
+        assert f.read() == b'old'
+
+    # 404 同样算失败
+    assert fetch_cover(make_session(1), 1002, f"{base}/covers/missing.jpg", save_dir,
+                       {}, threading.Lock()) == (None, 'failed')
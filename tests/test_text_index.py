@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""TextIndex 分时间窗口计数"""
+
+import pandas as pd
+
+from text_index import TextIndex, TokenCache
+
+
+def make_index(tmp_path, window):
+    return TextIndex('tags', cache=TokenCache(str(tmp_path / 'tokens.sqlite')), window=window)
+
+
+def test_windows_split_by_cleaned_publish_date(tmp_path):
+    # 清洗后CSV的 发布日期 只有日期
+    df = pd.DataFrame({
+        '视频链接': ['a', 'b', 'c', 'd'],
+        '标签': ["['火锅']", "['火锅', '烧烤']", "['烧烤']", "['火锅']"],
+        '发布日期': ['2025-12-05', '2025-12-05', '2025-12-06', None],
+    })
+    index = make_index(tmp_path, 'D')
+    index.update(df, '标签')
+
+    assert index.window_names() == ['2025-12-05', '2025-12-06']
+    assert index.frequencies('2025-12-05') == {'火锅': 2, '烧烤': 1}
+    assert index.frequencies('2025-12-06') == {'烧烤': 1}
+    # 没有日期的行只计入总数
+    assert index.frequencies() == {'火锅': 3, '烧烤': 2}
+
+
+def test_windows_from_publish_time_and_replacement(tmp_path):
+    index = make_index(tmp_path, 'M')
+    index.update(pd.DataFrame({'视频链接': ['a', 'b'], '标签': ["['火锅']", "['烧烤']"],
+                               '发布时间': ['2025-11-30 23:00:00', '2025/12/01 08:00']}),
+                 '标签', time_col='发布时间')
+    assert index.window_names() == ['2025-11', '2025-12']
+
+    # 同一视频再次出现：旧窗口里的词被撤销
+    index.update(pd.DataFrame({'视频链接': ['a'], '标签': ["['火锅']"], '发布时间': ['2025-12-02 10:00:00']}),
+                 '标签', time_col='发布时间')
+    assert index.frequencies('2025-11') == {}
+    assert index.frequencies('2025-12') == {'火锅': 1, '烧烤': 1}
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+标签 / 标题分词索引（词云和高频词统计用）
+- 每行文本单独分词，结果按 (文本内容哈希, 分词器, 版本) 缓存在 SQLite（text_tokens.sqlite），
+  同样的文本以后不再分词；词性标注（pseg）很慢，这部分收益最大
+- 缓存里没有的文本较多时用进程池并行分词（jieba.enable_parallel 不支持 Windows，这里不用）
+- 词频表增量维护：每个视频记住上次计入的词，同一视频再次出现时替换旧值；
+  可按发布时间分窗口（按日 / 周 / 月）分别计数
+- 用法：
+    tags = TextIndex('tags')
+    tags.update(df, '标签')
+    tags.top(10); WordCloud(...).generate_from_frequencies(tags.frequencies())
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from tag_vocab import parse_tag_list
+from time_parsing import parse_publish_time
+
+CACHE_FILE = "text_tokens.sqlite"
+PARALLEL_MIN = 2000      # 需要分词的文本少于这个数时直接在主进程里做（进程启动 + 加载词典约1秒）
+
+# 标题词云里去掉的无意义名词
+TITLE_JUNK = {'块钱', '小时', '分钟', '一天', '一个', '块', '元', '毛钱', '第', '天', '年', '月'}
+
+
+# ================== 分词器 ==================
+def tokenize_tags(text):
+    """标签：先解析列表字符串（tag_vocab.parse_tag_list），每个标签再用 jieba 切开，保留长度 > 1 的词"""
+    import jieba
+    return [w for tag in parse_tag_list(text) for w in jieba.lcut(tag) if len(w) > 1 and not w.isspace()]
+
+
+def tokenize_title_nouns(text):
+    """标题：词性标注后只保留名词（n），去掉 TITLE_JUNK"""
+    import jieba.posseg as pseg
+    return [w for w, f in pseg.cut(text) if f == 'n' and len(w) > 1 and w not in TITLE_JUNK]
+
+
+# 名称 -> 分词函数 / 版本（改了分词逻辑或停用词就加1，旧缓存自动失效）
+ANALYZERS = {
+    'tags': {'tokenize': tokenize_tags, 'version': 2},
+    'title_nouns': {'tokenize': tokenize_title_nouns, 'version': 1},
+}
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def tokenize_chunk(analyzer, texts):
+    """在工作进程中分词一批文本"""
+    tokenize = ANALYZERS[analyzer]['tokenize']
+    return [tokenize(text) for text in texts]
+
+
+def tokenize_many(analyzer, texts, workers=None, chunk_size=500):
+    """分词一组文本；数量多时分块放进进程池"""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(texts) < PARALLEL_MIN:
+        return tokenize_chunk(analyzer, texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        results = pool.map(tokenize_chunk, [analyzer] * len(chunks), chunks)
+        return [tokens for chunk in results for tokens in chunk]
+
+
+# ================== 分词缓存 ==================
+class TokenCache:
+    def __init__(self, path=CACHE_FILE):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            " hash TEXT, analyzer TEXT, version TEXT, tokens TEXT,"
+            " PRIMARY KEY (hash, analyzer))"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def version(analyzer):
+        """分词器版本 + jieba 版本（词典随 jieba 升级会变）"""
+        import jieba
+        return f"{ANALYZERS[analyzer]['version']}/{jieba.__version__}"
+
+    def get_many(self, analyzer, hashes):
+        version = self.version(analyzer)
+        found = {}
+        hashes = list(hashes)
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT hash, tokens FROM tokens WHERE analyzer = ? AND version = ?"
+                f" AND hash IN ({','.join('?' * len(chunk))})",
+                [analyzer, version] + chunk,
+            )
+            found.update((h, json.loads(tokens)) for h, tokens in rows)
+        return found
+
+    def put_many(self, analyzer, items):
+        version = self.version(analyzer)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?, ?)",
+            [(h, analyzer, version, json.dumps(tokens, ensure_ascii=False)) for h, tokens in items],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# ================== 词频索引 ==================
+class TextIndex:
+    def __init__(self, analyzer, cache=None, window=None, workers=None):
+        """
+        analyzer: ANALYZERS 中的名称
+        window:   None 不分窗口；或 pandas 周期代码，如 'D' 按日、'W' 按周、'M' 按月
+        """
+        if analyzer not in ANALYZERS:
+            raise ValueError(f"未知分词器: {analyzer}，可选 {list(ANALYZERS)}")
+        self.analyzer = analyzer
+        self.cache = cache or TokenCache()
+        self.window = window
+        self.workers = workers
+        self.rows = {}                 # 视频 -> (窗口, 词列表)
+        self.totals = Counter()
+        self.windows = {}              # 窗口 -> Counter
+        self.counters = {'rows': 0, 'cache_hit': 0, 'tokenized': 0, 'replaced': 0}
+
+    def _windows_of(self, df, time_col):
+        if self.window is None:
+            return [None] * len(df)
+        times = parse_publish_time(df[time_col])
+        # 不能用 .where(..., None)：pandas 3 中字符串列的缺失值是 NaN，会把所有缺失行归入 'nan' 窗口
+        periods = times.dt.to_period(self.window).astype(str).tolist()
+        return [period if ok else None for period, ok in zip(periods, times.notna().tolist())]
+
+    def update(self, df, text_col, key_col='视频链接', time_col='发布日期'):
+        """
+        合并新数据：text_col 为要分词的列（如 标签 / 视频标题）；
+        key_col 标识视频（没有这一列时用行索引），time_col 仅在分窗口时使用
+        """
+        texts = df[text_col].fillna('').astype(str).tolist()
+        keys = (df[key_col].astype(str) if key_col in df else df.index.astype(str)).tolist()
+        windows = self._windows_of(df, time_col)
+
+        hashes = [text_hash(text) for text in texts]
+        unique = dict(zip(hashes, texts))
+        tokens_of = self.cache.get_many(self.analyzer, unique)
+        missing = [h for h in unique if h not in tokens_of]
+        if missing:
+            results = tokenize_many(self.analyzer, [unique[h] for h in missing], self.workers)
+            self.cache.put_many(self.analyzer, zip(missing, results))
+            tokens_of.update(zip(missing, results))
+        self.counters['cache_hit'] += len(unique) - len(missing)
+        self.counters['tokenized'] += len(missing)
+
+        for key, window, h in zip(keys, windows, hashes):
+            old = self.rows.get(key)
+            if old is not None:
+                self._count(*old, sign=-1)
+                self.counters['replaced'] += 1
+            self.rows[key] = (window, tokens_of[h])
+            self._count(window, tokens_of[h], sign=1)
+        self.counters['rows'] += len(keys)
+        return len(missing)
+
+    def _count(self, window, tokens, sign):
+        targets = [self.totals]
+        if window is not None:
+            targets.append(self.windows.setdefault(window, Counter()))
+        for counter in targets:
+            counter.update({w: sign * n for w, n in Counter(tokens).items()})
+            if sign < 0:
+                for w in set(tokens):
+                    if counter[w] <= 0:
+                        del counter[w]
+
+    def frequencies(self, window=None):
+        """词频 Counter；window 为单个窗口或窗口列表（如 ['2024-05-01', '2024-05-02']），None 为全部"""
+        if window is None:
+            return Counter(self.totals)
+        if isinstance(window, str):
+            return Counter(self.windows.get(window, {}))
+        merged = Counter()
+        for w in window:
+            merged.update(self.windows.get(w, {}))
+        return merged
+
+    def top(self, k=10, window=None):
+        return self.frequencies(window).most_common(k)
+
+    def window_names(self):
+        return sorted(self.windows)
+
+    def report(self):
+        c = self.counters
+        print(f"分词索引[{self.analyzer}]: {len(self.rows)} 行, {len(self.totals)} 个词, "
+              f"缓存命中 {c['cache_hit']} 条文本, 新分词 {c['tokenized']} 条, 替换旧值 {c['replaced']} 行")
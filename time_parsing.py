@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+时间 / 时长解析（数据清洗和可视化共用）
+全部为向量化操作，不再逐行 .apply：
+- parse_duration_seconds: “视频时长” "H:MM:SS" / "M:SS" / "SS" -> 整数秒
+- parse_publish_time:     “发布时间” -> datetime64
+- time_parts:             发布时间 -> 小时 / 星期（0=周一）/ 中文星期 / 日期
+"""
+
+import numpy as np
+import pandas as pd
+
+# 两个文件中出现过的发布时间格式：爬虫输出 / 手工整理后的样本；
+# 最后是清洗后CSV的 发布日期 列（只有日期）
+PUBLISH_TIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M:%S',
+                        '%Y-%m-%d']
+
+WEEKDAY_NAMES = np.array(['星期一', '星期二', '星期三', '星期四', '星期五', '星期六', '星期日'], dtype=object)
+
+
+def parse_duration_seconds(durations):
+    """
+    解析视频时长，返回秒数（可空整数 Int64，无法解析或 "-" 为 <NA>）
+    时长取值重复度很高，先 factorize 只解析不重复的值，再按编码取回
+    """
+    durations = pd.Series(durations)
+    codes, uniques = pd.factorize(durations.astype('string').str.strip())
+    if len(uniques) == 0:
+        return pd.Series(pd.array([pd.NA] * len(durations), dtype='Int64'), index=durations.index)
+
+    parts = pd.Series(uniques).str.split(':', expand=True)
+    parts = parts.apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64')
+    n_parts = pd.Series(uniques).str.count(':').to_numpy() + 1
+
+    # 右对齐：秒在最后一列，分在倒数第二列，时在倒数第三列
+    width = parts.shape[1]
+    seconds = np.full(len(uniques), np.nan)
+    for n, weights in [(1, [1]), (2, [60, 1]), (3, [3600, 60, 1])]:
+        rows = n_parts == n
+        if rows.any() and width >= n:
+            seconds[rows] = parts[rows, :n] @ np.array(weights, dtype='float64')
+
+    values = np.where(codes >= 0, seconds[np.maximum(codes, 0)], np.nan)
+    return pd.Series(values, index=durations.index).round().astype('Int64')
+
+
+def parse_publish_time(times, formats=PUBLISH_TIME_FORMATS):
+    """
+    解析发布时间为 datetime64；依次尝试已知格式，每种格式一次向量化解析，
+    只对仍未解析的行尝试下一种格式
+    """
+    times = pd.Series(times)
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return times
+    text = times.astype('string').str.strip()
+    result = pd.Series(pd.NaT, index=times.index, dtype='datetime64[ns]')
+    remaining = text.notna()
+    for fmt in formats:
+        if not remaining.any():
+            break
+        parsed = pd.to_datetime(text[remaining], format=fmt, errors='coerce')
+        result[remaining] = parsed
+        remaining = remaining & result.isna()
+    return result
+
+
+def time_parts(times):
+    """
+    返回由发布时间派生的列：
+    发布时间_dt（datetime64）、发布小时、发布星期（0=周一）、星期几（中文）、发布日期
+    """
+    dt = parse_publish_time(times)
+    weekday = dt.dt.dayofweek
+    weekday_name = pd.Series(WEEKDAY_NAMES[weekday.fillna(0).astype(int).to_numpy()],
+                             index=dt.index).where(weekday.notna())
+    return pd.DataFrame({
+        '发布时间_dt': dt,
+        '发布小时': dt.dt.hour,
+        '发布星期': weekday,
+        '星期几': weekday_name,
+        '发布日期': dt.dt.normalize(),
+    })